@@ -0,0 +1 @@
+"""Offline benchmarks for the retrieval stack. Run modules with `python -m benchmarks.<name>`."""
@@ -0,0 +1,97 @@
+"""
+Recall@k vs latency of the ANN indexes against the exact InMemoryVectorStore.
+
+    python -m benchmarks.ann_recall --n 20000 --dim 64 --queries 200 --k 10
+
+Vectors are a synthetic mixture of Gaussians (clustered like real sentence embeddings).
+Prints one JSON object per configuration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.retrieval.store_ann import HNSWIndex, IVFIndex
+from src.retrieval.store_vector import InMemoryVectorStore
+
+
+def clustered_vectors(n: int, dim: int, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(n_clusters, dim))
+    X = centers[rng.integers(0, n_clusters, size=n)] + 0.35 * rng.normal(size=(n, dim))
+    return X.astype(np.float32)
+
+
+def _run(index, queries: np.ndarray, k: int) -> tuple[list[set[str]], list[float]]:
+    found, lat = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = index.search(q, k)
+        lat.append((time.perf_counter() - t0) * 1000)
+        found.append({h[0] for h in hits})
+    return found, lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="*", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--ef", type=int, nargs="*", default=[16, 32, 64, 128])
+    ap.add_argument("--skip-hnsw", action="store_true")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = clustered_vectors(args.n, args.dim, max(args.n // 200, 8), rng)
+    Q = clustered_vectors(args.queries, args.dim, max(args.n // 200, 8), rng)
+    ids = [f"d{i}" for i in range(args.n)]
+
+    def report(name: str, params: dict, build_s: float, index) -> list[set[str]]:
+        found, lat = _run(index, Q, args.k)
+        recall = float(np.mean([len(f & t) / args.k for f, t in zip(found, truth, strict=True)]))
+        row = {
+            "index": name,
+            **params,
+            "n": args.n,
+            "dim": args.dim,
+            "build_s": round(build_s, 3),
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            f"recall@{args.k}": round(recall, 4),
+        }
+        print(json.dumps(row))
+        return found
+
+    t0 = time.perf_counter()
+    exact = InMemoryVectorStore(args.dim, capacity=args.n)
+    exact.add(ids, X)
+    build = time.perf_counter() - t0
+    truth = _run(exact, Q, args.k)[0]
+    report("exact", {}, build, exact)
+
+    t0 = time.perf_counter()
+    ivf = IVFIndex(args.dim)
+    ivf.add(ids, X)
+    build = time.perf_counter() - t0
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        report("ivf", {"nlist": int(ivf.centroids.shape[0]), "nprobe": nprobe}, build, ivf)
+
+    if args.skip_hnsw:
+        return
+    t0 = time.perf_counter()
+    hnsw = HNSWIndex(args.dim)
+    hnsw.add(ids, X)
+    build = time.perf_counter() - t0
+    for ef in args.ef:
+        hnsw.ef_search = ef
+        report("hnsw", {"M": hnsw.M, "ef_search": ef}, build, hnsw)
+
+
+if __name__ == "__main__":
+    main()
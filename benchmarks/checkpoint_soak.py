@@ -0,0 +1,90 @@
+"""
+Soak test of conversation state: RSS while many conversations chat through the full graph.
+
+    python -m benchmarks.checkpoint_soak --turns 20000 --conversations 50000
+
+"unbounded" is the old process-global InMemorySaver; "bounded" is the BoundedMemorySaver
+built from CHECKPOINT_* settings (use --max-threads to tighten it). Each turn continues a
+random conversation, or starts a new one, so the set of ids keeps growing. Prints one JSON
+object per checkpoint of the run with RSS (MiB) and the saver's size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import time
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.config import settings
+from src.graph import graph
+from src.graph.checkpoint import BoundedMemorySaver
+from src.retrieval.hybrid import get_engine
+from src.types import ChatRequest
+
+from .report import rss_mib
+
+MESSAGES = [
+    "What's new in app dev?",
+    "Compare vector databases for Postgres",
+    "How do incremental RAG pipelines work?",
+    "Summarize the latest agent tooling",
+]
+
+
+async def _soak(mode: str, turns: int, conversations: int, report_every: int) -> None:
+    if mode == "bounded":
+        saver = BoundedMemorySaver(
+            max_threads=settings.checkpoint_max_threads,
+            idle_ttl_s=settings.checkpoint_idle_ttl_s,
+            max_bytes=settings.checkpoint_max_bytes,
+            keep=settings.checkpoint_keep,
+        )
+    else:
+        saver = InMemorySaver()
+    graph.checkpointer = saver
+    graph.agent_app = graph.graph.compile(checkpointer=saver)
+    rng = random.Random(0)
+    t0 = time.perf_counter()
+    for turn in range(1, turns + 1):
+        req = ChatRequest(
+            conversationId=f"c{rng.randrange(conversations)}",
+            message=rng.choice(MESSAGES),
+            role="user",
+        )
+        async for _ in graph.ainvoke(req):
+            pass
+        if turn % report_every == 0:
+            gc.collect()
+            row = {
+                "mode": mode,
+                "turns": turn,
+                "rss_mib": round(rss_mib(), 1),
+                "conversations": len(saver.storage),
+                "turns_per_s": round(turn / (time.perf_counter() - t0), 1),
+            }
+            if isinstance(saver, BoundedMemorySaver):
+                row["state_mib"] = round(saver.nbytes / 2**20, 2)
+            print(json.dumps(row), flush=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["unbounded", "bounded"], default="bounded")
+    ap.add_argument("--turns", type=int, default=20000)
+    ap.add_argument("--conversations", type=int, default=50000)
+    ap.add_argument("--max-threads", type=int, default=None)
+    ap.add_argument("--report-every", type=int, default=2000)
+    args = ap.parse_args()
+    if args.max_threads is not None:
+        settings.checkpoint_max_threads = args.max_threads
+    get_engine()
+    asyncio.run(_soak(args.mode, args.turns, args.conversations, args.report_every))
+
+
+if __name__ == "__main__":
+    main()
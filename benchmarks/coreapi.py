@@ -0,0 +1,105 @@
+"""
+Core API retrieval latency at 1/10/100 concurrent chats against a local stand-in server.
+
+    python -m benchmarks.coreapi --latency-ms 10 --rounds 5
+
+"naive" opens a client per chat and fetches the hit items one after another (the shape of
+the old CoreApiClient); "tuned" is the shared pooled client with single-flight searches and
+concurrent item fetches; "batch" also sets CORE_API_BATCH_ITEMS. Queries are drawn from a
+small pool, so concurrent chats repeat popular queries. Prints one JSON object per row.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+from tests.doubles.fake_coreapi import FakeCoreApi
+
+from src.config import settings
+from src.graph import retriever
+from src.retrieval import client_coreapi
+from src.retrieval.client_coreapi import CoreApiClient
+
+QUERIES = [
+    "vector db for postgres",
+    "incremental rag pipelines",
+    "devday app developer tools",
+    "agents and evaluation",
+    "llm latency in production",
+]
+
+
+async def _naive(base_url: str, query: str, k: int) -> int:
+    async with httpx.AsyncClient(timeout=10) as client:
+        r = await client.get(f"{base_url}/search", params={"q": query, "k": k})
+        r.raise_for_status()
+        hits = r.json()["results"]
+        for h in hits:
+            (await client.get(f"{base_url}/items/{h['slug']}")).raise_for_status()
+    return len(hits)
+
+
+async def _tuned(query: str, k: int) -> int:
+    out = await retriever.aretrieve_docs({"query": query, "k": k})
+    return len(out["retrieved"])
+
+
+async def _round(mode: str, base_url: str, concurrency: int, k: int, rng: random.Random):
+    lat: list[float] = []
+
+    async def one() -> None:
+        q = rng.choice(QUERIES)
+        t0 = time.perf_counter()
+        if mode == "naive":
+            await _naive(base_url, q, k)
+        else:
+            await _tuned(q, k)
+        lat.append((time.perf_counter() - t0) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+    return lat
+
+
+async def _run(mode: str, base_url: str, concurrency: int, rounds: int, k: int) -> list[float]:
+    settings.core_api_batch_items = mode == "batch"
+    client_coreapi._client = CoreApiClient(base_url) if mode != "naive" else None
+    rng = random.Random(0)
+    lat: list[float] = []
+    for _ in range(rounds):
+        lat += await _round(mode, base_url, concurrency, k, rng)
+    await client_coreapi.close_core_client()
+    return lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency-ms", type=float, default=10.0)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+    settings.use_mocks = False
+
+    for concurrency in (1, 10, 100):
+        for mode in ("naive", "tuned", "batch"):
+            server = FakeCoreApi(latency_ms=args.latency_ms).start()
+            lat = asyncio.run(_run(mode, server.base_url, concurrency, args.rounds, args.k))
+            server.stop()
+            row = {
+                "mode": mode,
+                "concurrency": concurrency,
+                "chats": len(lat),
+                "upstream_requests": server.requests,
+                "p50_ms": round(float(np.percentile(lat, 50)), 2),
+                "p99_ms": round(float(np.percentile(lat, 99)), 2),
+            }
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
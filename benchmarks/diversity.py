@@ -0,0 +1,121 @@
+"""
+Cost of the diversity stage at growing candidate counts: per-domain cap vs MMR.
+
+    python -m benchmarks.diversity --size 100000 --base-ks 30,300,3000
+    python -m benchmarks.diversity --pools 100,0 --out diversity.json
+
+For each base_k (keyword and embedding candidates per query, up to 2 * base_k after the
+merge) and strategy it reports the latency of the retrieval stages (keyword_rows +
+embed_rows) and of `fuse` (merge, filters, rank, diversify), and the share of fuse in the
+total. Strategies: DIVERSITY=domain, and DIVERSITY=mmr for each --pools value (0 = all
+candidates). The top k are also scored for redundancy: mean pairwise cosine and distinct
+domains. Caches are off. Prints one JSON object per row; --out/--baseline as in
+benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+import numpy as np
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+from .report import compare, run_meta, summarize
+from .synthetic import synthetic_corpus, synthetic_queries
+
+
+def _redundancy(engine: HybridEngine, hits: list[dict[str, Any]]) -> tuple[float, int]:
+    rows = np.fromiter((engine.row_of[h["item_id"]] for h in hits), dtype=np.int64)
+    if rows.size < 2:
+        return 0.0, int(rows.size)
+    V = engine.row_vecs(rows)
+    sims = V @ V.T
+    pairs = sims[np.triu_indices(rows.size, 1)]
+    return float(pairs.mean()), int(np.unique(engine.domain_codes[rows]).size)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--base-ks", default="30,300,3000")
+    ap.add_argument("--pools", default="100,0")
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--keyword-engine", default="bm25")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    settings.query_cache_size = 0
+    settings.encode_max_batch = 1
+    settings.keyword_engine = args.keyword_engine
+    embedder = HashEmbedder(dim=args.dim)
+    items, snips = synthetic_corpus(args.size, args.seed)
+    corpus = build_corpus(items, snips, embedder, "hash", bm25=(settings.bm25_k1, settings.bm25_b))
+    engine = HybridEngine(corpus, embedder)
+    queries = synthetic_queries(args.queries, seed=args.seed + 1)
+    strategies = [("domain", 0)] + [("mmr", int(p)) for p in args.pools.split(",")]
+    results: list[dict[str, Any]] = []
+
+    for base_k in (int(b) for b in args.base_ks.split(",")):
+        cands = [(engine.keyword_rows(q, base_k), engine.embed_rows(q, base_k)) for q in queries]
+        retrieval = []
+        for q in queries:
+            t = time.perf_counter()
+            engine.keyword_rows(q, base_k)
+            engine.embed_rows(q, base_k)
+            retrieval.append((time.perf_counter() - t) * 1000)
+        retrieval_p50 = float(np.percentile(retrieval, 50))
+        for diversity, pool in strategies:
+            settings.diversity, settings.mmr_pool = diversity, pool
+            for kw, em in cands[:5]:
+                engine.fuse(kw, em, args.k, None, None)  # warm up
+            lat, redundancy, domains = [], [], []
+            for kw, em in cands:
+                t = time.perf_counter()
+                hits = engine.fuse(kw, em, args.k, None, None)
+                lat.append((time.perf_counter() - t) * 1000)
+                sim, n_dom = _redundancy(engine, hits)
+                redundancy.append(sim)
+                domains.append(n_dom)
+            fuse = summarize(lat)
+            n_cands = [np.union1d(kw[0], em[0]).size for kw, em in cands]
+            row = {
+                "size": args.size,
+                "base_k": base_k,
+                "candidates_mean": round(float(np.mean(n_cands)), 1),
+                "diversity": diversity if diversity == "domain" else f"mmr(pool={pool or 'all'})",
+                "retrieval_p50_ms": round(retrieval_p50, 4),
+                **fuse,
+                "fuse_share": round(fuse["p50_ms"] / (retrieval_p50 + fuse["p50_ms"]), 4),
+                "topk_mean_cosine": round(float(np.mean(redundancy)), 4),
+                "topk_domains": round(float(np.mean(domains)), 2),
+            }
+            if args.baseline:
+                compare([row], args.baseline, ("size", "base_k", "diversity"))
+            print(json.dumps(row), flush=True)
+            results.append(row)
+
+    if args.out:
+        meta = run_meta(
+            k=args.k,
+            dim=args.dim,
+            keyword_engine=args.keyword_engine,
+            mmr_lambda=settings.mmr_lambda,
+            max_per_domain=settings.max_per_domain,
+        )
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Filtered hybrid search across filter selectivities: post-filtering vs pushdown.
+
+    python -m benchmarks.filters --size 100000 --queries 100
+    python -m benchmarks.filters --size 100000 --vector-index ivf --out filters.json
+
+Filters are date cutoffs at timestamp quantiles and the rarest/commonest topics, alone and
+combined, so the fraction of matching rows runs from ~0.05% to ~50%. Per filter and
+strategy it reports search latency (p50/p95/p99) and the mean results returned for k:
+- post: FILTER_PUSHDOWN=false (filters applied to the unfiltered top candidates)
+- pushdown: the default choice between brute force and index search
+- brute / index: pushdown forced to one side (FILTER_BRUTE_FORCE_ROWS=inf / 0)
+Caches are off. Prints one JSON object per row; --out/--baseline as in benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from datetime import date
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+import numpy as np
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+from .report import compare, run_meta, summarize
+from .synthetic import synthetic_corpus, synthetic_queries
+
+STRATEGIES = {
+    "post": (False, None),
+    "pushdown": (True, None),
+    "brute": (True, 2**62),
+    "index": (True, 0),
+}
+
+
+def _filters(corpus: Any) -> list[tuple[str, list[str] | None, str | None]]:
+    ts = np.sort(corpus.timestamps)
+    counts = Counter(t for it in corpus.items for t in it["topics"])
+    rare, common = min(counts, key=counts.get), max(counts, key=counts.get)
+
+    def since(frac: float) -> str:  # newest `frac` of the corpus
+        return date.fromtimestamp(int(ts[int(len(ts) * (1 - frac))])).isoformat()
+
+    return [
+        ("since_1%", None, since(0.01)),
+        ("since_10%", None, since(0.1)),
+        ("since_50%", None, since(0.5)),
+        (f"topic_rare({rare})", [rare], None),
+        (f"topic_common({common})", [common], None),
+        ("rare+since_1%", [rare], since(0.01)),
+        ("rare+since_10%", [rare], since(0.1)),
+        ("common+since_1%", [common], since(0.01)),
+    ]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--keyword-engine", default="bm25")
+    ap.add_argument("--vector-index", default="exact")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    default_limit = settings.filter_brute_force_rows
+    settings.query_cache_size = 0
+    settings.encode_max_batch = 1
+    settings.keyword_engine = args.keyword_engine
+    settings.vector_index = args.vector_index
+    embedder = HashEmbedder(dim=args.dim)
+    items, snips = synthetic_corpus(args.size, args.seed)
+    corpus = build_corpus(items, snips, embedder, "hash", bm25=(settings.bm25_k1, settings.bm25_b))
+    engine = HybridEngine(corpus, embedder)
+    queries = synthetic_queries(args.queries, seed=args.seed + 1)
+    results: list[dict[str, Any]] = []
+
+    for label, topics, since in _filters(corpus):
+        allowed = engine.row_filter(topics, since)
+        for strategy, (pushdown, limit) in STRATEGIES.items():
+            settings.filter_pushdown = pushdown
+            settings.filter_brute_force_rows = default_limit if limit is None else limit
+            for q in queries[:5]:
+                engine.search(q, args.k, topics, since)  # warm up
+            lat, found = [], []
+            for q in queries:
+                t = time.perf_counter()
+                hits = engine.search(q, args.k, topics, since)
+                lat.append((time.perf_counter() - t) * 1000)
+                found.append(len(hits))
+            row = {
+                "size": args.size,
+                "vector_index": args.vector_index,
+                "filter": label,
+                "selectivity": round(allowed.count / len(engine), 5),
+                "strategy": strategy,
+                **summarize(lat),
+                "results_mean": round(float(np.mean(found)), 2),
+            }
+            if args.baseline:
+                compare([row], args.baseline, ("size", "vector_index", "filter", "strategy"))
+            print(json.dumps(row), flush=True)
+            results.append(row)
+
+    if args.out:
+        meta = run_meta(k=args.k, dim=args.dim, keyword_engine=args.keyword_engine)
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Index build memory and time: in-memory build_corpus vs the chunked JSONL stream build.
+
+    python -m benchmarks.index_build --sizes 100000,300000 --chunk-sizes 2000,20000
+    python -m benchmarks.index_build --sizes 1000000 --modes stream --out build.json
+
+A synthetic corpus is written once per size as JSONL (one item per line, text in
+"snippet"). Each build then runs in a fresh (spawned) process that reads that file and
+writes an index with save_index / build_index_stream; its peak RSS (`peak_rss_mib`, above the
+process's RSS after imports, `base_rss_mib`) is what the build needed. Modes: "memory"
+(vocabulary TF-IDF, the default build), "memory-hashing" (HashingTfidfVectorizer, whole
+corpus in memory) and "stream" per --chunk-sizes. BM25 postings are built in every mode.
+A final row per size compares tokenizer throughput (MB/s) of str.split and
+utils.text.tokenize. Prints one JSON object per row; --out/--baseline as in
+benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+from pathlib import Path
+import resource
+import tempfile
+import time
+from typing import Any
+
+from .report import compare, run_meta
+from .synthetic import iter_synthetic
+
+
+def _rss_mib() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _build(mode: str, jsonl: str, out: str, chunk_size: int, dim: int) -> dict[str, Any]:
+    from tests.doubles.embedder import HashEmbedder
+
+    from src.retrieval.corpus import build_corpus
+    from src.retrieval.index_build import build_index_stream, iter_jsonl
+    from src.retrieval.index_io import save_index
+
+    embedder = HashEmbedder(dim=dim)
+    base = _rss_mib()
+    t = time.perf_counter()
+    if mode == "stream":
+        build_index_stream(
+            iter_jsonl(jsonl), out, embedder, "hash", (1.2, 0.75), chunk_size=chunk_size
+        )
+    else:
+        items, snips = [], {}
+        for it in iter_jsonl(jsonl):
+            snips[it["id"]] = it.pop("snippet")
+            items.append(it)
+        hashing = 1 << 20 if mode == "memory-hashing" else 0
+        corpus = build_corpus(items, snips, embedder, "hash", (1.2, 0.75), hash_features=hashing)
+        save_index(corpus, out)
+    return {
+        "build_s": round(time.perf_counter() - t, 2),
+        "base_rss_mib": round(base, 1),
+        "peak_rss_mib": round(_rss_mib() - base, 1),
+    }
+
+
+def _tokenizer_row(jsonl: Path, size: int) -> dict[str, Any]:
+    from src.utils.text import tokenize
+
+    texts = [line for _, line in zip(range(20_000), jsonl.open(encoding="utf-8"), strict=False)]
+    mb = sum(len(t) for t in texts) / 1e6
+    row: dict[str, Any] = {"size": size, "mode": "tokenizer"}
+    for name, fn in (("split", lambda s: s.lower().split()), ("tokenize", tokenize)):
+        t = time.perf_counter()
+        n_tok = sum(len(fn(s)) for s in texts)
+        row[f"{name}_mb_s"] = round(mb / (time.perf_counter() - t), 1)
+        row[f"{name}_tokens"] = n_tok
+    return row
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100000,300000")
+    ap.add_argument("--modes", default="memory,memory-hashing,stream")
+    ap.add_argument("--chunk-sizes", default="2000,20000")
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            jsonl = Path(tmp) / f"items-{size}.jsonl"
+            with jsonl.open("w", encoding="utf-8") as f:
+                for item, snippet in iter_synthetic(size, args.seed):
+                    f.write(json.dumps(dict(item, snippet=snippet), ensure_ascii=False) + "\n")
+            runs = [
+                (mode, int(c))
+                for mode in args.modes.split(",")
+                for c in (args.chunk_sizes.split(",") if mode == "stream" else ["0"])
+            ]
+            for mode, chunk in runs:
+                with ProcessPoolExecutor(1, mp_context=ctx) as ex:
+                    out = str(Path(tmp) / "index")
+                    stats = ex.submit(_build, mode, str(jsonl), out, chunk, args.dim).result()
+                row = {"size": size, "mode": mode, "chunk_size": chunk or None, **stats}
+                if args.baseline:
+                    compare([row], args.baseline, ("size", "mode", "chunk_size"))
+                print(json.dumps(row), flush=True)
+                results.append(row)
+            row = _tokenizer_row(jsonl, size)
+            print(json.dumps(row), flush=True)
+            results.append(row)
+
+    if args.out:
+        meta = run_meta(dim=args.dim, modes=args.modes)
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
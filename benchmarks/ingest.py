@@ -0,0 +1,91 @@
+"""
+Incremental ingestion: throughput (docs/sec) and search latency while batches land.
+
+    python -m benchmarks.ingest --n 20000 --batches 20 --batch-size 100
+
+A reader thread runs searches against whatever generation is current, first with no
+writer (idle) and then while the writer applies upsert batches; a final full refit is
+timed separately. Prints one JSON object per phase.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+from tests.doubles.embedder import HashEmbedder
+
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+from .synthetic import synthetic_corpus, synthetic_queries
+
+
+def _pct(lat: list[float], p: float) -> float:
+    return round(float(np.percentile(lat, p)), 3) if lat else 0.0
+
+
+def _latency(lat: list[float]) -> dict[str, float]:
+    return {"queries": len(lat), "p50_ms": _pct(lat, 50), "p99_ms": _pct(lat, 99)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--batches", type=int, default=20)
+    ap.add_argument("--batch-size", type=int, default=100)
+    ap.add_argument("--idle-s", type=float, default=3.0)
+    args = ap.parse_args()
+
+    embedder = HashEmbedder()
+    items, snips = synthetic_corpus(args.n)
+    t0 = time.perf_counter()
+    current = HybridEngine(build_corpus(items, snips, embedder, "hash"), embedder)
+    print(json.dumps({"phase": "build", "n": args.n, "s": round(time.perf_counter() - t0, 3)}))
+    queries = synthetic_queries(500)
+
+    stop = threading.Event()
+    lat: list[float] = []
+
+    def reader() -> None:
+        i = 0
+        while not stop.is_set():
+            engine = current  # one generation per query
+            t = time.perf_counter()
+            engine.search(queries[i % len(queries)], 10, None, None)
+            lat.append((time.perf_counter() - t) * 1000)
+            i += 1
+
+    th = threading.Thread(target=reader)
+    th.start()
+    time.sleep(args.idle_s)
+    idle, lat[:] = list(lat), []
+    print(json.dumps({"phase": "idle", **_latency(idle)}))
+
+    # half new docs, half updates of existing ones
+    docs = args.batches * args.batch_size
+    new_items, new_snips = synthetic_corpus(docs, seed=7, start_id=args.n)
+    rng = np.random.default_rng(3)
+    t0 = time.perf_counter()
+    for b in range(args.batches):
+        batch = new_items[b * args.batch_size : (b + 1) * args.batch_size]
+        for j in range(0, len(batch), 2):
+            batch[j] = {**batch[j], "id": items[int(rng.integers(args.n))]["id"]}
+        current = current.apply(batch, snippets=new_snips)
+    ingest_s = time.perf_counter() - t0
+    stop.set()
+    th.join()
+    row = {"phase": "ingest", "docs": docs, "batch_size": args.batch_size}
+    print(json.dumps({**row, "docs_per_s": round(docs / ingest_s, 1), **_latency(lat)}))
+
+    t0 = time.perf_counter()
+    current = current.refit()
+    refit_s = round(time.perf_counter() - t0, 3)
+    print(json.dumps({"phase": "refit", "docs": len(current), "s": refit_s}))
+
+
+if __name__ == "__main__":
+    main()
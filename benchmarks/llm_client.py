@@ -0,0 +1,78 @@
+"""
+LLM client reuse: handshakes and per-request overhead against a local fake OpenAI server.
+
+    python -m benchmarks.llm_client --requests 400 --concurrency 16 --latency-ms 5
+
+"per_request" builds a new OpenAIChat (and HTTP client) for every call, which is what
+choose_model used to do; "pooled" shares one prewarmed instance. Prints one JSON object
+per mode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+from tests.doubles.fake_openai import FakeOpenAI
+
+from src.config import settings
+from src.llm.provider import OpenAIChat
+
+DOCS = [{"item_id": f"d{i}", "title": f"Doc {i}", "snippet": "text"} for i in range(4)]
+
+
+async def _run(mode: str, base_url: str, n: int, concurrency: int) -> list[float]:
+    shared = OpenAIChat("gpt-bench", base_url) if mode == "pooled" else None
+    if shared is not None:
+        await shared.aprewarm(min(concurrency, settings.llm_max_keepalive))
+    sem = asyncio.Semaphore(concurrency)
+    lat: list[float] = []
+
+    async def one() -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            model = shared or OpenAIChat("gpt-bench", base_url)
+            await model.agenerate_answer("q", DOCS, 100, 0.5)
+            if shared is None:
+                await model.aclose()
+            lat.append((time.perf_counter() - t0) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    if shared is not None:
+        await shared.aclose()
+    return lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    args = ap.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    for mode in ("per_request", "pooled"):
+        server = FakeOpenAI(latency_ms=args.latency_ms).start()
+        t0 = time.perf_counter()
+        lat = asyncio.run(_run(mode, server.base_url, args.requests, args.concurrency))
+        wall = time.perf_counter() - t0
+        server.stop()
+        row = {
+            "mode": mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "handshakes": len(server.connections),
+            "rps": round(args.requests / wall, 1),
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "overhead_ms": round(float(np.mean(lat)) - args.latency_ms, 3),
+        }
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
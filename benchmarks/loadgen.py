@@ -0,0 +1,286 @@
+"""
+Replay (or amplify) a JSONL request log against POST /agent/v1/chat/stream.
+
+    python -m benchmarks.loadgen --concurrency 32 --requests 2000
+    python -m benchmarks.loadgen --rate 50 --duration 60 --workers 4 --llm-tokens-per-s 40
+    python -m benchmarks.loadgen --log prod.jsonl --replay-timing --speed 10
+    python -m benchmarks.loadgen --url http://pod:8000 --concurrency 16   # existing server
+
+Each log line is a ChatRequest body, or {"ts": seconds, "body": {...}}. The log is cycled
+until --requests (or --duration) is reached; conversationIds get a per-cycle suffix so
+amplified traffic does not pile onto one conversation. Load is closed-loop (--concurrency
+streams in flight), open-loop Poisson arrivals (--rate per second), or the log's own
+timestamps (--replay-timing, divided by --speed).
+
+Without --url the service is started with uvicorn in a subprocess (--workers), using an
+OpenAI model served by the in-process FakeOpenAI: --llm-latency-ms to the first token, then
+--llm-tokens-per-s for --llm-tokens words. Prints one JSON summary: time to first event,
+first token and done (p50/p95/p99), SSE bytes/sec, throughput and error rate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any
+
+import httpx
+from tests.doubles.fake_openai import FakeOpenAI
+
+from .report import run_meta, summarize
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_LOG = Path(__file__).resolve().parent / "data" / "chat_requests.jsonl"
+CHAT_PATH = "/agent/v1/chat/stream"
+
+
+@dataclass
+class Sample:
+    status: int = 0
+    ttfe_ms: float | None = None  # first SSE bytes of any event
+    ttft_ms: float | None = None  # first token event
+    done_ms: float | None = None  # done event
+    bytes: int = 0
+    error: str | None = None
+
+
+def load_log(path: str | Path) -> list[tuple[float | None, dict[str, Any]]]:
+    out = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if "body" in row:
+            out.append((row.get("ts"), row["body"]))
+        else:
+            out.append((None, row))
+    return out
+
+
+def schedule(
+    log: list[tuple[float | None, dict[str, Any]]], n: int
+) -> list[tuple[float | None, dict[str, Any]]]:
+    """`n` requests cycling through `log`; ts offsets continue across cycles."""
+    first = log[0][0] or 0.0
+    span = (log[-1][0] or 0.0) - first
+    gap = span / max(len(log) - 1, 1)
+    out = []
+    for i in range(n):
+        cycle, (ts, body) = divmod(i, len(log))[0], log[i % len(log)]
+        body = dict(body)
+        if cycle and body.get("conversationId"):
+            body["conversationId"] = f"{body['conversationId']}-{cycle}"
+        at = None if ts is None else (ts - first) + cycle * (span + gap)
+        out.append((at, body))
+    return out
+
+
+async def one(client: httpx.AsyncClient, body: dict[str, Any]) -> Sample:
+    s = Sample()
+    t0 = time.perf_counter()
+    try:
+        async with client.stream("POST", CHAT_PATH, json=body) as r:
+            s.status = r.status_code
+            async for chunk in r.aiter_bytes():
+                now = (time.perf_counter() - t0) * 1000
+                if s.ttfe_ms is None:
+                    s.ttfe_ms = now
+                if s.ttft_ms is None and b"event: token" in chunk:
+                    s.ttft_ms = now
+                if b"event: done" in chunk:
+                    s.done_ms = now
+                s.bytes += len(chunk)
+        if s.status != 200:
+            s.error = f"http {s.status}"
+        elif s.done_ms is None:
+            s.error = "no done event"
+    except httpx.HTTPError as e:
+        s.error = type(e).__name__
+    return s
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    plan: list[tuple[float | None, dict[str, Any]]],
+    concurrency: int = 0,
+    rate: float = 0.0,
+    replay_timing: bool = False,
+    speed: float = 1.0,
+    duration_s: float = 0.0,
+    seed: int = 0,
+) -> tuple[list[Sample], float]:
+    """Send `plan`; returns the samples and the wall time. Exactly one pacing mode applies:
+    replay_timing, else rate (Poisson), else concurrency (closed loop)."""
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + duration_s if duration_s else float("inf")
+    t0 = time.perf_counter()
+
+    if replay_timing or rate > 0:
+        rng = random.Random(seed)
+        tasks = []
+        at = 0.0
+        for ts, body in plan:
+            if replay_timing:
+                at = (ts or 0.0) / speed
+            else:
+                at += rng.expovariate(rate)
+            delay = t0 + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if time.perf_counter() >= deadline:
+                break
+            tasks.append(asyncio.create_task(one(client, body)))
+        samples = list(await asyncio.gather(*tasks))
+    else:
+        queue = iter(plan)
+
+        async def worker() -> None:
+            for _ts, body in queue:
+                if time.perf_counter() >= deadline:
+                    return
+                samples.append(await one(client, body))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples, time.perf_counter() - t0
+
+
+def report(samples: list[Sample], wall_s: float) -> dict[str, Any]:
+    ok = [s for s in samples if s.error is None]
+    errors: dict[str, int] = {}
+    for s in samples:
+        if s.error:
+            errors[s.error] = errors.get(s.error, 0) + 1
+
+    def pcts(field: str) -> dict[str, float]:
+        return summarize([getattr(s, field) for s in ok if getattr(s, field) is not None])
+
+    total_bytes = sum(s.bytes for s in samples)
+    per_stream = [s.bytes / (s.done_ms / 1000) for s in ok if s.done_ms]
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "errors": errors,
+        "wall_s": round(wall_s, 3),
+        "rps": round(len(samples) / wall_s, 2) if wall_s else 0.0,
+        "sse_bytes_per_s": round(total_bytes / wall_s, 1) if wall_s else 0.0,
+        "stream_bytes_per_s_p50": (
+            round(sorted(per_stream)[len(per_stream) // 2], 1) if per_stream else None
+        ),
+        "time_to_first_event": pcts("ttfe_ms"),
+        "time_to_first_token": pcts("ttft_ms"),
+        "time_to_done": pcts("done_ms"),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(port: int, workers: int, llm_base_url: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MODEL_NAME": "openai:gpt-loadtest",
+        "OPENAI_BASE_URL": llm_base_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "loadtest"),
+        "LOG_LEVEL": "WARNING",
+    }
+    cmd = [sys.executable, "-m", "uvicorn", "src.app:app", "--host", "127.0.0.1"]
+    cmd += ["--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"service exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("service did not become ready")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--log", type=Path, default=DEFAULT_LOG)
+    ap.add_argument("--url", help="existing service; default starts one with a fake LLM")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--duration", type=float, default=0.0, help="stop sending after N s")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--rate", type=float, default=0.0, help="Poisson arrivals per second")
+    ap.add_argument("--replay-timing", action="store_true")
+    ap.add_argument("--speed", type=float, default=1.0)
+    ap.add_argument("--llm-latency-ms", type=float, default=300.0)
+    ap.add_argument("--llm-tokens-per-s", type=float, default=50.0)
+    ap.add_argument("--llm-tokens", type=int, default=60)
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--out", type=Path)
+    args = ap.parse_args()
+
+    fake = proc = None
+    base_url = args.url
+    if base_url is None:
+        fake = FakeOpenAI(
+            latency_ms=args.llm_latency_ms,
+            tokens_per_s=args.llm_tokens_per_s,
+            tokens=args.llm_tokens,
+        ).start()
+        port = _free_port()
+        proc = start_service(port, args.workers, fake.base_url)
+        base_url = f"http://127.0.0.1:{port}"
+
+    n = args.requests if not args.duration else max(args.requests, 10**7)
+    plan = schedule(load_log(args.log), n)
+
+    async def go() -> tuple[list[Sample], float]:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(
+            base_url=base_url, timeout=args.timeout, limits=limits
+        ) as client:
+            modes = (args.concurrency, args.rate, args.replay_timing, args.speed)
+            return await run_load(client, plan, *modes, args.duration)
+
+    try:
+        samples, wall = asyncio.run(go())
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+        if fake is not None:
+            fake.stop()
+
+    if args.replay_timing:
+        pacing: dict[str, Any] = {"replay_timing": True, "speed": args.speed}
+    elif args.rate:
+        pacing = {"rate": args.rate}
+    else:
+        pacing = {"concurrency": args.concurrency}
+    workers = args.workers if args.url is None else None
+    summary = {**pacing, "workers": workers, **report(samples, wall)}
+    if args.url is None:
+        summary["llm"] = {
+            "latency_ms": args.llm_latency_ms,
+            "tokens_per_s": args.llm_tokens_per_s,
+            "tokens": args.llm_tokens,
+        }
+    print(json.dumps(summary))
+    if args.out:
+        args.out.write_text(json.dumps({"meta": run_meta(), "results": [summary]}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Quantized exact search (VECTOR_QUANTIZATION): memory, latency and recall@k vs float32.
+
+    python -m benchmarks.quantization --n 1000000 --dim 64
+    python -m benchmarks.quantization --n 200000 --rescore 1,2,4,8 --out quant.json
+
+Vectors are clustered like real sentence embeddings (benchmarks.ann_recall), normalized and
+saved as .npy, then memory-mapped back as the service does with INDEX_DIR. Rows: the float32
+InMemoryVectorStore, then float16 and int8 (per-vector and per-dimension scales) for each
+--rescore factor. Each reports the bytes a search scans (`scan_mib`; for the quantized stores
+the float32 rows stay in the memory map and only shortlisted rows are read), the encode time,
+search latency (p50/p95/p99) and recall@k against the float32 results. Prints one JSON
+object per row; --out/--baseline as in benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from src.retrieval.store_quant import QuantizedVectorStore
+from src.retrieval.store_vector import InMemoryVectorStore, _normalize
+
+from .ann_recall import clustered_vectors
+from .report import compare, run_meta, summarize
+
+
+def _run(store: Any, Q: np.ndarray, k: int) -> tuple[list[set[str]], list[float]]:
+    for q in Q[:5]:
+        store.search(q, k)  # warm up
+    found, lat = [], []
+    for q in Q:
+        t = time.perf_counter()
+        hits = store.search(q, k)
+        lat.append((time.perf_counter() - t) * 1000)
+        found.append({h[0] for h in hits})
+    return found, lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--rescore", default="2,4,8")
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    n_clusters = max(args.n // 200, 8)
+    X = _normalize(clustered_vectors(args.n, args.dim, n_clusters, rng))
+    Q = clustered_vectors(args.queries, args.dim, n_clusters, rng)
+    ids = [f"d{i}" for i in range(args.n)]
+    tmp = tempfile.TemporaryDirectory()
+    np.save(Path(tmp.name) / "vectors.npy", X)
+    del X
+    vecs = np.load(Path(tmp.name) / "vectors.npy", mmap_mode="r")
+    results: list[dict[str, Any]] = []
+
+    def report(name: str, rescore: int | None, encode_s: float, store: Any) -> list[set[str]]:
+        found, lat = _run(store, Q, args.k)
+        hits = [len(f & t) / args.k for f, t in zip(found, truth or found, strict=True)]
+        row = {
+            "size": args.n,
+            "dim": args.dim,
+            "store": name,
+            "rescore": rescore,
+            "scan_mib": round(store.nbytes / 2**20, 1),
+            "encode_s": round(encode_s, 3),
+            **summarize(lat),
+            f"recall@{args.k}": round(float(np.mean(hits)), 4),
+        }
+        if args.baseline:
+            compare([row], args.baseline, ("size", "dim", "store", "rescore"))
+        print(json.dumps(row), flush=True)
+        results.append(row)
+        return found
+
+    truth: list[set[str]] = []
+    exact = InMemoryVectorStore.wrap(ids, vecs)
+    np.asarray(vecs).sum()  # page the float32 rows in, as a warm exact index would be
+    truth = report("float32", None, 0.0, exact)
+    for mode, scale in (("float16", "vector"), ("int8", "vector"), ("int8", "dim")):
+        t = time.perf_counter()
+        store = QuantizedVectorStore.wrap(ids, vecs, mode=mode, scale=scale)
+        encode_s = time.perf_counter() - t
+        name = mode if mode == "float16" else f"int8/{scale}"
+        for rescore in (int(r) for r in args.rescore.split(",")):
+            store.rescore = rescore
+            report(name, rescore, encode_s, store)
+
+    if args.out:
+        meta = run_meta(k=args.k, queries=args.queries)
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+    del exact, vecs
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Query-encoder micro-batching: QPS vs p99 latency at several batch windows.
+
+    python -m benchmarks.query_encoder --clients 32 --seconds 3 --windows 0 1 2 5 10
+    python -m benchmarks.query_encoder --model sentence-transformers/all-MiniLM-L6-v2
+
+`clients` threads call encode() in a closed loop. The default stand-in model costs
+`--call-ms` per call plus `--item-ms` per text on one device (calls run one at a time, as
+when a forward pass already saturates the CPU cores or the GPU) and sleeps, releasing the
+GIL like a real forward pass. window=-1 is the
+unbatched baseline (max_batch=1). Prints one JSON object per window.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+from tests.doubles.embedder import HashEmbedder
+
+from src.retrieval.query_encoder import BatchingQueryEncoder
+
+from .synthetic import synthetic_queries
+
+
+class CostModelEncoder(HashEmbedder):
+    def __init__(self, call_ms: float, item_ms: float):
+        super().__init__()
+        self.call_s, self.item_s = call_ms / 1000, item_ms / 1000
+        self._device = threading.Lock()
+
+    def encode(self, docs, batch_size=32, normalize_embeddings=False):
+        with self._device:
+            time.sleep(self.call_s + self.item_s * len(docs))
+        return super().encode(docs, batch_size, normalize_embeddings)
+
+
+def _run(encoder: BatchingQueryEncoder, queries: list[str], clients: int, seconds: float):
+    lat: list[list[float]] = [[] for _ in range(clients)]
+    stop = time.perf_counter() + seconds
+
+    def client(c: int) -> None:
+        i = c
+        while time.perf_counter() < stop:
+            t = time.perf_counter()
+            encoder.encode(queries[i % len(queries)])
+            lat[c].append((time.perf_counter() - t) * 1000)
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [x for per in lat for x in per]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--windows", type=float, nargs="*", default=[-1, 0, 1, 2, 5, 10])
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--call-ms", type=float, default=4.0)
+    ap.add_argument("--item-ms", type=float, default=0.2)
+    ap.add_argument("--model", help="a SentenceTransformer name instead of the stand-in")
+    args = ap.parse_args()
+
+    if args.model:
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        model = SentenceTransformer(args.model)
+    else:
+        model = CostModelEncoder(args.call_ms, args.item_ms)
+    queries = [f"{q} {i}" for i, q in enumerate(synthetic_queries(5000))]  # all distinct
+
+    for window in args.windows:
+        max_batch = 1 if window < 0 else args.max_batch
+        encoder = BatchingQueryEncoder(model, max_batch, max(window, 0.0))
+        lat = _run(encoder, queries, args.clients, args.seconds)
+        row = {
+            "window_ms": None if window < 0 else window,
+            "max_batch": max_batch,
+            "clients": args.clients,
+            "qps": round(len(lat) / args.seconds, 1),
+            "p50_ms": round(float(np.percentile(lat, 50)), 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            **encoder.stats(),
+        }
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Shared helpers for benchmark output: latency summaries, RSS, run metadata, baselines."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import platform
+import subprocess
+from typing import Any
+
+import numpy as np
+
+
+def summarize(lat_ms: list[float]) -> dict[str, float]:
+    if not lat_ms:
+        return {"n": 0}
+    a = np.asarray(lat_ms)
+    return {
+        "n": int(a.size),
+        "mean_ms": round(float(a.mean()), 4),
+        "p50_ms": round(float(np.percentile(a, 50)), 4),
+        "p95_ms": round(float(np.percentile(a, 95)), 4),
+        "p99_ms": round(float(np.percentile(a, 99)), 4),
+    }
+
+
+def rss_mib() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run_meta(**extra: Any) -> dict[str, Any]:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "git": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def compare(rows: list[dict[str, Any]], baseline: str | Path, key: tuple[str, ...]) -> None:
+    """Add `vs_baseline` (p50 or seconds ratio, <1 is faster) to rows matching a saved run."""
+    old = {
+        tuple(r.get(f) for f in key): r
+        for r in json.loads(Path(baseline).read_text(encoding="utf-8"))["results"]
+    }
+    for r in rows:
+        prev = old.get(tuple(r.get(f) for f in key))
+        if prev is None:
+            continue
+        for metric in ("p50_ms", "s", "bytes"):
+            if r.get(metric) and prev.get(metric):
+                r["vs_baseline"] = round(r[metric] / prev[metric], 3)
+                break
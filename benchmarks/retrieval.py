@@ -0,0 +1,148 @@
+"""
+Retrieval microbenchmarks over synthetic corpora: index build, memory, and each query stage.
+
+    python -m benchmarks.retrieval --sizes 1000,10000,100000 --out run.json
+    python -m benchmarks.retrieval --sizes 1000000 --queries 100 --baseline run.json
+
+Per size: build time per stage (the build_corpus progress stages, then the vector store),
+array bytes and RSS growth, then per keyword engine the latency of keyword_rows,
+encode_query, embed_rows, fuse (merge/recency/filters/rank/diversify) and resolve_items
+for the top k. Query caches are off and the encoder is called directly, so every query pays
+full cost. Prints one JSON object per row; --out saves {"meta", "results"} and --baseline
+adds a `vs_baseline` ratio against an earlier --out file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+import numpy as np
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+from .report import compare, rss_mib, run_meta, summarize
+from .synthetic import TOPICS, synthetic_corpus, synthetic_queries
+
+
+def _build(n: int, embedder: HashEmbedder, seed: int) -> tuple[Any, list[dict[str, Any]]]:
+    items, snips = synthetic_corpus(n, seed)
+    gc.collect()
+    rss0 = rss_mib()
+    stamps: list[tuple[str, float]] = []
+    t0 = time.perf_counter()
+    corpus = build_corpus(
+        items,
+        snips,
+        embedder,
+        "hash",
+        bm25=(settings.bm25_k1, settings.bm25_b),
+        progress=lambda stage: stamps.append((stage, time.perf_counter())),
+    )
+    stamps.append(("vector_store", time.perf_counter()))
+    engine = HybridEngine(corpus, embedder)
+    t1 = time.perf_counter()
+    rows = [
+        {"size": n, "stage": f"build.{stage}", "s": round(end - start, 4)}
+        for (stage, start), (_, end) in zip(stamps, [*stamps[1:], ("", t1)], strict=True)
+    ]
+    rows.append({"size": n, "stage": "build.total", "s": round(t1 - t0, 4)})
+    gc.collect()
+    rows.append(
+        {
+            "size": n,
+            "stage": "memory",
+            "bytes": corpus.nbytes + engine.vec_store.nbytes,
+            "corpus_bytes": corpus.nbytes,
+            "vector_store_bytes": engine.vec_store.nbytes,
+            "rss_growth_mib": round(rss_mib() - rss0, 1),
+        }
+    )
+    return corpus, rows
+
+
+def _time(fn, *args) -> tuple[Any, float]:
+    t = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t) * 1000
+
+
+def _stages(engine: HybridEngine, queries: list[str], k: int) -> dict[str, list[float]]:
+    lat: dict[str, list[float]] = {
+        s: [] for s in ("keyword_rows", "encode_query", "embed_rows", "fuse", "resolve_items")
+    }
+    base_k = max(k * 6, 30)
+    rng = np.random.default_rng(0)
+    for i, q in enumerate(queries):
+        # a third of the queries filter by topic and a third by date, like chat plans do
+        topics = [TOPICS[int(rng.integers(len(TOPICS)))]] if i % 3 == 1 else None
+        since = "30d" if i % 3 == 2 else None
+        kw, ms = _time(engine.keyword_rows, q, base_k)
+        lat["keyword_rows"].append(ms)
+        lat["encode_query"].append(_time(engine.encode_query, q)[1])
+        em, ms = _time(engine.embed_rows, q, base_k)
+        lat["embed_rows"].append(ms)
+        hits, ms = _time(engine.fuse, kw, em, k, topics, since)
+        lat["fuse"].append(ms)
+        lat["resolve_items"].append(_time(engine.resolve_items, [h["item_id"] for h in hits])[1])
+    return lat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--keyword-engines", default="tfidf,bm25")
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    settings.query_cache_size = 0
+    settings.encode_max_batch = 1
+    embedder = HashEmbedder(dim=args.dim)
+    queries = synthetic_queries(args.queries, seed=args.seed + 1)
+    results: list[dict[str, Any]] = []
+
+    def emit(rows: list[dict[str, Any]]) -> None:
+        if args.baseline:
+            compare(rows, args.baseline, ("size", "keyword_engine", "stage"))
+        for r in rows:
+            print(json.dumps(r), flush=True)
+        results.extend(rows)
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        corpus, rows = _build(n, embedder, args.seed)
+        emit(rows)
+        for kw_engine in args.keyword_engines.split(","):
+            settings.keyword_engine = kw_engine
+            engine = HybridEngine(corpus, embedder)
+            _stages(engine, queries[:20], args.k)  # warm up
+            lat = _stages(engine, queries, args.k)
+            emit(
+                [
+                    {"size": n, "keyword_engine": kw_engine, "stage": stage, **summarize(v)}
+                    for stage, v in lat.items()
+                ]
+            )
+        del corpus, engine
+        gc.collect()
+
+    if args.out:
+        meta = run_meta(
+            queries=args.queries, k=args.k, dim=args.dim, vector_index=settings.vector_index
+        )
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
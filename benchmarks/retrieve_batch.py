@@ -0,0 +1,125 @@
+"""
+Batched retrieval (HybridEngine.search_batch, behind POST /agent/v1/retrieve) vs sequential
+single-query searches.
+
+    python -m benchmarks.retrieve_batch --sizes 10000,100000 --batch-sizes 1,8,32,128
+    python -m benchmarks.retrieve_batch --call-ms 0 --out batch.json   # encoder cost off
+
+Per size and keyword engine, the same --queries (a --filtered fraction with topic/since
+filters) run once through `search` one at a time, then through `search_batch` in batches of
+each --batch-sizes. The stand-in encoder costs --call-ms per call plus --item-ms per query
+(benchmarks.query_encoder's cost model), as a sentence encoder does; search_batch pays the
+per-call cost once per batch. Caches are off. Rows report total seconds (`s`), queries/sec
+and `same_ids`, the fraction of queries whose ranked ids match the sequential run. Prints
+one JSON object per row; --out/--baseline as in benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+import numpy as np
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+from .query_encoder import CostModelEncoder
+from .report import compare, run_meta
+from .synthetic import TOPICS, synthetic_corpus, synthetic_queries
+
+
+def _requests(n: int, k: int, filtered: float, seed: int) -> list[tuple[Any, ...]]:
+    rng = np.random.default_rng(seed)
+    out = []
+    for q in synthetic_queries(n, seed=seed):
+        if rng.random() < filtered:
+            topics = list(rng.choice(TOPICS, size=int(rng.integers(1, 3)), replace=False))
+            out.append((q, k, topics, "P90D" if rng.random() < 0.5 else None))
+        else:
+            out.append((q, k, None, None))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000")
+    ap.add_argument("--queries", type=int, default=512)
+    ap.add_argument("--batch-sizes", default="1,8,32,128")
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--filtered", type=float, default=0.25)
+    ap.add_argument("--keyword-engines", default="bm25,tfidf")
+    ap.add_argument("--call-ms", type=float, default=4.0)
+    ap.add_argument("--item-ms", type=float, default=0.2)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    settings.query_cache_size = 0
+    settings.encode_max_batch = 1
+    embedder = CostModelEncoder(args.call_ms, args.item_ms)
+    reqs = _requests(args.queries, args.k, args.filtered, args.seed + 1)
+    results: list[dict[str, Any]] = []
+
+    def emit(row: dict[str, Any]) -> None:
+        if args.baseline:
+            compare([row], args.baseline, ("size", "keyword_engine", "mode", "batch_size"))
+        print(json.dumps(row), flush=True)
+        results.append(row)
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        items, snips = synthetic_corpus(n, args.seed)
+        corpus = build_corpus(
+            items, snips, embedder, "hash", bm25=(settings.bm25_k1, settings.bm25_b)
+        )
+        for kw_engine in args.keyword_engines.split(","):
+            settings.keyword_engine = kw_engine
+            engine = HybridEngine(corpus, embedder)
+            engine.search_batch(reqs[:8])  # warm up
+            t = time.perf_counter()
+            want = [engine.search(*r) for r in reqs]
+            seq_s = time.perf_counter() - t
+            row = {"size": n, "keyword_engine": kw_engine, "mode": "sequential"}
+            qps = round(len(reqs) / seq_s, 1)
+            emit({**row, "batch_size": 1, "s": round(seq_s, 3), "qps": qps})
+            for size in (int(b) for b in args.batch_sizes.split(",")):
+                t = time.perf_counter()
+                got = [
+                    hits
+                    for lo in range(0, len(reqs), size)
+                    for hits in engine.search_batch(reqs[lo : lo + size])
+                ]
+                s = time.perf_counter() - t
+                same = [
+                    [h["item_id"] for h in g] == [h["item_id"] for h in w]
+                    for g, w in zip(got, want, strict=True)
+                ]
+                emit(
+                    {
+                        **row,
+                        "mode": "batch",
+                        "batch_size": size,
+                        "s": round(s, 3),
+                        "qps": round(len(reqs) / s, 1),
+                        "speedup": round(seq_s / s, 2),
+                        "same_ids": round(float(np.mean(same)), 4),
+                    }
+                )
+        del corpus, engine
+        gc.collect()
+
+    if args.out:
+        meta = run_meta(
+            queries=args.queries, k=args.k, filtered=args.filtered, call_ms=args.call_ms
+        )
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+
+
+if __name__ == "__main__":
+    main()
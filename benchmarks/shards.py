@@ -0,0 +1,132 @@
+"""
+Sharded retrieval (RETRIEVAL_SHARDS) on a large synthetic corpus: latency per shard count.
+
+    python -m benchmarks.shards --size 1000000 --shards 1,2,4,8
+    python -m benchmarks.shards --size 100000 --keyword-engines bm25 --out shards.json
+
+The corpus is built once, saved with save_index and memory-mapped back, as the service
+does with INDEX_DIR, so the shard workers open the same files. Per keyword engine it runs
+the in-process engine (shards=0) and then each shard count, reporting HybridEngine.search
+latency (p50/p95/p99, filters off, caches off), the speedup over in process, whether every
+result list is identical to the one-shard results (`identical`) and whether the result ids
+match the in-process ones (`same_ids`; scores may differ by float32 rounding), and the
+proportional set size (PSS) of the coordinator plus workers, which counts each shared page
+once in total. Speedup is bounded by the cores available (`cpus` in the output). Prints one
+JSON object per row; --out/--baseline as in benchmarks.retrieval.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any
+
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+from src.retrieval.index_io import load_index, save_index
+from src.retrieval.shards import ShardPool
+
+from .report import compare, run_meta, summarize
+from .synthetic import synthetic_corpus, synthetic_queries
+
+
+def _pss_mib(pids: list[int]) -> float:
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            total += sum(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+    return round(total / 1024, 1)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--size", type=int, default=1_000_000)
+    ap.add_argument("--shards", default="1,2,4,8")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dim", type=int, default=64)
+    ap.add_argument("--keyword-engines", default="tfidf,bm25")
+    ap.add_argument("--index-dir", type=Path, help="reuse/keep the index (default: temp dir)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    args = ap.parse_args()
+
+    settings.query_cache_size = 0
+    settings.result_cache_size = 0
+    settings.encode_max_batch = 1
+    settings.vector_index = "exact"
+    embedder = HashEmbedder(dim=args.dim)
+    tmp = None
+    index_dir = args.index_dir
+    if index_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        index_dir = Path(tmp.name) / "index"
+    if not (index_dir / "manifest.json").exists():
+        items, snips = synthetic_corpus(args.size, args.seed)
+        corpus = build_corpus(
+            items, snips, embedder, "hash", bm25=(settings.bm25_k1, settings.bm25_b)
+        )
+        save_index(corpus, index_dir)
+        del corpus, items, snips
+    corpus = load_index(index_dir)
+    queries = synthetic_queries(args.queries, seed=args.seed + 1)
+    results: list[dict[str, Any]] = []
+
+    for kw_engine in args.keyword_engines.split(","):
+        settings.keyword_engine = kw_engine
+        plain = HybridEngine(corpus, embedder)
+        in_process: list[Any] = []
+        reference: list[Any] = []
+        base_p50 = None
+        for n in [0, *(int(s) for s in args.shards.split(","))]:
+            pool = ShardPool(corpus, n, kw_engine == "bm25", vectors=True) if n else None
+            engine = HybridEngine(corpus, embedder, plain.vec_store, shards=pool)
+            for q in queries[:5]:
+                engine.search(q, args.k, None, None)  # warm up
+            lat, hits = [], []
+            for q in queries:
+                t = time.perf_counter()
+                hits.append(engine.search(q, args.k, None, None))
+                lat.append((time.perf_counter() - t) * 1000)
+            if not n:
+                in_process = hits
+            elif not reference:
+                reference = hits
+            stats = summarize(lat)
+            base_p50 = base_p50 or stats["p50_ms"]
+            row = {
+                "size": len(corpus),
+                "keyword_engine": kw_engine,
+                "shards": n,
+                **stats,
+                "speedup": round(base_p50 / stats["p50_ms"], 2),
+                "identical": hits == reference if n else None,
+                "same_ids": [[h["item_id"] for h in r] for r in hits]
+                == [[h["item_id"] for h in r] for r in in_process],
+                "pss_mib": _pss_mib([os.getpid(), *(pool.pids if pool else [])]),
+                "shared_memory_bytes": pool.shared_bytes if pool else 0,
+            }
+            if args.baseline:
+                compare([row], args.baseline, ("size", "keyword_engine", "shards"))
+            print(json.dumps(row), flush=True)
+            results.append(row)
+            if pool is not None:
+                pool.close()
+
+    if args.out:
+        meta = run_meta(k=args.k, dim=args.dim, queries=args.queries)
+        args.out.write_text(json.dumps({"meta": meta, "results": results}, indent=1))
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
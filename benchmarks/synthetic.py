@@ -0,0 +1,243 @@
+"""
+Deterministic synthetic news corpus for benchmarks.
+
+    items, snippets = synthetic_corpus(10_000, seed=0)
+    python -m benchmarks.synthetic --n 100000 --out data/syn-100k   # items.json + snippets.json
+
+Items have the fixtures/items.json shape. Titles follow news headline templates; excerpt and
+snippet words follow a Zipf distribution over a lexicon of stopwords and tech-news terms
+followed by a long tail of generated words, so keyword postings and IDF look like real text.
+Domains and topics are skewed (a few popular outlets and beats), and dates lean recent.
+The same (n, seed) always yields the same corpus, and a prefix of a larger one.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterator
+from datetime import date, timedelta
+import json
+from pathlib import Path
+import time
+
+import numpy as np
+
+# fmt: off
+STOPWORDS = [
+    "the", "of", "and", "to", "in", "a", "for", "is", "on", "that", "with", "as", "by", "at",
+    "from", "it", "this", "are", "be", "an", "or", "new", "has", "have", "was", "will", "its",
+    "can", "more", "how", "their", "but", "not", "they", "which", "about", "into", "than", "we",
+    "after", "over", "also", "up", "now", "what", "all", "out", "when", "one", "two", "year",
+    "first",
+]
+TERMS = [
+    "model", "models", "agent", "agents", "data", "developer", "developers", "api", "release",
+    "open", "source", "team", "teams", "cloud", "security", "app", "apps", "tools", "tool",
+    "platform", "users", "support", "feature", "features", "performance", "latency", "inference",
+    "training", "dataset", "search", "vector", "database", "index", "query", "retrieval",
+    "pipeline", "pipelines", "framework", "library", "sdk", "runtime", "python", "rust",
+    "javascript", "typescript", "kubernetes", "container", "serverless", "edge", "gpu", "chip",
+    "chips", "memory", "storage", "cost", "pricing", "enterprise", "startup", "funding", "launch",
+    "update", "version", "beta", "preview", "benchmark", "benchmarks", "accuracy", "evaluation",
+    "safety", "privacy", "policy", "regulation", "compliance", "browser", "mobile", "android",
+    "ios", "web", "frontend", "backend", "streaming", "cache", "caching", "network", "protocol",
+    "token", "tokens", "context", "window", "prompt", "prompts", "embedding", "embeddings", "fine",
+    "tuning", "deployment", "production", "monitoring", "observability", "logging", "tracing",
+    "workflow", "workflows", "automation", "assistant", "assistants", "copilot", "code", "coding",
+    "review", "testing", "bug", "bugs", "patch", "vulnerability", "attack", "breach", "identity",
+    "authentication", "payments", "commerce", "analytics", "dashboard", "warehouse", "lakehouse",
+    "postgres", "sql", "graph", "scheduler", "compiler", "kernel", "linux", "windows", "macos",
+    "hardware", "device", "devices", "robotics", "vision", "speech", "audio", "video", "image",
+    "images", "multimodal", "reasoning", "research", "paper", "papers", "lab", "labs", "market",
+    "customers", "revenue",
+]
+COMPANIES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Tyrell",
+    "Cyberdyne", "Soylent", "Massive", "Dynamic", "Aperture", "Vandelay", "Pied", "Piper",
+    "Gringotts", "Oscorp", "Monarch", "Zorg",
+]
+PRODUCTS = [
+    "Atlas", "Nimbus", "Quasar", "Helix", "Orion", "Vertex", "Pulse", "Cobalt", "Lumen", "Kestrel",
+    "Onyx", "Aurora", "Zephyr", "Beacon", "Harbor", "Meridian", "Nova", "Sierra", "Tundra",
+    "Vector",
+]
+AUDIENCES = (
+    "developers", "startups", "enterprises", "data teams", "security teams", "app builders",
+    "researchers", "platform engineers", "small businesses", "newsrooms",
+)
+VERBS = (
+    "launches", "ships", "unveils", "open-sources", "acquires", "expands", "rethinks",
+    "benchmarks", "previews", "deprecates", "doubles down on", "cuts prices for",
+)
+ADJECTIVES = [
+    "faster", "cheaper", "open", "smaller", "larger", "secure", "private", "scalable", "real-time",
+    "local", "hybrid", "agentic", "serverless", "multimodal", "incremental",
+]
+TEMPLATES = (
+    "{company} {verb} {adj} {noun} for {audience}",
+    "How {audience} use {product} for {adj} {noun}",
+    "{product} {major}.{minor}: {adj} {noun} and {noun2}",
+    "Why {noun} is the new {noun2} in {year}",
+    "{company} and {company2} team up on {adj} {noun}",
+    "Inside {company}'s {adj} {noun} {noun2}",
+    "{adj} {noun} without the {noun2}: a guide for {audience}",
+    "{product} vs. {product2}: {noun} {noun2} compared",
+)
+TOPICS = [
+    "app-dev", "ai-tools", "data", "agents", "security", "cloud", "mobile", "web", "devops",
+    "open-source", "research", "hardware", "policy", "startups", "databases", "infra",
+]
+OUTLETS = [
+    "devwire", "technotes", "stackdaily", "codebeat", "buildlog", "bytepost", "infraweekly",
+    "mlpulse", "shiplog", "opsreport", "datadesk", "agentwatch", "webpaper", "cloudcast",
+    "edgelines", "hackerdigest",
+]
+SECTIONS = ("news", "blog", "labs", "www", "engineering", "research")
+TLDS = ("com", "org", "net", "io", "dev", "co")
+SYLLABLES = [
+    "ka", "lo", "mi", "ne", "ru", "ta", "vi", "so", "pe", "de", "zu", "fa", "ri", "mo", "na", "li",
+    "ke", "to", "sa", "bu", "ga", "ho", "je", "wa", "xi", "yo", "qu", "el", "an", "or",
+]
+# fmt: on
+
+DAY0 = date(2025, 11, 5)
+
+
+def lexicon(vocab_size: int) -> np.ndarray:
+    """Stopwords, then tech terms, then generated words, in Zipf rank order."""
+    head = list(dict.fromkeys(STOPWORDS + TERMS))
+    n_syl = len(SYLLABLES)
+    tail = []
+    i = 0
+    while len(head) + len(tail) < vocab_size:
+        a, b, c = i % n_syl, (i // n_syl) % n_syl, (i // n_syl**2) % n_syl
+        rep = str(i // n_syl**3) if i >= n_syl**3 else ""
+        tail.append(SYLLABLES[a] + SYLLABLES[b] + SYLLABLES[c] + rep)
+        i += 1
+    return np.asarray((head + tail)[:vocab_size])
+
+
+def domains(n: int = 120) -> list[str]:
+    out = []
+    for i in range(n):
+        outlet = OUTLETS[i % len(OUTLETS)]
+        suffix = "" if i < len(OUTLETS) else str(i // len(OUTLETS))
+        out.append(f"{SECTIONS[i % len(SECTIONS)]}.{outlet}{suffix}.{TLDS[i % len(TLDS)]}")
+    return out
+
+
+def _zipf_weights(n: int, s: float = 1.0) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+
+def _words(rng: np.random.Generator, vocab: np.ndarray, cdf: np.ndarray, n: int) -> str:
+    picks = np.minimum(np.searchsorted(cdf, rng.random(n)), vocab.size - 1)
+    return " ".join(vocab[picks])
+
+
+def _title(rng: np.random.Generator) -> str:
+    def pick(seq):
+        return seq[int(rng.integers(len(seq)))]
+
+    return pick(TEMPLATES).format(
+        company=pick(COMPANIES),
+        company2=pick(COMPANIES),
+        product=pick(PRODUCTS),
+        product2=pick(PRODUCTS),
+        verb=pick(VERBS),
+        adj=pick(ADJECTIVES),
+        noun=pick(TERMS),
+        noun2=pick(TERMS),
+        audience=pick(AUDIENCES),
+        major=int(rng.integers(1, 6)),
+        minor=int(rng.integers(0, 10)),
+        year=int(rng.integers(2024, 2027)),
+    )
+
+
+def iter_synthetic(
+    n: int, seed: int = 0, vocab_size: int = 50_000, start_id: int = 0
+) -> Iterator[tuple[dict, str]]:
+    """(item, snippet) pairs; each document draws from its own seeded stream."""
+    vocab = lexicon(vocab_size)
+    cdf = np.cumsum(_zipf_weights(vocab.size, 1.05))  # "the" ~ 9% of words, like English
+    doms = domains()
+    dom_p = _zipf_weights(len(doms), 0.8)
+    topic_p = _zipf_weights(len(TOPICS), 0.7)
+    for i in range(start_id, start_id + n):
+        rng = np.random.default_rng([seed, i])
+        age = int(rng.exponential(90.0)) % 730  # most news is recent
+        n_topics = int(rng.choice([1, 2, 3], p=[0.5, 0.35, 0.15]))
+        topics = rng.choice(len(TOPICS), size=n_topics, replace=False, p=topic_p)
+        domain = doms[int(rng.choice(len(doms), p=dom_p))]
+        item = {
+            "id": f"syn_{i:07d}",
+            "slug": f"synthetic-{i}",
+            "title": _title(rng),
+            "url": f"https://{domain}/{TOPICS[int(topics[0])]}/{i}",
+            "published_at": (DAY0 - timedelta(days=age)).isoformat(),
+            "excerpt": _words(rng, vocab, cdf, int(rng.integers(15, 35))),
+            "topics": [TOPICS[int(t)] for t in topics],
+        }
+        yield item, _words(rng, vocab, cdf, int(rng.integers(30, 60)))
+
+
+def synthetic_corpus(
+    n: int, seed: int = 0, vocab_size: int = 50_000, start_id: int = 0
+) -> tuple[list[dict], dict[str, str]]:
+    items, snippets = [], {}
+    for item, snippet in iter_synthetic(n, seed, vocab_size, start_id):
+        items.append(item)
+        snippets[item["id"]] = snippet
+    return items, snippets
+
+
+def synthetic_queries(n: int, seed: int = 1, vocab_size: int = 50_000) -> list[str]:
+    """Short keyword queries: a couple of headline terms, sometimes with a rarer word."""
+    rng = np.random.default_rng(seed)
+    vocab = lexicon(vocab_size)
+    content = vocab[len(STOPWORDS) :]
+    cdf = np.cumsum(_zipf_weights(content.size, 1.05))
+    out = []
+    for _ in range(n):
+        words = list(rng.choice(TERMS, size=int(rng.integers(1, 4))))
+        if rng.random() < 0.5:
+            words.append(content[min(int(np.searchsorted(cdf, rng.random())), content.size - 1)])
+        out.append(" ".join(words))
+    return out
+
+
+def write_corpus(out: str | Path, n: int, seed: int = 0, vocab_size: int = 50_000) -> Path:
+    """Stream `n` documents to out/items.json and out/snippets.json (fixtures/ shape)."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    with (
+        (out / "items.json").open("w", encoding="utf-8") as fi,
+        (out / "snippets.json").open("w", encoding="utf-8") as fs,
+    ):
+        fi.write("[\n")
+        fs.write("{\n")
+        for r, (item, snippet) in enumerate(iter_synthetic(n, seed, vocab_size)):
+            sep = ",\n" if r else ""
+            fi.write(sep + json.dumps(item, ensure_ascii=False))
+            fs.write(sep + f"{json.dumps(item['id'])}: {json.dumps(snippet, ensure_ascii=False)}")
+        fi.write("\n]\n")
+        fs.write("\n}\n")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Write a synthetic items.json/snippets.json pair.")
+    ap.add_argument("--n", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--vocab-size", type=int, default=50_000)
+    ap.add_argument("--out", type=Path, required=True)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    write_corpus(args.out, args.n, args.seed, args.vocab_size)
+    print(f"wrote {args.n} docs to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,82 @@
-# Placeholder: with sentence-transformers installed, this could persist vectors to disk.
-# For v1 we build in-memory at import from fixtures.
+# Build the persisted retrieval index that the service memory-maps at startup.
+# Format: see src/retrieval/index_io.py. Without an index, the service builds in-memory
+# from fixtures/ exactly as before.
+#
+#   python scripts/build_index.py                      # fixtures/ -> $INDEX_DIR (./index)
+#   python scripts/build_index.py --items a.json --snippets b.json --out /data/index
+#   python scripts/build_index.py --verify /data/index
+#   python scripts/build_index.py --jsonl items.jsonl --out /data/index   # streamed, chunked
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.config import settings  # noqa: E402
+from src.retrieval.corpus import build_corpus, load_embedder  # noqa: E402
+from src.retrieval.index_build import build_index_stream, iter_jsonl  # noqa: E402
+from src.retrieval.index_io import save_index, verify_index  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build or verify the retrieval index.")
+    ap.add_argument("--items", type=Path, default=ROOT / "fixtures" / "items.json")
+    ap.add_argument("--snippets", type=Path, default=ROOT / "fixtures" / "snippets.json")
+    ap.add_argument("--out", type=Path, default=Path(settings.index_dir))
+    ap.add_argument("--no-bm25", action="store_true", help="skip the BM25 postings")
+    ap.add_argument("--verify", type=Path, metavar="DIR", help="check an existing index and exit")
+    ap.add_argument(
+        "--jsonl",
+        type=Path,
+        help="stream items (one JSON object per line, text in 'snippet') in bounded chunks",
+    )
+    ap.add_argument("--chunk-size", type=int, default=10_000, help="documents per chunk (--jsonl)")
+    ap.add_argument(
+        "--hash-features",
+        type=int,
+        default=0,
+        help="hash keyword terms into this many features (default: a vocabulary, or 2^20 "
+        "with --jsonl, which always hashes)",
+    )
+    args = ap.parse_args()
+
+    if args.verify:
+        manifest = verify_index(args.verify)
+        print(f"OK {args.verify}: {manifest['n_docs']} docs, checksum {manifest['checksum']}")
+        return
+
+    t0 = time.perf_counter()
+    embedder = load_embedder(settings.embedding_model)
+    bm25 = None if args.no_bm25 else (settings.bm25_k1, settings.bm25_b)
+    if args.jsonl:
+        if embedder is None:
+            sys.exit("--jsonl needs sentence-transformers for EMBEDDING_MODEL")
+        manifest = build_index_stream(
+            iter_jsonl(args.jsonl),
+            args.out,
+            embedder,
+            settings.embedding_model,
+            bm25,
+            hash_features=args.hash_features or 1 << 20,
+            chunk_size=args.chunk_size,
+        )
+    else:
+        items = json.loads(args.items.read_text(encoding="utf-8"))
+        snips = json.loads(args.snippets.read_text(encoding="utf-8"))
+        corpus = build_corpus(
+            items, snips, embedder, settings.embedding_model, bm25, hash_features=args.hash_features
+        )
+        manifest = save_index(corpus, args.out)
+    print(
+        f"wrote {args.out}: {manifest['n_docs']} docs, embeddings={manifest['embedding_model']} "
+        f"dim={manifest['embedding_dim']}, {time.perf_counter() - t0:.2f}s"
+    )
+
+
 if __name__ == "__main__":
-    print("In-memory index is built automatically at service start from fixtures/. Nothing to do.")
+    main()
@@ -1,13 +1,25 @@
+import asyncio
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+import json
 import logging
+from typing import Annotated, Any
 
-from fastapi import Body, FastAPI
-from fastapi.responses import StreamingResponse
+from fastapi import Body, FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 from .config import settings
-from .graph.graph import invoke
-from .types import ChatRequest
+from .graph.answerer import get_model
+from .graph.graph import ainvoke, checkpointer
+from .graph.retriever import aretrieve_batch
+from .llm.provider import close_clients
+from .metrics import render as render_metrics
+from .retrieval.client_coreapi import close_core_client
+from .retrieval.hybrid import EngineNotReady, aget_engine, ingest, readiness, warmup
+from .sse import sse_event
+from .tracing import activate, span, start as start_trace
+from .types import ChatRequest, IngestRequest, RetrieveRequest
 
 logging.basicConfig(
     level=settings.log_level,
@@ -18,32 +30,153 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="varta-svc-agent", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Index build/load runs off the event loop; with WARMUP_BACKGROUND the server accepts
+    # connections immediately and /ready reports progress.
+    # The local engine is only needed when retrieval is not delegated to the Core API.
+    if settings.use_mocks and settings.warmup_background:
+        warmup(background=True)
+    elif settings.use_mocks:
+        await asyncio.to_thread(warmup)
+    await get_model().aprewarm(settings.llm_prewarm_connections)
+    yield
+    await close_clients()
+    await close_core_client()
+    get_model.cache_clear()
+
+
+app = FastAPI(title="varta-svc-agent", version="0.1.0", lifespan=lifespan)
 
 
 class Health(BaseModel):
     status: str = "ok"
 
 
+class Ready(BaseModel):
+    status: str
+    stage: str | None = None
+    stages: dict[str, float] = {}
+    elapsed_s: float | None = None
+    docs: int | None = None
+    error: str | None = None
+    cache: dict[str, Any] | None = None  # query-embedding / result cache hit/miss counters
+    conversations: dict[str, Any] | None = None  # checkpointer size and evictions
+
+
+async def _require_ready() -> None:
+    if not settings.use_mocks:
+        return
+    try:
+        await aget_engine(settings.ready_timeout_s)
+    except EngineNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"}) from e
+
+
 @app.get("/health", response_model=Health)
 async def health():
     return Health()
 
 
+@app.get("/ready", response_model=Ready, responses={503: {"model": Ready}})
+async def ready() -> Any:
+    if not settings.use_mocks:
+        return Ready(status="ready", stage="core_api", conversations=checkpointer.stats())
+    snap = Ready(**readiness(), conversations=checkpointer.stats())
+    if snap.status != "ready":
+        return JSONResponse(snap.model_dump(), status_code=503)
+    return snap
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    # Prometheus text format; counters and histograms are per worker process
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/agent/v1/admin/ingest")
+async def admin_ingest(
+    req: Annotated[IngestRequest, Body()], x_admin_token: Annotated[str | None, Header()] = None
+):
+    if not settings.admin_token or x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="admin API disabled or bad token")
+    await _require_ready()
+    items = [it.model_dump(exclude={"snippet"}) for it in req.upsert]
+    snippets = {it.id: it.snippet for it in req.upsert}
+    return await asyncio.to_thread(ingest, items, req.delete, snippets)
+
+
+def _plan(req: RetrieveRequest) -> dict[str, Any]:
+    f = req.filters
+    topics, since = (f.topic, f.since) if f else (None, None)
+    return {"query": req.query, "k": req.k, "topics": topics, "since": since}
+
+
+@app.post("/agent/v1/retrieve")
+async def retrieve(reqs: Annotated[list[RetrieveRequest], Body()]):
+    # NDJSON, one {"index", "results"} line per query in request order, written as each
+    # batch of RETRIEVE_BATCH_SIZE queries is scored
+    if len(reqs) > settings.retrieve_max_queries:
+        raise HTTPException(
+            status_code=413, detail=f"at most {settings.retrieve_max_queries} queries per call"
+        )
+    await _require_ready()
+
+    async def lines() -> AsyncGenerator[bytes, None]:
+        size = max(settings.retrieve_batch_size, 1)
+        for lo in range(0, len(reqs), size):
+            batch = await aretrieve_batch([_plan(r) for r in reqs[lo : lo + size]])
+            yield "".join(
+                json.dumps({"index": i, "results": res}) + "\n" for i, res in enumerate(batch, lo)
+            ).encode()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/agent/v1/retrieve/test")
+async def retrieve_test(req: Annotated[RetrieveRequest, Body()]):
+    # one query as plain JSON, for manual checks
+    await _require_ready()
+    batch = await aretrieve_batch([_plan(req)])
+    return {"results": batch[0]}
+
+
 @app.post("/agent/v1/chat/stream")
-async def chat_stream(req: ChatRequest = Body(...)):
+async def chat_stream(
+    req: Annotated[ChatRequest, Body()],
+    x_trace: Annotated[str | None, Header()] = None,
+    x_admin_token: Annotated[str | None, Header()] = None,
+):
+    await _require_ready()
+    # profiles cover the whole process (other requests' frames included), so with an
+    # ADMIN_TOKEN set the header is only honored alongside it
+    allow_header = settings.trace_header and (
+        not settings.admin_token or x_admin_token == settings.admin_token
+    )
+
     async def event_gen() -> AsyncGenerator[bytes, None]:
-       for chunk in invoke(req):
-            yield chunk
-
-       """
-       # citations event
-       yield sse_event("citations", {"citations": final_payload["citations"]})
-        
-       # done event
-       yield sse_event(
-           "done", {"usage": {"input": len(req.message), "output": len(final_payload["answer"])}}
-       )
-       """
+        # token events as the model streams, then citations, then done (with TTFT/ITL)
+        trace, requested = start_trace(
+            x_trace,
+            allow_header,
+            settings.trace_sample_rate,
+            settings.trace_profiler,
+            settings.trace_sample_interval_ms,
+        )
+        if trace is None:
+            async for chunk in ainvoke(req):
+                yield chunk
+            return
+        try:
+            with activate(trace), span("chat_stream"):
+                async for chunk in ainvoke(req):
+                    yield chunk
+        finally:
+            result = trace.finish()  # also stops the profiler if the client went away
+        if requested:
+            yield sse_event("trace", result)
+        else:
+            path = await asyncio.to_thread(trace.save, settings.trace_dir)
+            logger.info("trace written to %s", path)
 
     return StreamingResponse(event_gen(), media_type="text/event-stream")
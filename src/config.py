@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 
 from dotenv import load_dotenv
 from pydantic import BaseModel
@@ -23,5 +24,131 @@ class Settings(BaseModel):
     min_citations: int = int(os.getenv("MIN_CITATIONS", "2"))
     recency_halflife_days: float = float(os.getenv("RECENCY_HALFLIFE_DAYS", "10"))
 
+    # result diversity: "domain" keeps the ranked order with at most MAX_PER_DOMAIN results per
+    # domain; "mmr" re-ranks the top MMR_POOL candidates (0 = all) by maximal marginal
+    # relevance, MMR_LAMBDA * score - (1 - MMR_LAMBDA) * max cosine to those already picked,
+    # under the same per-domain cap (0 disables the cap in mmr)
+    diversity: str = os.getenv("DIVERSITY", "domain").lower()
+    mmr_lambda: float = float(os.getenv("MMR_LAMBDA", "0.7"))
+    mmr_pool: int = int(os.getenv("MMR_POOL", "100"))
+
+    # keyword engine: "tfidf" (sparse TF-IDF scan) or "bm25" (inverted index)
+    keyword_engine: str = os.getenv("KEYWORD_ENGINE", "tfidf").lower()
+    bm25_k1: float = float(os.getenv("BM25_K1", "1.2"))
+    bm25_b: float = float(os.getenv("BM25_B", "0.75"))
+
+    # persisted index (scripts/build_index.py); built from fixtures when absent
+    index_dir: str = os.getenv("INDEX_DIR", str(Path(__file__).resolve().parents[1] / "index"))
+    index_verify: bool = os.getenv("INDEX_VERIFY", "false").lower() == "true"
+
+    # startup: build/load the retrieval engine in a background thread; requests that arrive
+    # before it is ready wait up to READY_TIMEOUT_S, then get a 503
+    warmup_background: bool = os.getenv("WARMUP_BACKGROUND", "true").lower() == "true"
+    ready_timeout_s: float = float(os.getenv("READY_TIMEOUT_S", "10"))
+
+    # vector index: "exact" (brute force), "ivf" or "hnsw" (approximate)
+    vector_index: str = os.getenv("VECTOR_INDEX", "exact").lower()
+    ivf_nlist: int = int(os.getenv("IVF_NLIST", "0"))  # 0 = ~4*sqrt(N)
+    ivf_nprobe: int = int(os.getenv("IVF_NPROBE", "8"))
+    hnsw_m: int = int(os.getenv("HNSW_M", "16"))
+    hnsw_ef_construction: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "100"))
+    hnsw_ef_search: int = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    # exact index over quantized embeddings: "none", "float16" or "int8" (per-"vector" or
+    # per-"dim" scales). Searches scan the codes for VECTOR_RESCORE * k candidates and rescore
+    # them from the float32 vectors, which must be memory-mapped from INDEX_DIR (otherwise
+    # the setting is ignored with a warning). Holds until the first refit, which rebuilds the
+    # embeddings in memory; quantization is then off until a restart from a saved index
+    vector_quantization: str = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+    vector_quant_scale: str = os.getenv("VECTOR_QUANT_SCALE", "vector").lower()
+    vector_rescore: int = int(os.getenv("VECTOR_RESCORE", "4"))
+
+    # incremental ingestion: new/updated docs go to a delta segment scored with the base
+    # IDF; a full refit (new IDF, tombstones dropped) runs in the background once the
+    # pending changes reach max(INGEST_REFIT_DOCS, INGEST_REFIT_RATIO * corpus size)
+    embed_batch_size: int = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+    ingest_refit_docs: int = int(os.getenv("INGEST_REFIT_DOCS", "1000"))
+    ingest_refit_ratio: float = float(os.getenv("INGEST_REFIT_RATIO", "0.1"))
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")  # empty disables /agent/v1/admin/*
+
+    # topics/since filters: with FILTER_PUSHDOWN, only rows passing them are scored. Up to
+    # FILTER_BRUTE_FORCE_ROWS passing rows are scored exactly by brute force; above that the
+    # vector index is searched (over-fetching for ANN indexes) and its hits masked
+    filter_pushdown: bool = os.getenv("FILTER_PUSHDOWN", "true").lower() == "true"
+    filter_brute_force_rows: int = int(os.getenv("FILTER_BRUTE_FORCE_ROWS", "20000"))
+
+    # caches: LRU of query embeddings, and of hybrid_search results (dropped on ingest).
+    # Results include the recency boost, so their TTL is also capped at 0.1% of the
+    # recency half-life; 0 disables a cache.
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+    result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+    result_cache_ttl_s: float = float(os.getenv("RESULT_CACHE_TTL_S", "60"))
+
+    # query encoder micro-batching: concurrent query embeddings share one model call;
+    # a batch closes after ENCODE_MAX_WAIT_MS or ENCODE_MAX_BATCH queries (1 disables)
+    encode_max_batch: int = int(os.getenv("ENCODE_MAX_BATCH", "32"))
+    encode_max_wait_ms: float = float(os.getenv("ENCODE_MAX_WAIT_MS", "2"))
+
+    # threads for CPU-bound retrieval in the async chat path
+    retrieval_workers: int = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+
+    # sharded retrieval: RETRIEVAL_SHARDS > 1 splits the base segment's keyword (and, with
+    # the exact vector index, embedding) scoring across that many worker processes, which
+    # share the arrays through the INDEX_DIR memory maps or shared memory; 0/1 = in process
+    retrieval_shards: int = int(os.getenv("RETRIEVAL_SHARDS", "0"))
+
+    # batched retrieval (POST /agent/v1/retrieve): at most RETRIEVE_MAX_QUERIES per call,
+    # scored RETRIEVE_BATCH_SIZE at a time (one encoder call and one matrix product each;
+    # the exact vector index holds a batch x docs float32 score matrix meanwhile)
+    retrieve_max_queries: int = int(os.getenv("RETRIEVE_MAX_QUERIES", "1000"))
+    retrieve_batch_size: int = int(os.getenv("RETRIEVE_BATCH_SIZE", "32"))
+
+    # LLM HTTP clients (one pooled client per model/base URL, HTTP/2 if `h2` is installed);
+    # LLM_PREWARM_CONNECTIONS are opened at startup
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    llm_max_keepalive: int = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+    llm_keepalive_expiry_s: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY_S", "30"))
+    llm_connect_timeout_s: float = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+    llm_read_timeout_s: float = float(os.getenv("LLM_READ_TIMEOUT_S", "60"))
+    llm_http2: bool = os.getenv("LLM_HTTP2", "true").lower() == "true"
+    llm_prewarm_connections: int = int(os.getenv("LLM_PREWARM_CONNECTIONS", "2"))
+
+    # Core API retrieval backend (USE_MOCKS=false): pool, timeouts, retries, item fetch
+    core_api_max_connections: int = int(os.getenv("CORE_API_MAX_CONNECTIONS", "100"))
+    core_api_max_keepalive: int = int(os.getenv("CORE_API_MAX_KEEPALIVE", "50"))
+    core_api_connect_timeout_s: float = float(os.getenv("CORE_API_CONNECT_TIMEOUT_S", "2"))
+    core_api_read_timeout_s: float = float(os.getenv("CORE_API_READ_TIMEOUT_S", "10"))
+    core_api_retries: int = int(os.getenv("CORE_API_RETRIES", "2"))
+    core_api_backoff_s: float = float(os.getenv("CORE_API_BACKOFF_S", "0.05"))
+    core_api_backoff_max_s: float = float(os.getenv("CORE_API_BACKOFF_MAX_S", "1"))
+    core_api_fanout: int = int(os.getenv("CORE_API_FANOUT", "16"))
+    core_api_batch_items: bool = os.getenv("CORE_API_BATCH_ITEMS", "false").lower() == "true"
+
+    # conversation state (LangGraph checkpointer): "memory" or "sqlite" (one file, survives
+    # restarts, shared by the workers of a node). Conversations idle for
+    # CHECKPOINT_IDLE_TTL_S, or least recently used beyond CHECKPOINT_MAX_THREADS (or, in
+    # memory, CHECKPOINT_MAX_BYTES), are evicted; 0 disables a bound
+    checkpoint_backend: str = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
+    checkpoint_sqlite_path: str = os.getenv(
+        "CHECKPOINT_SQLITE_PATH",
+        str(Path(__file__).resolve().parents[1] / "state" / "checkpoints.sqlite"),
+    )
+    checkpoint_max_threads: int = int(os.getenv("CHECKPOINT_MAX_THREADS", "10000"))
+    checkpoint_idle_ttl_s: float = float(os.getenv("CHECKPOINT_IDLE_TTL_S", "3600"))
+    checkpoint_max_bytes: int = int(os.getenv("CHECKPOINT_MAX_BYTES", str(256 * 2**20)))
+    checkpoint_keep: int = int(os.getenv("CHECKPOINT_KEEP", "2"))  # checkpoints per conversation
+    conversation_max_messages: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", "20"))
+
+    # request tracing: an `X-Trace: spans|cprofile|sample` header (if TRACE_HEADER, and with
+    # X-Admin-Token when ADMIN_TOKEN is set) adds a `trace` SSE event after `done`;
+    # TRACE_SAMPLE_RATE of all other chats are traced with TRACE_PROFILER ("", "cprofile" or
+    # "sample") and written as JSON files to TRACE_DIR
+    trace_header: bool = os.getenv("TRACE_HEADER", "false").lower() == "true"
+    trace_sample_rate: float = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    trace_profiler: str = os.getenv("TRACE_PROFILER", "").lower()
+    trace_sample_interval_ms: float = float(os.getenv("TRACE_SAMPLE_INTERVAL_MS", "5"))
+    trace_dir: str = os.getenv(
+        "TRACE_DIR", str(Path(__file__).resolve().parents[1] / "state" / "traces")
+    )
+
 
 settings = Settings()
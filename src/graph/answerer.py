@@ -1,16 +1,97 @@
+from collections.abc import AsyncIterator
+from functools import lru_cache
+import time
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
 from ..config import settings
-from ..llm.provider import choose_model
+from ..llm.provider import Model, choose_model
+from ..metrics import LLM_CHUNKS, LLM_ERRORS, LLM_SECONDS, LLM_TTFT_SECONDS
+
+
+@lru_cache(maxsize=1)
+def get_model() -> Model:
+    # Resolved on first use (or at startup via app lifespan), not at import time
+    return choose_model(settings.model_name)
+
+
+class AnswerChat(BaseChatModel):
+    """
+    LangChain chat-model view of a Model bound to one set of sources. Invoking it inside a
+    graph node lets LangGraph's `messages` stream mode forward each delta as it arrives.
+    """
+
+    model: Any
+    docs: list[dict]
+    max_tokens: int = 3000
+    temperature: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "varta-answer"
+
+    @property
+    def _metric_label(self) -> str:
+        return getattr(self.model, "model", None) or getattr(self.model, "name", "unknown")
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002 - BaseChatModel passes these by name
+        run_manager: CallbackManagerForLLMRun | None = None,  # noqa: ARG002
+        **kwargs: Any,  # noqa: ARG002
+    ) -> ChatResult:
+        label = self._metric_label
+        t0 = time.perf_counter()
+        try:
+            text, _ids = self.model.generate_answer(
+                messages[-1].content, self.docs, self.max_tokens, self.temperature
+            )
+        except Exception:
+            LLM_ERRORS.labels(label).inc()
+            raise
+        LLM_SECONDS.labels(label).observe(time.perf_counter() - t0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(text))])
 
-model = choose_model(settings.model_name)
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,  # noqa: ARG002
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,  # noqa: ARG002
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        label = self._metric_label
+        t0 = time.perf_counter()
+        n = 0
+        try:
+            async for delta in self.model.astream_answer(
+                messages[-1].content, self.docs, self.max_tokens, self.temperature
+            ):
+                if not n:
+                    LLM_TTFT_SECONDS.labels(label).observe(time.perf_counter() - t0)
+                n += 1
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta))
+                if run_manager:
+                    await run_manager.on_llm_new_token(delta, chunk=chunk)
+                yield chunk
+        except Exception:
+            LLM_ERRORS.labels(label).inc()
+            raise
+        finally:
+            LLM_CHUNKS.labels(label).inc(n)
+        LLM_SECONDS.labels(label).observe(time.perf_counter() - t0)
 
 
-def synthesize_answer(
+async def asynthesize_answer(
     query: str, retrieved: list[dict], max_tokens: int = 3000, temperature: float = 0.5
-) -> tuple[str, list[str]]:
-    # Select up to MIN_CITATIONS docs for inline markers, ensure diversity
+) -> tuple[BaseMessage, list[str]]:
+    """Streams the answer (see AnswerChat) and returns the full message plus cited ids."""
     top = retrieved[: max(settings.min_citations, len(retrieved))]
     top_ids = [r["item_id"] for r in top]
-    answer, _stream = model.generate_answer(
-        query, top, max_tokens=max_tokens, temperature=temperature
-    )
-    return answer, top_ids
+    llm = AnswerChat(model=get_model(), docs=top, max_tokens=max_tokens, temperature=temperature)
+    message = await llm.ainvoke([HumanMessage(query)])
+    return message, top_ids
@@ -0,0 +1,494 @@
+"""
+Conversation state for the LangGraph checkpointer, bounded so worker memory stays flat.
+
+BoundedMemorySaver (default) keeps state in process; SqliteSaver (CHECKPOINT_BACKEND=sqlite)
+persists it to one SQLite file, so it survives restarts and is shared by the workers of a node.
+Both keep only the newest CHECKPOINT_KEEP checkpoints of a conversation and evict whole
+conversations that are idle for CHECKPOINT_IDLE_TTL_S or beyond CHECKPOINT_MAX_THREADS
+(least recently used first). The message history itself is capped by the graph's
+`windowed_messages` reducer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    InMemorySaver with bounded growth.
+    - Keeps the newest `keep` checkpoints per conversation (and only the blobs they use).
+    - Evicts conversations idle for `idle_ttl_s`, then least recently used ones beyond
+      `max_threads` or while the stored bytes exceed `max_bytes` (0 disables a bound).
+    - stats() reports conversations, stored bytes and evictions.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10_000,
+        idle_ttl_s: float = 3600.0,
+        max_bytes: int = 0,
+        keep: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.max_threads = max_threads
+        self.idle_ttl_s = idle_ttl_s
+        self.max_bytes = max_bytes
+        self.keep = max(1, keep)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._access: OrderedDict[str, float] = OrderedDict()  # thread -> last use, LRU first
+        self._blob_keys: dict[str, set[tuple[Any, ...]]] = {}
+        self._write_keys: dict[str, set[tuple[str, str, str]]] = {}
+        self._versions: dict[str, dict[tuple[str, str], ChannelVersions]] = {}
+        self._bytes: dict[str, int] = {}
+        self.evicted = 0
+
+    def _touch(self, thread_id: str) -> None:
+        self._access[thread_id] = self._clock()
+        self._access.move_to_end(thread_id)
+
+    def _account(self, thread_id: str) -> None:
+        n = sum(len(self.blobs[k][1]) for k in self._blob_keys.get(thread_id, ()))
+        for cps in self.storage.get(thread_id, {}).values():
+            n += sum(len(c[1]) + len(m[1]) for c, m, _ in cps.values())
+        for k in self._write_keys.get(thread_id, ()):
+            n += sum(len(w[2][1]) for w in self.writes.get(k, {}).values())
+        self._bytes[thread_id] = n
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        cps = self.storage[thread_id][checkpoint_ns]
+        if len(cps) <= self.keep:
+            return
+        for cid in sorted(cps)[: -self.keep]:
+            del cps[cid]
+            self.writes.pop((thread_id, checkpoint_ns, cid), None)
+            self._write_keys.get(thread_id, set()).discard((thread_id, checkpoint_ns, cid))
+            self._versions[thread_id].pop((checkpoint_ns, cid), None)
+        live = {
+            (thread_id, checkpoint_ns, ch, v)
+            for cid in cps
+            for ch, v in self._versions[thread_id].get((checkpoint_ns, cid), {}).items()
+        }
+        keys = self._blob_keys[thread_id]
+        for k in [k for k in keys if k[1] == checkpoint_ns and k not in live]:
+            keys.discard(k)
+            self.blobs.pop(k, None)
+
+    def _evict(self) -> None:
+        now = self._clock()
+        while len(self._access) > 1:  # never the conversation that was just written
+            thread_id, seen = next(iter(self._access.items()))
+            over = (self.max_threads and len(self._access) > self.max_threads) or (
+                self.max_bytes and self.nbytes > self.max_bytes
+            )
+            if not over and now - seen <= self.idle_ttl_s:
+                break
+            self._drop(thread_id)
+            self.evicted += 1
+
+    def _drop(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for k in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(k, None)
+        for k in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(k, None)
+        self._versions.pop(thread_id, None)
+        self._access.pop(thread_id, None)
+        self._bytes.pop(thread_id, None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._bytes.values())
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            found = super().get_tuple(config)
+            if thread_id in self._access:
+                self._touch(thread_id)
+            elif not any(self.storage.get(thread_id, {}).values()):
+                self.storage.pop(thread_id, None)  # the defaultdict lookup created it
+            return found
+
+    def list(self, config: RunnableConfig | None, **kwargs: Any) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            found = list(super().list(config, **kwargs))
+        yield from found
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            self._versions.setdefault(thread_id, {})[(checkpoint_ns, checkpoint["id"])] = dict(
+                checkpoint["channel_versions"]
+            )
+            self._blob_keys.setdefault(thread_id, set()).update(
+                (thread_id, checkpoint_ns, k, v) for k, v in new_versions.items()
+            )
+            self._prune(thread_id, checkpoint_ns)
+            self._account(thread_id)
+            self._touch(thread_id)
+            self._evict()
+            return saved
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, ns, config["configurable"]["checkpoint_id"])
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._write_keys.setdefault(thread_id, set()).add(key)
+            self._account(thread_id)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop(thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "conversations": len(self._access),
+                "bytes": self.nbytes,
+                "evicted": self.evicted,
+            }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_accessed ON threads (accessed_at);
+"""
+
+
+def _config(thread_id: str, ns: str, cid: str) -> RunnableConfig:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": cid}}
+
+
+class SqliteSaver(BaseCheckpointSaver[int]):
+    """
+    Checkpointer on a stdlib sqlite3 file (WAL, so the workers of one node can share it).
+    - Each checkpoint is stored whole, channel values included; writes in their own table.
+    - Same bounds as BoundedMemorySaver: `keep` checkpoints per conversation, idle TTL and
+      LRU by `max_threads`, using wall-clock access times (they outlive the process).
+    - Calls are serialized by a lock; the async methods run them in a worker thread, since
+      a write can wait up to busy_timeout for another process's lock.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_threads: int = 10_000,
+        idle_ttl_s: float = 3600.0,
+        keep: int = 2,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_threads = max_threads
+        self.idle_ttl_s = idle_ttl_s
+        self.keep = max(1, keep)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(_SCHEMA)
+        self.evicted = 0
+
+    def _tuple(self, row: tuple[Any, ...]) -> CheckpointTuple:
+        thread_id, ns, cid, parent, ctype, cblob, mtype, mblob = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id=? AND "
+            "checkpoint_ns=? AND checkpoint_id=? ORDER BY task_id, idx",
+            (thread_id, ns, cid),
+        ).fetchall()
+        return CheckpointTuple(
+            config=_config(thread_id, ns, cid),
+            checkpoint=self.serde.loads_typed((ctype, cblob)),
+            metadata=self.serde.loads_typed((mtype, mblob)),
+            parent_config=_config(thread_id, ns, parent) if parent else None,
+            pending_writes=[(t, c, self.serde.loads_typed((vt, v))) for t, c, vt, v in writes],
+        )
+
+    def _touch(self, thread_id: str) -> None:
+        self.conn.execute(
+            "INSERT INTO threads VALUES (?, ?) ON CONFLICT(thread_id) DO UPDATE SET "
+            "accessed_at=excluded.accessed_at",
+            (thread_id, self._clock()),
+        )
+
+    def _drop(self, thread_ids: list[str]) -> None:
+        for table in ("checkpoints", "writes", "threads"):
+            self.conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id=?", [(t,) for t in thread_ids]
+            )
+
+    def _evict(self) -> None:
+        cutoff = self._clock() - self.idle_ttl_s
+        rows = self.conn.execute(
+            "SELECT thread_id FROM threads WHERE accessed_at < ?", (cutoff,)
+        ).fetchall()
+        if self.max_threads:
+            rows += self.conn.execute(
+                "SELECT thread_id FROM threads WHERE accessed_at >= ? "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?",
+                (cutoff, self.max_threads),
+            ).fetchall()
+        idle = [r[0] for r in rows]
+        if idle:
+            self._drop(idle)
+            self.evicted += len(idle)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            "checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id=? AND checkpoint_ns=?"
+        )
+        args: tuple[Any, ...] = (thread_id, ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id=?"
+            args += (checkpoint_id,)
+        with self._lock:
+            row = self.conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            self._touch(thread_id)
+            return self._tuple(row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, "
+            "checkpoint, metadata_type, metadata FROM checkpoints WHERE 1=1"
+        )
+        args: list[Any] = []
+        if config:
+            query += " AND thread_id=?"
+            args.append(config["configurable"]["thread_id"])
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns=?"
+                args.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id=?"
+                args.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id<?"
+            args.append(before_id)
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY checkpoint_id DESC", args).fetchall()
+            found = [self._tuple(r) for r in rows]
+        if filter:
+            found = [t for t in found if all(t.metadata.get(k) == v for k, v in filter.items())]
+        yield from found[:limit] if limit is not None else found
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,  # noqa: ARG002 - the checkpoint is stored whole
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        ctype, cblob = self.serde.dumps_typed(checkpoint)
+        mtype, mblob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                parent = config["configurable"].get("checkpoint_id")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint["id"], parent, ctype, cblob, mtype, mblob),
+                )
+                stale = self.conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id=? AND checkpoint_ns=? "
+                    "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                    (thread_id, ns, self.keep),
+                ).fetchall()
+                for table in ("checkpoints", "writes"):
+                    self.conn.executemany(
+                        f"DELETE FROM {table} WHERE thread_id=? AND checkpoint_ns=? "
+                        "AND checkpoint_id=?",
+                        [(thread_id, ns, cid) for (cid,) in stale],
+                    )
+                self._touch(thread_id)
+                self._evict()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return _config(thread_id, ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        cid = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            vtype, vblob = self.serde.dumps_typed(value)
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            rows.append((thread_id, ns, cid, task_id, idx, channel, vtype, vblob, task_path))
+        # special writes (errors, interrupts) replace; regular ones are written once
+        verb = "REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "IGNORE"
+        with self._lock:
+            self.conn.executemany(
+                f"INSERT OR {verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop([thread_id])
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        found = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in found:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            threads = self.conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "conversations": threads,
+            "bytes": pages * page_size,
+            "evicted": self.evicted,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def make_checkpointer() -> BoundedMemorySaver | SqliteSaver:
+    if settings.checkpoint_backend == "sqlite":
+        logger.info("conversation state in SQLite at %s", settings.checkpoint_sqlite_path)
+        return SqliteSaver(
+            settings.checkpoint_sqlite_path,
+            max_threads=settings.checkpoint_max_threads,
+            idle_ttl_s=settings.checkpoint_idle_ttl_s,
+            keep=settings.checkpoint_keep,
+        )
+    return BoundedMemorySaver(
+        max_threads=settings.checkpoint_max_threads,
+        idle_ttl_s=settings.checkpoint_idle_ttl_s,
+        max_bytes=settings.checkpoint_max_bytes,
+        keep=settings.checkpoint_keep,
+    )
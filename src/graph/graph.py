@@ -1,51 +1,93 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+import functools
 import logging
+import time
 from typing import Annotated, Any
+from uuid import uuid4
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.constants import END, START
 from langgraph.graph import StateGraph
 from langgraph.graph.message import AnyMessage, add_messages
+import numpy as np
 from pydantic import BaseModel, Field
 
-from src.graph.answerer import synthesize_answer
+from src.config import settings
+from src.graph.answerer import asynthesize_answer
+from src.graph.checkpoint import make_checkpointer
+from src.graph.guardrails import enforce_citations
 from src.graph.planner import plan_request
-from src.graph.retriever import retrieve_docs
+from src.graph.retriever import aretrieve_docs
+from src.metrics import CHAT_ACTIVE, CHAT_REQUESTS, CHAT_SECONDS, CHAT_TTFT_SECONDS, NODE_SECONDS
 from src.sse import sse_event
+from src.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+def windowed_messages(left: list[AnyMessage], right: Any) -> list[AnyMessage]:
+    """add_messages, keeping only the newest CONVERSATION_MAX_MESSAGES (0 keeps all)."""
+    merged = add_messages(left, right)
+    n = settings.conversation_max_messages
+    return merged[-n:] if n > 0 else merged
+
+
 class AgentState(BaseModel):
     plan: dict[str, Any] = Field(default_factory=dict)
     retrieved: list[dict[str, Any]] = Field(default_factory=list)
-    messages: Annotated[list[AnyMessage], add_messages] = Field(default_factory=list)
+    messages: Annotated[list[AnyMessage], windowed_messages] = Field(default_factory=list)
     top_ids: list[str] = Field(default_factory=list)
 
 
 graph = StateGraph(AgentState)
 
 
-def plan_node(state: AgentState):
-    logger.debug(f"plan node: {state}")
+def timed(node: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Record the wrapped node's wall time in agent_node_duration_seconds{node}, and as a
+    trace span when the request is traced."""
+    hist = NODE_SECONDS.labels(node)
+
+    def wrap(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(fn)
+        async def run(state: AgentState):
+            t0 = time.perf_counter()
+            try:
+                with span(f"node.{node}"):
+                    return await fn(state)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+
+        return run
+
+    return wrap
+
+
+@timed("plan")
+async def plan_node(state: AgentState):
+    logger.debug("plan node: %s", state)
     plan = plan_request(state.messages[-1].content, {}, 5)
-    logger.debug(f"plan node plan: {plan}")
+    logger.debug("plan node plan: %s", plan)
     return {"plan": plan}
 
 
-def retrieve_node(state: AgentState):
-    logger.debug(f"retrieve node: {state}")
-    return retrieve_docs(state.plan)
+@timed("retrieve")
+async def retrieve_node(state: AgentState):
+    logger.debug("retrieve node: %s", state)
+    return await aretrieve_docs(state.plan)
 
 
-def synthesize_node(state: AgentState):
+@timed("synthesize")
+async def synthesize_node(state: AgentState):
     # Build system+context prompt with doc snippets; ask for inline [n] refs.
     # Stream via llm.astream and forward deltas; also accumulate full text + compute citations.
     ...
-    answer, top_ids = synthesize_answer(state.messages[-1].content, state.retrieved)
-    logger.debug(f"synthesized answer: {answer}")
-    return {"messages": AIMessage(answer), "top_ids": top_ids}
+    # The returned message keeps the streamed chunks' id, so `messages` mode does not
+    # emit the full answer a second time.
+    answer, top_ids = await asynthesize_answer(state.messages[-1].content, state.retrieved)
+    logger.debug("synthesized answer: %s", answer.content)
+    return {"messages": answer, "top_ids": top_ids}
 
 
 graph.add_node("plan", plan_node)
@@ -56,19 +98,72 @@ graph.add_edge(START, "plan")
 graph.add_edge("plan", "retrieve")
 graph.add_edge("retrieve", "synthesize")
 graph.add_edge("synthesize", END)
-checkpointer = InMemorySaver()
+checkpointer = make_checkpointer()
 
 agent_app = graph.compile(checkpointer=checkpointer)
 
 
-def invoke(req: Any):
-    config: RunnableConfig = {"configurable": {"thread_id": req.conversationId}}
-    for _channel, payload in agent_app.stream(
-        {"messages": [HumanMessage(getattr(req, "message", ""))]}, config, stream_mode=["messages"]
-    ):
-        message_obj, _meta = payload
-        logger.debug(f"received message: {message_obj}")
-        content = message_obj.content
-        if isinstance(content, str) and content:
-            yield sse_event("token", {"content": content})
-    yield sse_event("done", {})
+def _timing(t0: float, stamps: list[float]) -> dict[str, Any]:
+    gaps = np.diff(stamps) * 1000 if len(stamps) > 1 else np.zeros(0)
+    return {
+        "ttft_ms": round((stamps[0] - t0) * 1000, 2) if stamps else None,
+        "itl_ms_mean": round(float(gaps.mean()), 2) if gaps.size else None,
+        "itl_ms_p99": round(float(np.percentile(gaps, 99)), 2) if gaps.size else None,
+        "chunks": len(stamps),
+        "total_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+async def ainvoke(req: Any) -> AsyncIterator[bytes]:
+    t0 = time.perf_counter()
+    # without a conversationId the state is per request (not one shared `None` thread)
+    conversation_id = getattr(req, "conversationId", None)
+    thread_id = conversation_id or f"anon-{uuid4().hex}"
+    config: RunnableConfig = {"configurable": {"thread_id": thread_id}}
+    retrieved: list[dict[str, Any]] = []
+    top_ids: list[str] = []
+    parts: list[str] = []
+    stamps: list[float] = []
+    CHAT_ACTIVE.inc()
+    outcome = "error"
+    try:
+        async for mode, payload in agent_app.astream(
+            {"messages": [HumanMessage(getattr(req, "message", ""))]},
+            config,
+            stream_mode=["messages", "updates"],
+        ):
+            if mode == "updates":
+                for node, update in payload.items():
+                    if node == "retrieve" and update:
+                        retrieved = update["retrieved"]
+                    elif node == "synthesize" and update:
+                        top_ids = update["top_ids"]
+                continue
+            message_obj, _meta = payload
+            logger.debug("received message: %s", message_obj)
+            content = message_obj.content
+            is_ai = isinstance(message_obj, AIMessage | AIMessageChunk)
+            if is_ai and isinstance(content, str) and content:
+                stamps.append(time.perf_counter())
+                if len(stamps) == 1:
+                    CHAT_TTFT_SECONDS.observe(stamps[0] - t0)
+                parts.append(content)
+                yield sse_event("token", {"content": content})
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"  # client went away
+        raise
+    finally:
+        CHAT_ACTIVE.dec()
+        CHAT_REQUESTS.labels(outcome).inc()
+        if not conversation_id:
+            await checkpointer.adelete_thread(thread_id)
+
+    answer = "".join(parts)
+    final = enforce_citations(answer, retrieved, top_ids, settings.min_citations)
+    yield sse_event("citations", {"citations": final["citations"]})
+    timing = _timing(t0, stamps)
+    CHAT_SECONDS.observe(time.perf_counter() - t0)
+    logger.info("chat stream timing %s", timing)
+    usage = {"input": len(getattr(req, "message", "")), "output": len(answer)}
+    yield sse_event("done", {"usage": usage, "timing": timing})
@@ -1,20 +1,78 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
 from typing import Any
 
 from ..config import settings
-from ..retrieval.hybrid import hybrid_search, resolve_items
+from ..retrieval.client_coreapi import get_core_client
+from ..retrieval.hybrid import hybrid_search, hybrid_search_batch, resolve_items
+from ..tracing import span
+
+
+def _with_meta(res: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # attach snippets for downstream answerer
+    with span("resolve_items", n=len(res)):
+        metas = resolve_items([r["item_id"] for r in res])
+    meta_by_id = {m["item_id"]: m for m in metas}
+    return [{**r, **meta_by_id.get(r["item_id"], {})} for r in res]
 
 
 def retrieve_docs(plan: dict[str, Any]) -> dict[str, Any]:
-    # In v1, USE_MOCKS governs whether we call Core API (omitted here) or use fixtures.
-    # For simplicity, we always use local hybrid over fixtures;
-    # switching to Core API is via client_coreapi.
+    # Local hybrid retrieval over fixtures / the persisted index (USE_MOCKS=true).
     k = plan.get("k", settings.retrieve_k)
     res = hybrid_search(plan["query"], k, plan.get("topics"), plan.get("since"))
-    # attach snippets for downstream answerer
-    metas = resolve_items([r["item_id"] for r in res])
-    meta_by_id = {m["item_id"]: m for m in metas}
-    enriched = []
-    for r in res:
-        m = meta_by_id.get(r["item_id"], {})
-        enriched.append({**r, **m})
-    return {"retrieved": enriched}
+    return {"retrieved": _with_meta(res)}
+
+
+def retrieve_batch(plans: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    # retrieve_docs for many plans, scored together (HybridEngine.search_batch)
+    requests = [
+        (p["query"], p.get("k", settings.retrieve_k), p.get("topics"), p.get("since"))
+        for p in plans
+    ]
+    return [_with_meta(res) for res in hybrid_search_batch(requests)]
+
+
+# NumPy scoring releases the GIL for the heavy parts; a small dedicated pool keeps it off
+# the event loop without letting a burst of requests oversubscribe the CPU
+_pool = ThreadPoolExecutor(max_workers=settings.retrieval_workers, thread_name_prefix="retrieval")
+
+
+async def aretrieve_docs(plan: dict[str, Any]) -> dict[str, Any]:
+    if settings.use_mocks:
+        # run in a copy of this context so trace spans reach the request's trace
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(_pool, ctx.run, retrieve_docs, plan)
+    return await _retrieve_core_api(plan)
+
+
+async def aretrieve_batch(plans: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    if settings.use_mocks:
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            _pool, ctx.run, retrieve_batch, plans
+        )
+    # the Core API has no batch search: one request per plan, over the pooled client
+    results = await asyncio.gather(*(_retrieve_core_api(p) for p in plans))
+    return [r["retrieved"] for r in results]
+
+
+async def _retrieve_core_api(plan: dict[str, Any]) -> dict[str, Any]:
+    client = get_core_client()
+    k = plan.get("k", settings.retrieve_k)
+    filters = {"topic": plan.get("topics"), "since": plan.get("since")}
+    with span("coreapi.search", k=k):
+        res = await client.search(plan["query"], k, filters)
+    with span("coreapi.items", n=len(res)):
+        items = await client.items([r["slug"] for r in res])
+    meta_by_slug = {
+        it["slug"]: {
+            "item_id": it.get("id", it.get("item_id")),
+            "title": it.get("title", ""),
+            "url": it.get("url", ""),
+            "published_at": it.get("published_at", ""),
+            "snippet": it.get("snippet") or it.get("excerpt", ""),
+        }
+        for it in items
+    }
+    return {"retrieved": [{**r, **meta_by_slug.get(r["slug"], {})} for r in res]}
@@ -1,8 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+from importlib.util import find_spec
 import logging
 import os
-from typing import Protocol
+import re
+import threading
+import time
+from typing import Any, Protocol
+
+import httpx
+
+from ..config import settings
+from ..metrics import LLM_TOKENS
+from ..tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +31,36 @@ class Model(Protocol):
         """
         ...
 
+    async def agenerate_answer(
+        self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8
+    ) -> tuple[str, list[str]]:
+        """Async generate_answer: awaits network I/O instead of blocking the event loop."""
+        ...
+
+    def astream_answer(
+        self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8
+    ) -> AsyncIterator[str]:
+        """
+        Yields answer text deltas as the model produces them. Citation ids are the docs'
+        item_ids in the given order ([n] -> docs[n-1]), as with generate_answer.
+        """
+        ...
+
+    async def aprewarm(self, connections: int) -> None:
+        """Open up to `connections` pooled connections ahead of the first request."""
+        ...
+
 
 # --------- Local stub (existing) ---------
 class LocalStub:
     name = "stub-local"
 
-    def generate_answer(self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8) -> tuple[str, list[str]]:
+    def __init__(self, token_delay_s: float = 0.0):
+        self.token_delay_s = token_delay_s  # simulated per-chunk generation time
+
+    def generate_answer(
+        self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8
+    ) -> tuple[str, list[str]]:
         if not docs:
             msg = "I don't know yet. Add a topic or timeframe to help me retrieve the right items."
             return msg, []
@@ -45,8 +81,31 @@ class LocalStub:
         answer = f"Here's what I found on “{query}”:\n" + "\n".join(lines)
         return answer, citation_ids
 
+    async def agenerate_answer(
+        self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8
+    ) -> tuple[str, list[str]]:
+        return self.generate_answer(query, docs, max_tokens, temperature)
+
+    async def astream_answer(
+        self, query: str, docs: list[dict], max_tokens: int = 500, temperature: float = 0.8
+    ) -> AsyncIterator[str]:
+        with span("llm.stub") as s:
+            answer, _ids = self.generate_answer(query, docs, max_tokens, temperature)
+            # word-sized chunks, whitespace kept, so "".join(chunks) == answer
+            chunks = re.findall(r"\s*\S+", answer)
+            s["deltas"] = len(chunks)
+            for chunk in chunks:
+                await asyncio.sleep(self.token_delay_s)
+                yield chunk
+
+    async def aprewarm(self, _connections: int) -> None:
+        return None  # no connections to open
+
 
 # --------- OpenAI provider ---------
+NO_DOCS_ANSWER = "I don't know yet. Try adding a topic filter or a timeframe like since:P7D."
+
+
 class OpenAIChat:
     """
     Lightweight OpenAI chat provider.
@@ -60,28 +119,45 @@ class OpenAIChat:
     - We instruct the model that sources are indexed [1..N] in the order provided.
       We then return citation_ids = [doc.item_id for doc in docs[:N]] so the caller
       can resolve [n] → that id/title/url.
+    - One instance per (model, base_url) is cached by choose_model; its HTTP clients keep a
+      bounded keep-alive pool (LLM_* settings), use HTTP/2 when `h2` is installed, and
+      have explicit connect/read timeouts.
     """
 
-    def __init__(self, model_name: str):
+    def __init__(self, model_name: str, base_url: str | None = None):
         self.model = self._normalize_model(model_name)
         try:
             # Prefer modern SDK usage
-            from openai import OpenAI  # type: ignore
+            from openai import AsyncOpenAI, OpenAI  # type: ignore
         except Exception as e:
             raise RuntimeError(
                 "The 'openai' package is required for OpenAI provider. "
                 "Add `openai>=1.0.0` to requirements and set OPENAI_API_KEY."
             ) from e
-
-        base = os.getenv("OPENAI_BASE_URL")
-        if base:
-            self._client = OpenAI(base_url=base, api_key=os.getenv("OPENAI_API_KEY"))
-        else:
-            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
         if not os.getenv("OPENAI_API_KEY"):
             raise RuntimeError("OPENAI_API_KEY is not set in the environment.")
 
+        base = base_url or os.getenv("OPENAI_BASE_URL") or None
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive,
+            keepalive_expiry=settings.llm_keepalive_expiry_s,
+        )
+        timeout = httpx.Timeout(settings.llm_read_timeout_s, connect=settings.llm_connect_timeout_s)
+        http2 = settings.llm_http2 and find_spec("h2") is not None
+        self._client = OpenAI(
+            base_url=base,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=timeout,
+            http_client=httpx.Client(limits=limits, timeout=timeout, http2=http2),
+        )
+        self._aclient = AsyncOpenAI(
+            base_url=base,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=timeout,
+            http_client=httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2),
+        )
+
     @staticmethod
     def _normalize_model(name: str) -> str:
         # Accept both "openai:MODEL" and raw model names (e.g., "gpt-5")
@@ -89,12 +165,8 @@ class OpenAIChat:
             return name.split(":", 1)[1]
         return name
 
-    def generate_answer(
-        self, query: str, docs: list[dict], max_tokens: int, temperature: float
-    ) -> tuple[str, list[str]]:
-        if not docs:
-            return "I don't know yet. Try adding a topic filter or a timeframe like since:P7D.", []
-
+    @staticmethod
+    def _prompt(query: str, docs: list[dict]) -> tuple[list[dict[str, str]], list[str]]:
         # Build source list in fixed order; instruct model to cite with [n]
         sources_lines = []
         citation_ids: list[str] = []
@@ -124,42 +196,136 @@ class OpenAIChat:
             "- Add [n] markers at the end of sentences that use source n.\n"
             "- If uncertain, say you don't know."
         )
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        # We return the ids in the exact order we enumerated sources so [n] → docs[n-1]
+        return messages, citation_ids
+
+    @staticmethod
+    def _fallback(docs: list[dict], error: Exception) -> str:
+        # Fall back gracefully to a stub-like response on error
+        logger.error("Model failed, falling back to local. Error: %s", error)
+        fallback_lines = []
+        for i, d in enumerate(docs[:3], start=1):
+            snippet = (d.get("snippet") or d.get("excerpt") or "").strip()
+            title = d.get("title", "").strip()
+            tag = f"[{i}]"
+            fallback_lines.append(f"• {snippet or title} {tag}")
+        head = "Here's what I found (OpenAI call failed; using fallback stitching):"
+        return "\n".join([head, *fallback_lines])
 
+    def _count_usage(self, usage: Any) -> None:
+        # token counts as billed, from a response (or the stream's response.completed event)
+        if usage is not None:
+            LLM_TOKENS.labels(self.model, "input").inc(usage.input_tokens)
+            LLM_TOKENS.labels(self.model, "output").inc(usage.output_tokens)
+
+    def generate_answer(
+        self, query: str, docs: list[dict], max_tokens: int, temperature: float
+    ) -> tuple[str, list[str]]:
+        if not docs:
+            return NO_DOCS_ANSWER, []
+        messages, citation_ids = self._prompt(query, docs)
         try:
-            # Prefer chat.completions endpoint for broad compatibility
             resp = self._client.responses.create(
-                model=self.model,
-                input=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user},
-                ],
-                max_output_tokens=max_tokens,
+                model=self.model, input=messages, max_output_tokens=max_tokens
             )
             content = resp.output_text
             logger.debug("Model Response: %s", content)
+            self._count_usage(resp.usage)
         except Exception as e:
-            # Fall back gracefully to a stub-like response on error
-            logger.error("Model failed, falling back to local. Error: %s", e)
-            fallback_lines = []
-            for i, d in enumerate(docs[:3], start=1):
-                snippet = (d.get("snippet") or d.get("excerpt") or "").strip()
-                title = d.get("title", "").strip()
-                tag = f"[{i}]"
-                fallback_lines.append(f"• {snippet or title} {tag}")
-            content = (
-                "Here's what I found (OpenAI call failed; using fallback stitching):\n"
-                + "\n".join(fallback_lines)
-            )
+            content = self._fallback(docs, e)
+        return content, citation_ids
 
-        # We return the ids in the exact order we enumerated sources so [n] → docs[n-1]
+    async def agenerate_answer(
+        self, query: str, docs: list[dict], max_tokens: int, _temperature: float
+    ) -> tuple[str, list[str]]:
+        # temperature is not sent, as in generate_answer: reasoning models (gpt-5) reject it
+        if not docs:
+            return NO_DOCS_ANSWER, []
+        messages, citation_ids = self._prompt(query, docs)
+        try:
+            resp = await self._aclient.responses.create(
+                model=self.model, input=messages, max_output_tokens=max_tokens
+            )
+            content = resp.output_text
+            logger.debug("Model Response: %s", content)
+            self._count_usage(resp.usage)
+        except Exception as e:
+            content = self._fallback(docs, e)
         return content, citation_ids
 
+    async def astream_answer(
+        self, query: str, docs: list[dict], max_tokens: int, _temperature: float
+    ) -> AsyncIterator[str]:
+        # temperature is not sent, as in agenerate_answer
+        if not docs:
+            yield NO_DOCS_ANSWER
+            return
+        messages, _citation_ids = self._prompt(query, docs)
+        sent = 0
+        with span("llm.openai", model=self.model) as s:
+            t0 = time.perf_counter()
+            try:
+                stream = await self._aclient.responses.create(
+                    model=self.model, input=messages, max_output_tokens=max_tokens, stream=True
+                )
+                s["open_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                async for event in stream:
+                    if event.type == "response.output_text.delta" and event.delta:
+                        if not sent:
+                            s["ttft_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+                        sent += 1
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        self._count_usage(event.response.usage)
+            except Exception as e:
+                s["error"] = type(e).__name__
+                if sent:  # the client already has part of the answer; just stop
+                    logger.error("Model stream failed mid-answer: %s", e)
+                else:
+                    yield self._fallback(docs, e)
+            s["deltas"] = sent
+
+    async def aprewarm(self, connections: int) -> None:
+        # cheap authenticated GETs, concurrently, so the pool holds `connections` open sockets
+        async def touch() -> None:
+            try:
+                await self._aclient.models.list()
+            except Exception as e:
+                logger.warning("LLM connection prewarm failed: %s", e)
+
+        await asyncio.gather(*(touch() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        await self._aclient.close()
+        self._client.close()
+
 
 # --------- Registry / factory ---------
 _REGISTRY = {
     "stub-local": LocalStub(),
     # We register a sentinel; instances of OpenAIChat are created dynamically
 }
+# OpenAIChat instances (and their connection pools), one per (model, base_url)
+_OPENAI: dict[tuple[str, str | None], OpenAIChat] = {}
+_OPENAI_LOCK = threading.Lock()
+
+
+def _openai_chat(name: str) -> OpenAIChat:
+    key = (OpenAIChat._normalize_model(name), os.getenv("OPENAI_BASE_URL") or None)
+    with _OPENAI_LOCK:
+        model = _OPENAI.get(key)
+        if model is None:
+            model = _OPENAI[key] = OpenAIChat(name, key[1])
+        return model
+
+
+async def close_clients() -> None:
+    with _OPENAI_LOCK:
+        models = list(_OPENAI.values())
+        _OPENAI.clear()
+    for model in models:
+        await model.aclose()
 
 
 def choose_model(name: str | None) -> Model:
@@ -169,6 +335,6 @@ def choose_model(name: str | None) -> Model:
     lower = name.lower()
     # Treat any "openai:*" or a known OpenAI family (e.g., gpt-5, gpt-4o) as OpenAI
     if lower.startswith("openai:") or lower.startswith("gpt-"):
-        return OpenAIChat(name)
+        return _openai_chat(name)
 
     return _REGISTRY.get(name, _REGISTRY["stub-local"])
@@ -0,0 +1,157 @@
+"""
+Service metrics for GET /metrics (Prometheus text format, per worker process).
+
+Latencies are histograms observed on the request path (one perf_counter delta and a
+bucket increment each). Cache, index, memory and conversation-state figures are read from
+the live objects at scrape time, so they add nothing per request.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from .utils.metrics import Counter, Gauge, Histogram, Registry
+
+REGISTRY = Registry()
+
+NODE_SECONDS = Histogram("agent_node_duration_seconds", "Graph node wall time.", ["node"], REGISTRY)
+RETRIEVAL_SECONDS = Histogram(
+    "retrieval_search_duration_seconds",
+    "hybrid_search wall time, by result-cache outcome.",
+    ["cache"],
+    REGISTRY,
+)
+RETRIEVAL_STAGE_SECONDS = Histogram(
+    "retrieval_stage_duration_seconds",
+    "Hybrid search stages: keyword, embed, merge, filter, diversify.",
+    ["stage"],
+    REGISTRY,
+)
+LLM_SECONDS = Histogram(
+    "llm_request_duration_seconds", "LLM answer call, start to last delta.", ["model"], REGISTRY
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds",
+    "LLM call start to first streamed delta.",
+    ["model"],
+    REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens (kind: input, output) from the provider's reported usage.",
+    ["model", "kind"],
+    REGISTRY,
+)
+LLM_CHUNKS = Counter("llm_output_chunks_total", "Streamed LLM answer deltas.", ["model"], REGISTRY)
+LLM_ERRORS = Counter("llm_errors_total", "LLM calls that raised.", ["model"], REGISTRY)
+CHAT_TTFT_SECONDS = Histogram(
+    "chat_time_to_first_token_seconds",
+    "Chat request start to first SSE token event.",
+    registry=REGISTRY,
+)
+CHAT_SECONDS = Histogram(
+    "chat_stream_duration_seconds", "Chat request start to done event.", registry=REGISTRY
+)
+CHAT_ACTIVE = Gauge("chat_active_streams", "SSE chat streams in flight.", registry=REGISTRY)
+CHAT_REQUESTS = Counter("chat_requests_total", "Chat streams by outcome.", ["outcome"], REGISTRY)
+
+
+def _cache_field(field: str) -> dict[tuple[str, ...], float]:
+    from .retrieval.hybrid import cache_stats
+
+    return {
+        (name,): stats[field]
+        for name, stats in cache_stats().items()
+        if name in ("query_embeddings", "results") and stats
+    }
+
+
+def _engine() -> Any | None:
+    from .retrieval.hybrid import _warmup
+
+    return _warmup.engine
+
+
+def _index_bytes() -> float | None:
+    engine = _engine()
+    if engine is None:
+        return None
+    n = engine.corpus.nbytes + engine.vec_store.nbytes
+    if engine.delta is not None:
+        n += engine.delta.nbytes + engine.delta_store.nbytes
+    return n
+
+
+def _rss_bytes() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _conversations(field: str) -> float:
+    from .graph.graph import checkpointer
+
+    return checkpointer.stats()[field]
+
+
+Counter(
+    "cache_hits_total", "Cache hits.", ["cache"], REGISTRY, collect=lambda: _cache_field("hits")
+)
+Counter(
+    "cache_misses_total",
+    "Cache misses.",
+    ["cache"],
+    REGISTRY,
+    collect=lambda: _cache_field("misses"),
+)
+Gauge(
+    "cache_hit_ratio",
+    "Hits / lookups since start.",
+    ["cache"],
+    REGISTRY,
+    collect=lambda: _cache_field("hit_rate"),
+)
+Gauge(
+    "index_documents",
+    "Live documents in the retrieval index.",
+    registry=REGISTRY,
+    collect=lambda: len(e) if (e := _engine()) is not None else None,
+)
+Gauge(
+    "index_pending_changes",
+    "Ingested changes awaiting a refit.",
+    registry=REGISTRY,
+    collect=lambda: e.pending if (e := _engine()) is not None else None,
+)
+Gauge(
+    "index_bytes",
+    "Keyword index, metadata and vector store bytes.",
+    registry=REGISTRY,
+    collect=_index_bytes,
+)
+Gauge("process_resident_memory_bytes", "Resident set size.", registry=REGISTRY, collect=_rss_bytes)
+Gauge(
+    "conversations",
+    "Conversations held by the checkpointer.",
+    registry=REGISTRY,
+    collect=lambda: _conversations("conversations"),
+)
+Gauge(
+    "conversation_state_bytes",
+    "Checkpointer size.",
+    registry=REGISTRY,
+    collect=lambda: _conversations("bytes"),
+)
+Counter(
+    "conversations_evicted_total",
+    "Conversations evicted by the checkpointer bounds.",
+    registry=REGISTRY,
+    collect=lambda: _conversations("evicted"),
+)
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -1,16 +1,65 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import random
 from typing import Any
 
 import httpx
 
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUS = {429, 502, 503, 504}
+
 
 class CoreApiClient:
-    def __init__(self, base_url: str | None = None):
-        self.base = base_url or settings.core_api_base
-        self._client = httpx.AsyncClient(timeout=10)
+    """
+    Async Core API client used as the retrieval backend when USE_MOCKS=false.
+    - One pooled httpx.AsyncClient (CORE_API_* limits and timeouts).
+    - GETs retry transport errors and 429/502/503/504, at most CORE_API_RETRIES times,
+      with full-jitter exponential backoff.
+    - Identical in-flight searches share one request (single-flight).
+    - items() fetches many items at once: one batch call, or a bounded concurrent fan-out.
+    """
+
+    def __init__(
+        self, base_url: str | None = None, transport: httpx.AsyncBaseTransport | None = None
+    ):
+        self.base = (base_url or settings.core_api_base).rstrip("/")
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.core_api_read_timeout_s, connect=settings.core_api_connect_timeout_s
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.core_api_max_connections,
+                max_keepalive_connections=settings.core_api_max_keepalive,
+            ),
+            transport=transport,
+        )
+        self._inflight: dict[tuple[Any, ...], asyncio.Task[list[dict[str, Any]]]] = {}
+        self._fanout = asyncio.Semaphore(settings.core_api_fanout)
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+
+    async def _get(self, path: str, params: dict[str, Any] | None = None) -> httpx.Response:
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                r = await self._client.get(f"{self.base}{path}", params=params)
+                if r.status_code not in _RETRY_STATUS or attempt >= settings.core_api_retries:
+                    r.raise_for_status()
+                    return r
+            except httpx.TransportError:
+                if attempt >= settings.core_api_retries:
+                    raise
+            attempt += 1
+            self.retries += 1
+            cap = settings.core_api_backoff_s * 2 ** (attempt - 1)
+            await asyncio.sleep(random.uniform(0, min(cap, settings.core_api_backoff_max_s)))
 
     async def search(self, query: str, k: int, filters: dict | None) -> list[dict[str, Any]]:
         # Contract: GET /search?q=...&k=...&topic=...&since=...
@@ -20,14 +69,63 @@ class CoreApiClient:
                 params["topic"] = ",".join(filters["topic"])
             if filters.get("since"):
                 params["since"] = filters["since"]
-        r = await self._client.get(f"{self.base}/search", params=params)
-        r.raise_for_status()
+        key = tuple(sorted(params.items()))
+        task = self._inflight.get(key)
+        if task is None:
+            # a task, not the caller's coroutine: one caller cancelling must not fail the rest
+            task = asyncio.ensure_future(self._search(params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return list(await asyncio.shield(task))
+
+    async def _search(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        r = await self._get("/search", params)
         return r.json().get("results", [])
 
     async def item(self, slug: str) -> dict[str, Any]:
-        r = await self._client.get(f"{self.base}/items/{slug}")
-        r.raise_for_status()
+        r = await self._get(f"/items/{slug}")
         return r.json()
 
+    async def items(self, slugs: list[str]) -> list[dict[str, Any]]:
+        """Items for `slugs` in order; unknown slugs (404) are skipped."""
+        if not slugs:
+            return []
+        if settings.core_api_batch_items:
+            # Contract: GET /items?slugs=a,b,c -> {"items": [...]}
+            r = await self._get("/items", {"slugs": ",".join(slugs)})
+            by_slug = {it.get("slug"): it for it in r.json().get("items", [])}
+            return [by_slug[s] for s in slugs if s in by_slug]
+
+        async def one(slug: str) -> dict[str, Any] | None:
+            async with self._fanout:
+                try:
+                    return await self.item(slug)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 404:
+                        return None
+                    raise
+
+        found = await asyncio.gather(*(one(s) for s in slugs))
+        return [it for it in found if it is not None]
+
     async def aclose(self):
         await self._client.aclose()
+
+
+_client: CoreApiClient | None = None
+
+
+def get_core_client() -> CoreApiClient:
+    global _client
+    if _client is None:
+        _client = CoreApiClient()
+    return _client
+
+
+async def close_core_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
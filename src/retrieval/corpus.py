@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any
+
+import numpy as np
+import tldextract
+
+from ..config import settings
+from ..utils.sparse import CsrMatrix
+from ..utils.tfidf import HashingTfidfVectorizer, SimpleTfidfVectorizer
+from .filters import FilterIndex
+from .store_keyword import InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+# embedding_model recorded when TF-IDF rows stand in for sentence embeddings
+EMBED_FALLBACK = "tfidf-fallback"
+
+
+def doc_text(item: dict[str, Any], snips: dict[str, str]) -> str:
+    return " ".join([item["title"], item.get("excerpt", ""), snips.get(item["id"], "")])
+
+
+def published_ts(published_at: str) -> int:
+    return int(time.mktime(time.strptime(published_at, "%Y-%m-%d")))
+
+
+def item_domain(url: str) -> str:
+    return tldextract.extract(url).registered_domain or "unknown.test"
+
+
+@dataclass
+class CorpusIndex:
+    """
+    Everything hybrid_search / resolve_items read, as columnar arrays keyed by row.
+    Built in-process from items/snippets or loaded (memory-mapped) by index_io.load_index.
+    """
+
+    ids: list[str]
+    items: list[dict[str, Any]]
+    snippets: dict[str, str]
+    timestamps: np.ndarray  # int64 epoch seconds
+    domain_names: list[str]
+    domain_codes: np.ndarray  # int32 index into domain_names
+    topic_vocab: dict[str, int]  # lowercased topic -> column in `topics`
+    topics: CsrMatrix  # row -> topic codes
+    tfidf: Any  # Simple/HashingTfidfVectorizer or a fitted sklearn TfidfVectorizer
+    X: CsrMatrix  # TF-IDF keyword matrix
+    vecs: np.ndarray  # L2-normalized embeddings (float32)
+    embedding_model: str
+    kw_index: InvertedIndex | None = None
+    row_of: dict[str, int] = field(init=False, repr=False)
+    filters: FilterIndex = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.filters = FilterIndex(self.timestamps, self.topics)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric arrays (mmap'd pages count whether resident or not)."""
+        n = self.timestamps.nbytes + self.domain_codes.nbytes + self.vecs.nbytes
+        n += self.topics.nbytes + self.X.nbytes + self.filters.nbytes
+        return n + (self.kw_index.nbytes if self.kw_index is not None else 0)
+
+    def tfidf_encode(self, texts: list[str]) -> CsrMatrix:
+        if isinstance(self.tfidf, (SimpleTfidfVectorizer, HashingTfidfVectorizer)):
+            return self.tfidf.transform(texts)
+        return CsrMatrix.from_scipy(self.tfidf.transform(texts))
+
+
+def load_embedder(name: str) -> Any | None:
+    """SentenceTransformer for `name`, or None when sentence-transformers is unavailable."""
+    if name == EMBED_FALLBACK:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer  # type: ignore
+
+        return SentenceTransformer(name)
+    except Exception as e:
+        logger.info("sentence-transformers unavailable (%s); using TF-IDF pseudo-embeddings", e)
+        return None
+
+
+def fit_tfidf(docs: list[str], hash_features: int = 0) -> tuple[Any, CsrMatrix]:
+    """
+    Keyword TF-IDF (no sklearn, with optional sklearn fast-path); both stay sparse.
+    `hash_features` > 0 uses a HashingTfidfVectorizer with that many columns instead.
+    """
+    if hash_features:
+        tfidf = HashingTfidfVectorizer(hash_features)
+        return tfidf, tfidf.fit_transform(docs)
+    try:
+        # Fast path if scikit-learn is available (optional; not required)
+        from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
+
+        tfidf = TfidfVectorizer(max_features=20000)
+        return tfidf, CsrMatrix.from_scipy(tfidf.fit_transform(docs))
+    except Exception:
+        # Pure-Python fallback (no scipy/sklearn)
+        tfidf = SimpleTfidfVectorizer(max_features=20000)
+        return tfidf, tfidf.fit_transform(docs)
+
+
+def embed_docs(embedder: Any, docs: list[str], batch_size: int = 64) -> np.ndarray:
+    """Sentence embeddings for `docs`, encoded `batch_size` at a time (L2-normalized float32)."""
+    vecs = embedder.encode(docs, batch_size=batch_size, normalize_embeddings=True)
+    return np.asarray(vecs, dtype=np.float32).reshape(len(docs), -1)
+
+
+def build_corpus(
+    items: list[dict[str, Any]],
+    snips: dict[str, str],
+    embedder: Any | None,
+    embedding_model: str,
+    bm25: tuple[float, float] | None = None,
+    progress: Callable[[str], None] | None = None,
+    vecs: np.ndarray | None = None,
+    hash_features: int = 0,
+) -> CorpusIndex:
+    """
+    Build the full index in memory. `bm25=(k1, b)` also builds the BM25 postings;
+    `progress(stage)` is called as each stage starts. `vecs` (aligned with `items`) are
+    reused instead of encoding the documents again. `hash_features` > 0 hashes keyword
+    terms (TF-IDF and BM25) into that many columns; it needs embeddings (an embedder or
+    `vecs`), since hashed TF-IDF rows are too wide to stand in for them.
+    """
+    report = progress or (lambda _stage: None)
+    report("corpus")
+    ids = [it["id"] for it in items]
+    docs = [doc_text(it, snips) for it in items]
+    timestamps = np.asarray([published_ts(it["published_at"]) for it in items], dtype=np.int64)
+
+    names, codes = np.unique(
+        np.asarray([item_domain(it["url"]) for it in items], dtype=object), return_inverse=True
+    )
+    topic_vocab: dict[str, int] = {}
+    topic_rows: list[tuple[list[int], list[float]]] = []
+    for it in items:
+        tcodes = {topic_vocab.setdefault(t.lower(), len(topic_vocab)) for t in it.get("topics", [])}
+        topic_rows.append((list(tcodes), [1.0] * len(tcodes)))
+
+    report("tfidf")
+    tfidf, X = fit_tfidf(docs, hash_features)
+
+    report("embeddings")
+    if vecs is not None:
+        assert vecs.shape[0] == len(items)
+    elif embedder is not None:
+        vecs = embed_docs(embedder, docs, settings.embed_batch_size)
+    elif hash_features:
+        raise ValueError("hashed keyword features need an embedder or precomputed vecs")
+    else:
+        # Fallback: use TF-IDF vectors as pseudo-embeddings (dense; dev/test path only)
+        vecs = X.to_dense()
+        vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-8)
+        embedding_model = EMBED_FALLBACK
+
+    kw_index = None
+    if bm25 is not None:
+        report("bm25")
+        kw_index = InvertedIndex(k1=bm25[0], b=bm25[1], n_features=hash_features).fit(ids, docs)
+
+    return CorpusIndex(
+        ids=ids,
+        items=items,
+        snippets=snips,
+        timestamps=timestamps,
+        domain_names=[str(n) for n in names],
+        domain_codes=codes.astype(np.int32),
+        topic_vocab=topic_vocab,
+        topics=CsrMatrix.from_rows(topic_rows, len(topic_vocab)),
+        tfidf=tfidf,
+        X=X,
+        vecs=vecs,
+        embedding_model=embedding_model,
+        kw_index=kw_index,
+    )
+
+
+def extend_corpus(
+    base: CorpusIndex, items: list[dict[str, Any]], snips: dict[str, str], vecs: np.ndarray
+) -> CorpusIndex:
+    """
+    Index `items` against `base` without refitting it: TF-IDF rows use base's vocabulary and
+    IDF, BM25 uses base's statistics, and domain/topic codes extend base's tables (so codes
+    are valid across both). This is the delta segment of incremental ingestion; terms unseen
+    by base only count after the next full rebuild.
+    """
+    ids = [it["id"] for it in items]
+    docs = [doc_text(it, snips) for it in items]
+    timestamps = np.asarray([published_ts(it["published_at"]) for it in items], dtype=np.int64)
+
+    domain_names = list(base.domain_names)
+    code_of = {n: c for c, n in enumerate(domain_names)}
+    codes = np.empty(len(items), dtype=np.int32)
+    for row, it in enumerate(items):
+        name = item_domain(it["url"])
+        if name not in code_of:
+            code_of[name] = len(domain_names)
+            domain_names.append(name)
+        codes[row] = code_of[name]
+
+    topic_vocab = dict(base.topic_vocab)
+    topic_rows: list[tuple[list[int], list[float]]] = []
+    for it in items:
+        tcodes = {topic_vocab.setdefault(t.lower(), len(topic_vocab)) for t in it.get("topics", [])}
+        topic_rows.append((list(tcodes), [1.0] * len(tcodes)))
+
+    kw_index = None
+    if base.kw_index is not None:
+        ref = base.kw_index
+        kw_index = InvertedIndex(ref.k1, ref.b, ref.n_features).fit(ids, docs, reference=ref)
+
+    return CorpusIndex(
+        ids=ids,
+        items=items,
+        snippets=snips,
+        timestamps=timestamps,
+        domain_names=domain_names,
+        domain_codes=codes,
+        topic_vocab=topic_vocab,
+        topics=CsrMatrix.from_rows(topic_rows, len(topic_vocab)),
+        tfidf=base.tfidf,
+        X=base.tfidf_encode(docs),
+        vecs=np.asarray(vecs, dtype=np.float32),
+        embedding_model=base.embedding_model,
+        kw_index=kw_index,
+    )
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from ..utils.sparse import CsrMatrix
+
+
+class FilterIndex:
+    """
+    Row sets for the `topics` and `since` filters of one corpus segment, built at load.
+    - Topics: the transpose of the row -> topic matrix (topic code -> sorted rows).
+    - Dates: rows ordered by timestamp, so a cutoff is one binary search.
+    - `rows` walks only the matching postings/suffix; `mask` is one vectorized pass over
+      the segment, cheaper once most rows match.
+    """
+
+    def __init__(self, timestamps: np.ndarray, topics: CsrMatrix):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.topics = topics
+        self.by_time = np.argsort(self.timestamps, kind="stable")
+        self.sorted_ts = self.timestamps[self.by_time]
+        order = np.argsort(topics.indices, kind="stable")
+        self.topic_rows = topics.row_ids[order].astype(np.int64)
+        counts = np.bincount(topics.indices, minlength=topics.shape[1])
+        self.topic_ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def __len__(self) -> int:
+        return self.timestamps.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.by_time.nbytes
+            + self.sorted_ts.nbytes
+            + self.topic_rows.nbytes
+            + self.topic_ptr.nbytes
+        )
+
+    def _postings(self, codes: np.ndarray) -> list[np.ndarray]:
+        n = self.topic_ptr.size - 1
+        return [self.topic_rows[self.topic_ptr[c] : self.topic_ptr[c + 1]] for c in codes if c < n]
+
+    def estimate(self, codes: np.ndarray | None, cutoff: int | None) -> int:
+        """Upper bound on the rows passing both filters (None skips a filter)."""
+        est = len(self)
+        if codes is not None:
+            est = min(est, sum(p.size for p in self._postings(codes)))
+        if cutoff is not None:
+            est = min(est, len(self) - int(np.searchsorted(self.sorted_ts, cutoff, "left")))
+        return est
+
+    def rows(self, codes: np.ndarray | None, cutoff: int | None) -> np.ndarray:
+        """Sorted rows passing both filters, driven by the smaller of the two row sets."""
+        parts = self._postings(codes) if codes is not None else []
+        start = int(np.searchsorted(self.sorted_ts, cutoff, "left")) if cutoff is not None else 0
+        n_topic = sum(p.size for p in parts)
+        if codes is not None and (cutoff is None or n_topic <= len(self) - start):
+            if not parts:
+                return np.zeros(0, dtype=np.int64)
+            out = parts[0]  # each posting list is sorted and duplicate-free
+            if len(parts) > 1:
+                out = np.unique(np.concatenate(parts))
+            return out[self.timestamps[out] >= cutoff] if cutoff is not None else out
+        out = np.sort(self.by_time[start:])
+        if codes is not None:
+            out = out[self.topics.rows_any(out, codes)]
+        return out
+
+    def mask(self, codes: np.ndarray | None, cutoff: int | None) -> np.ndarray:
+        """Boolean mask over the segment's rows passing both filters."""
+        keep = self.timestamps >= cutoff if cutoff is not None else np.ones(len(self), dtype=bool)
+        if codes is not None:
+            hit = np.zeros(len(self), dtype=bool)
+            for p in self._postings(codes):
+                hit[p] = True
+            keep &= hit
+        return keep
+
+
+@dataclass(frozen=True)
+class RowFilter:
+    """
+    Rows (in an engine's merged row space) allowed by one query's filters: sorted `rows`
+    when few pass (scored by brute force), else a `mask` applied to index search results.
+    """
+
+    count: int
+    rows: np.ndarray | None = None
+    mask: np.ndarray | None = None
+
+    def keep(self, rows: np.ndarray) -> np.ndarray:
+        """Which of `rows` pass (bool array)."""
+        if self.mask is not None:
+            return self.mask[rows]
+        allowed = self.rows
+        if allowed is None or allowed.size == 0:
+            return np.zeros(rows.shape[0], dtype=bool)
+        pos = np.minimum(np.searchsorted(allowed, rows), allowed.size - 1)
+        return allowed[pos] == rows
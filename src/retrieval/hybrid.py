@@ -1,213 +1,1109 @@
 from __future__ import annotations
 
+import asyncio
+from collections import ChainMap
+from collections.abc import Callable
+import contextlib
 import json
+import logging
 from pathlib import Path
+import threading
 import time
 from typing import Any
 
 import numpy as np
-import tldextract
 
 from ..config import settings
+from ..metrics import RETRIEVAL_SECONDS, RETRIEVAL_STAGE_SECONDS
+from ..tracing import record, span
+from ..utils.cache import LRUCache
+from ..utils.sparse import CsrMatrix
+from ..utils.text import normalize_query
+from ..utils.tfidf import HashingTfidfVectorizer
 from ..utils.time import parse_since_to_timestamp
+from .corpus import (
+    EMBED_FALLBACK,
+    CorpusIndex,
+    build_corpus,
+    doc_text,
+    embed_docs,
+    extend_corpus,
+    load_embedder,
+)
+from .filters import RowFilter
+from .index_io import MANIFEST, IndexFormatError, load_index
+from .query_encoder import BatchingQueryEncoder
+from .shards import Segment, ShardPool, local_filter, merge_top, score_segment
+from .store_ann import HNSWIndex, IVFIndex
+from .store_keyword import InvertedIndex
+from .store_quant import QuantizedVectorStore
+from .store_vector import InMemoryVectorStore, _normalize, _top_k
+
+logger = logging.getLogger(__name__)
 
 _FIX = Path(__file__).resolve().parents[2] / "fixtures"
-_items = json.loads((_FIX / "items.json").read_text(encoding="utf-8"))
-_snips = json.loads((_FIX / "snippets.json").read_text(encoding="utf-8"))
 
-# ----------------------------
-# Build corpus
-# ----------------------------
-_docs: list[str] = []
-ids: list[str] = []
-timestamps: list[int] = []
-domains: list[str] = []
-
-for it in _items:
-    ids.append(it["id"])
-    txt = " ".join([it["title"], it.get("excerpt", ""), _snips.get(it["id"], "")])
-    _docs.append(txt)
-    ts = int(time.mktime(time.strptime(it["published_at"], "%Y-%m-%d")))
-    timestamps.append(ts)
-    ext = tldextract.extract(it["url"]).registered_domain
-    domains.append(ext or "unknown.test")
+Progress = Callable[[str], None]
+
 
 # ----------------------------
-# Keyword TF-IDF (no sklearn, with optional sklearn fast-path)
+# Build or load corpus
 # ----------------------------
-try:
-    # Fast path if scikit-learn is available (optional; not required)
-    from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
+def _load_or_build_corpus(progress: Progress) -> tuple[CorpusIndex, Any | None]:
+    """Memory-map the persisted index in INDEX_DIR if there is one, else build from fixtures."""
+    bm25 = (settings.bm25_k1, settings.bm25_b) if settings.keyword_engine == "bm25" else None
+    index_dir = Path(settings.index_dir)
+    if (index_dir / MANIFEST).exists():
+        try:
+            progress("load_index")
+            corpus = load_index(index_dir, verify=settings.index_verify)
+            progress("embedding_model")
+            embedder = load_embedder(corpus.embedding_model)
+            if embedder is None and corpus.embedding_model != EMBED_FALLBACK:
+                raise IndexFormatError(f"embedding model {corpus.embedding_model} unavailable")
+            if bm25 is not None and corpus.kw_index is None:
+                progress("bm25")
+                docs = [doc_text(it, corpus.snippets) for it in corpus.items]
+                n_features = getattr(corpus.tfidf, "n_features", 0)  # hashed TF-IDF: hash BM25
+                kw = InvertedIndex(bm25[0], bm25[1], n_features)
+                corpus.kw_index = kw.fit(corpus.ids, docs)
+            logger.info("loaded index from %s (%d docs)", index_dir, len(corpus))
+            return corpus, embedder
+        except IndexFormatError as e:
+            logger.warning("ignoring index at %s (%s); building from fixtures", index_dir, e)
 
-    _tfidf = TfidfVectorizer(max_features=20000)
-    _X_sparse = _tfidf.fit_transform(_docs)
-    _X = _X_sparse.toarray().astype(np.float32)
+    progress("fixtures")
+    items = json.loads((_FIX / "items.json").read_text(encoding="utf-8"))
+    snips = json.loads((_FIX / "snippets.json").read_text(encoding="utf-8"))
+    progress("embedding_model")
+    embedder = load_embedder(settings.embedding_model)
+    corpus = build_corpus(items, snips, embedder, settings.embedding_model, bm25, progress)
+    return corpus, embedder
+
+
+def _quantize(vectors: np.ndarray) -> bool:
+    """
+    Whether to search quantized codes. The float32 vectors are kept for rescoring, so this
+    only saves memory when they are memory-mapped from INDEX_DIR. Ingest keeps the base
+    store, but a refit rebuilds the embeddings in memory, so quantization then stays off
+    until the process restarts from a saved index.
+    """
+    if settings.vector_index != "exact" or settings.vector_quantization == "none":
+        return False
+    if not isinstance(vectors, np.memmap):
+        logger.warning(
+            "VECTOR_QUANTIZATION=%s off until restarted from INDEX_DIR: the embeddings are"
+            " in memory (no index loaded, or rebuilt by a refit), so codes would only add to them",
+            settings.vector_quantization,
+        )
+        return False
+    return True
 
-    def _tfidf_encode(texts: list[str]) -> np.ndarray:
-        return _tfidf.transform(texts).toarray().astype(np.float32)
 
-except Exception:
-    # Pure-Python fallback (no scipy/sklearn)
-    from ..utils.tfidf import SimpleTfidfVectorizer
+# Vector store: exact brute force by default (optionally over quantized codes), IVF/HNSW
+# approximate via VECTOR_INDEX
+def _make_vector_store(
+    doc_ids: list[str], vectors: np.ndarray
+) -> InMemoryVectorStore | QuantizedVectorStore | IVFIndex | HNSWIndex:
+    store: IVFIndex | HNSWIndex
+    if settings.vector_index == "ivf":
+        store = IVFIndex(vectors.shape[1], nlist=settings.ivf_nlist, nprobe=settings.ivf_nprobe)
+    elif settings.vector_index == "hnsw":
+        store = HNSWIndex(
+            vectors.shape[1],
+            M=settings.hnsw_m,
+            ef_construction=settings.hnsw_ef_construction,
+            ef_search=settings.hnsw_ef_search,
+        )
+    elif _quantize(vectors):
+        return QuantizedVectorStore.wrap(
+            doc_ids,
+            vectors,
+            mode=settings.vector_quantization,
+            scale=settings.vector_quant_scale,
+            rescore=settings.vector_rescore,
+        )
+    else:
+        return InMemoryVectorStore.wrap(doc_ids, vectors)  # shares the (mmap'd) buffer
+    store.add(doc_ids, vectors)
+    return store
 
-    _tfidf = SimpleTfidfVectorizer(max_features=20000)
-    _X = _tfidf.fit_transform(_docs).astype(np.float32)
 
-    def _tfidf_encode(texts: list[str]) -> np.ndarray:
-        return _tfidf.transform(texts).astype(np.float32)
+def _make_shards(corpus: CorpusIndex) -> ShardPool | None:
+    """Worker processes for the base segment when RETRIEVAL_SHARDS > 1."""
+    if settings.retrieval_shards <= 1:
+        return None
+    bm25 = settings.keyword_engine == "bm25" and corpus.kw_index is not None
+    # quantized embeddings are searched in process, where only the codes are scanned
+    exact = settings.vector_index == "exact" and not _quantize(corpus.vecs)
+    return ShardPool(corpus, settings.retrieval_shards, bm25, exact)
 
 
 # ----------------------------
-# Embeddings (sentence-transformers optional)
+# Scoring helpers
 # ----------------------------
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-
-    _emb_model = SentenceTransformer(settings.embedding_model)
-    _emb_dim = _emb_model.get_sentence_embedding_dimension()
-    vecs = _emb_model.encode(_docs, normalize_embeddings=True)
-    vecs = np.asarray(vecs, dtype=np.float32)
-except Exception:
-    # Fallback: use TF-IDF vectors as pseudo-embeddings
-    vecs = _X.copy()
-    norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-8
-    vecs = vecs / norms
-    _emb_dim = vecs.shape[1]
-
-
-# In-memory "vector store"
-class InMemoryVectorStore:
-    def __init__(self, dim: int):
-        self.dim = dim
-        self.ids: list[str] = []
-        self.vecs: np.ndarray | None = None
-
-    def add(self, ids: list[str], vectors: np.ndarray) -> None:
-        assert vectors.shape[1] == self.dim
-        self.ids.extend(ids)
-        if self.vecs is None:
-            self.vecs = vectors.astype(np.float32)
+def _recency_boost(ts: np.ndarray, now_ts: int) -> np.ndarray:
+    half_life = settings.recency_halflife_days * 86400.0
+    age = np.maximum(0.0, now_ts - ts)
+    return np.power(2.0, -age / half_life)
+
+
+def _diversify(rows: np.ndarray, domain_codes: np.ndarray, max_per_domain: int) -> np.ndarray:
+    """Keep ranked `rows` in order, dropping each beyond the first max_per_domain per domain."""
+    codes = domain_codes[rows]
+    by_dom = np.argsort(codes, kind="stable")
+    sorted_codes = codes[by_dom]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, sorted_codes.size]))
+    seen_before = np.empty_like(by_dom)
+    seen_before[by_dom] = np.arange(sorted_codes.size) - group_start
+    return rows[seen_before < max_per_domain]
+
+
+def _mmr(
+    rel: np.ndarray, sims: np.ndarray, k: int, lam: float, codes: np.ndarray, max_per_domain: int
+) -> np.ndarray:
+    """
+    Greedy maximal marginal relevance over ranked candidates: positions of up to k picks.
+    - rel: relevance per candidate (ranked order breaks ties); sims: candidate x candidate
+      cosine matrix, computed once by the caller.
+    - Each pick is one argmax over lam * rel - (1 - lam) * (max similarity to the picks so
+      far), then one row of `sims` folded into that running max.
+    - A domain that reaches max_per_domain picks (> 0) is masked out.
+    """
+    n = rel.size
+    penalty = np.zeros(n, dtype=np.float64)
+    avail = np.ones(n, dtype=bool)
+    per_domain: dict[int, int] = {}
+    picks: list[int] = []
+    for step in range(min(k, n)):
+        gain = np.where(avail, lam * rel - (1.0 - lam) * penalty, -np.inf)
+        i = int(np.argmax(gain))
+        if not avail[i]:
+            break
+        picks.append(i)
+        avail[i] = False
+        penalty = sims[i].astype(np.float64) if step == 0 else np.maximum(penalty, sims[i])
+        if max_per_domain > 0:
+            code = int(codes[i])
+            per_domain[code] = per_domain.get(code, 0) + 1
+            if per_domain[code] >= max_per_domain:
+                avail &= codes != code
+    return np.asarray(picks, dtype=np.int64)
+
+
+# metric children bound once; observing is a bucket increment
+_STAGE = {
+    s: RETRIEVAL_STAGE_SECONDS.labels(s)
+    for s in ("prefilter", "keyword", "embed", "shards", "merge", "filter", "diversify")
+}
+_SEARCH_HIT = RETRIEVAL_SECONDS.labels("hit")
+_SEARCH_MISS = RETRIEVAL_SECONDS.labels("miss")
+
+
+class HybridEngine:
+    """
+    Retrieval state for one corpus (keyword index, vector store, query encoder, columnar
+    metadata) plus hybrid scoring over it. Built once by `warmup` and shared by requests.
+    - Immutable once built: ingestion (`apply`) returns a new engine, which `ingest` swaps
+      in, so a request only ever sees one consistent generation.
+    - Rows [0, len(corpus)) are the base segment; ingested docs form a small delta segment
+      after them, indexed with the base IDF. Deleted/replaced base rows are tombstoned.
+    - `refit` rebuilds everything from the live docs (fresh IDF, no delta, no tombstones).
+    - Query embeddings are LRU-cached, and concurrent misses are micro-batched into one
+      embedder call; generations with the same encoder share both.
+    """
+
+    def __init__(
+        self,
+        corpus: CorpusIndex,
+        embedder: Any | None,
+        vec_store: Any | None = None,
+        delta: CorpusIndex | None = None,
+        deleted: frozenset[str] = frozenset(),
+        version: int = 0,
+        query_cache: LRUCache | None = None,
+        query_encoder: BatchingQueryEncoder | None = None,
+        shards: ShardPool | None = None,
+    ):
+        self.corpus = corpus
+        self.shards = shards  # scores the base segment when set
+        self.embedder = embedder
+        self.kw_index = corpus.kw_index if settings.keyword_engine == "bm25" else None
+        self.vec_store = vec_store or _make_vector_store(corpus.ids, corpus.vecs)
+        self.delta = delta
+        self.deleted = deleted  # base ids tombstoned since the last refit
+        self.version = version
+        self.query_cache = query_cache or LRUCache(settings.query_cache_size)
+        if query_encoder is None and embedder is not None:
+            query_encoder = BatchingQueryEncoder(
+                embedder, settings.encode_max_batch, settings.encode_max_wait_ms
+            )
+        self.query_encoder = query_encoder
+        self.delta_store = InMemoryVectorStore.wrap(delta.ids, delta.vecs) if delta else None
+
+        # merged row space: base rows, then delta rows
+        if delta is None:
+            self.ids, self.items, self.snippets = corpus.ids, corpus.items, corpus.snippets
+            self.timestamps, self.domain_codes = corpus.timestamps, corpus.domain_codes
+            self.topic_vocab, self.topics = corpus.topic_vocab, corpus.topics
+        else:
+            self.ids = corpus.ids + delta.ids
+            self.items = corpus.items + delta.items
+            self.snippets = ChainMap(delta.snippets, corpus.snippets)
+            self.timestamps = np.concatenate([corpus.timestamps, delta.timestamps])
+            self.domain_codes = np.concatenate([corpus.domain_codes, delta.domain_codes])
+            self.topic_vocab = delta.topic_vocab
+            self.topics = CsrMatrix.vstack([corpus.topics, delta.topics], len(delta.topic_vocab))
+        self.row_of = corpus.row_of
+        self._alive: np.ndarray | None = None
+        if deleted or delta is not None:
+            self.row_of = dict(corpus.row_of)
+            for doc_id in deleted:
+                del self.row_of[doc_id]
+            if delta is not None:
+                n = len(corpus)
+                self.row_of.update((doc_id, n + r) for doc_id, r in delta.row_of.items())
+            if deleted:
+                self._alive = np.ones(len(self.ids), dtype=bool)
+                self._alive[[corpus.row_of[i] for i in deleted]] = False
+
+    @classmethod
+    def load(cls, progress: Progress | None = None) -> HybridEngine:
+        report = progress or (lambda _stage: None)
+        corpus, embedder = _load_or_build_corpus(report)
+        report("vector_store")
+        vec_store = _make_vector_store(corpus.ids, corpus.vecs)
+        report("shards")
+        return cls(corpus, embedder, vec_store, shards=_make_shards(corpus))
+
+    def __len__(self) -> int:
+        """Live documents."""
+        return len(self.row_of)
+
+    @property
+    def pending(self) -> int:
+        """Changes since the last refit (delta docs + tombstones)."""
+        return len(self.deleted) + (len(self.delta) if self.delta else 0)
+
+    # ----------------------------
+    # Scoring components
+    # ----------------------------
+    def row_filter(
+        self, topics: list[str] | None, since: str | None, now_ts: int | None = None
+    ) -> RowFilter | None:
+        """
+        Live rows passing the `topics`/`since` filters (None when neither is set), from the
+        segments' filter indexes. Sorted rows when at most FILTER_BRUTE_FORCE_ROWS pass,
+        else a mask; the estimate picks the cheaper way to find out.
+        """
+        if not topics and not since:
+            return None
+        codes = None
+        if topics:
+            vocab = self.topic_vocab
+            codes = np.fromiter(
+                {vocab[t.lower()] for t in topics if t.lower() in vocab}, dtype=np.int64
+            )
+        cutoff = parse_since_to_timestamp(since, now_ts or int(time.time())) if since else None
+        segments = [self.corpus.filters] + ([self.delta.filters] if self.delta else [])
+        limit = settings.filter_brute_force_rows
+        if sum(f.estimate(codes, cutoff) for f in segments) <= limit:
+            rows = self.corpus.filters.rows(codes, cutoff)
+            if self.delta is not None:
+                d_rows = self.delta.filters.rows(codes, cutoff) + len(self.corpus)
+                rows = np.concatenate([rows, d_rows])
+            if self._alive is not None:
+                rows = rows[self._alive[rows]]
+            return RowFilter(int(rows.size), rows=rows)
+        mask = np.concatenate([f.mask(codes, cutoff) for f in segments])
+        if self._alive is not None:
+            mask &= self._alive
+        count = int(np.count_nonzero(mask))
+        if count <= limit:
+            return RowFilter(count, rows=np.flatnonzero(mask))
+        return RowFilter(count, mask=mask)
+
+    def keyword_rows(
+        self, q: str, k: int, allowed: RowFilter | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        n_base = len(self.corpus)
+        if self.kw_index is not None:
+            rows, sims = self.kw_index.score_rows(q)
+            if self._alive is not None:
+                keep = self._alive[rows]
+                rows, sims = rows[keep], sims[keep]
+            if self.delta is not None and self.delta.kw_index is not None:
+                d_rows, d_sims = self.delta.kw_index.score_rows(q)
+                rows = np.concatenate([rows, d_rows + n_base])
+                sims = np.concatenate([sims, d_sims])
+            if allowed is not None:
+                keep = allowed.keep(rows)
+                rows, sims = rows[keep], sims[keep]
+            top = _top_k(sims, k)
+            rows, sims = rows[top], sims[top]
+            # BM25 is unbounded; scale by the best hit so the fusion weights stay comparable
+            if sims.size and sims[0] > 0:
+                sims = sims / sims[0]
+            return rows, sims
+        q_idx, q_val = self.corpus.tfidf_encode([q]).row(0)
+        sims = self.corpus.X.dot_sparse(q_idx, q_val)
+        if self.delta is not None:
+            sims = np.concatenate([sims, self.delta.X.dot_sparse(q_idx, q_val)])
+        return self._tfidf_top(sims, k, allowed)
+
+    def keyword_rows_batch(
+        self, queries: list[str], ks: list[int], allowed: list[RowFilter | None]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        keyword_rows for each query. TF-IDF scores the batch with one sparse product per
+        segment (CsrMatrix.dot_sparse_batch), one pass over X instead of one per query.
+        BM25 queries are scored one by one: an inverted-index lookup already only touches
+        the query's own postings, which a batched product cannot share.
+        """
+        if self.kw_index is not None:
+            return [
+                self.keyword_rows(q, k, a) for q, k, a in zip(queries, ks, allowed, strict=True)
+            ]
+        n_base = len(self.corpus)
+        Q = self.corpus.tfidf_encode(queries)
+        base = self.corpus.X.dot_sparse_batch(Q)
+        delta: list[Any] = [None] * len(queries)
+        if self.delta is not None:
+            delta = self.delta.X.dot_sparse_batch(Q)
+        out = []
+        for (rows, sims), d, k, a in zip(base, delta, ks, allowed, strict=True):
+            dense = np.zeros(len(self.ids), dtype=np.float32)
+            dense[rows] = sims
+            if d is not None:
+                dense[n_base + d[0]] = d[1]
+            out.append(self._tfidf_top(dense, k, a))
+        return out
+
+    def _tfidf_top(
+        self, sims: np.ndarray, k: int, allowed: RowFilter | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k live, allowed rows of the merged-space TF-IDF scores `sims`."""
+        if allowed is not None and allowed.rows is not None:
+            top = _top_k(sims[allowed.rows], k)
+            return allowed.rows[top], sims[allowed.rows[top]]
+        alive = self._alive if allowed is None else allowed.mask
+        if alive is None:
+            top = _top_k(sims, k)
+            return top, sims[top]
+        top = _top_k(np.where(alive, sims, -np.inf), k)
+        top = top[alive[top]]
+        return top, sims[top]
+
+    def keyword_scores(self, q: str, k: int) -> list[tuple[str, float]]:
+        rows, sims = self.keyword_rows(q, k)
+        return [(self.ids[r], float(s)) for r, s in zip(rows, sims, strict=True)]
+
+    def encode_query(self, q: str) -> np.ndarray:
+        qv = self.query_cache.get(q)
+        if qv is not None:
+            return qv
+        if self.query_encoder is not None:
+            qv = self.query_encoder.encode(q)
         else:
-            self.vecs = np.vstack([self.vecs, vectors.astype(np.float32)])
-
-    def search(self, q: np.ndarray, k: int) -> list[tuple[str, float]]:
-        if self.vecs is None or len(self.ids) == 0:
-            return []
-        q = q.astype(np.float32)
-        sims = (self.vecs @ q) / (
-            np.linalg.norm(self.vecs, axis=1) * (np.linalg.norm(q) + 1e-8) + 1e-8
+            qv = self._tfidf_query_vecs([q])[0]
+        qv.flags.writeable = False  # shared by every hit
+        self.query_cache.put(q, qv)
+        return qv
+
+    def encode_queries(self, queries: list[str]) -> list[np.ndarray]:
+        """encode_query for each query; the cache misses are encoded in one call."""
+        out = [self.query_cache.get(q) for q in queries]
+        miss = list(dict.fromkeys(q for q, qv in zip(queries, out, strict=True) if qv is None))
+        if not miss:
+            return out  # type: ignore[return-value]
+        if self.query_encoder is not None:
+            vecs = list(self.query_encoder.encode_many(miss))
+        else:
+            vecs = self._tfidf_query_vecs(miss)
+        fresh = dict(zip(miss, vecs, strict=True))
+        for q, qv in fresh.items():
+            qv.flags.writeable = False
+            self.query_cache.put(q, qv)
+        return [fresh[q] if qv is None else qv for q, qv in zip(queries, out, strict=True)]
+
+    def _tfidf_query_vecs(self, queries: list[str]) -> list[np.ndarray]:
+        """TF-IDF pseudo-embeddings of `queries` (no embedder), normalized row by row."""
+        dense = self.corpus.tfidf_encode(queries).to_dense()
+        return [qv / (np.linalg.norm(qv) + 1e-8) for qv in dense]
+
+    def embed_rows(
+        self, q: str, k: int, allowed: RowFilter | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        qv = self.encode_query(q)
+        if allowed is not None:
+            return self._embed_rows_filtered(qv, k, allowed)
+        # over-fetch past tombstones, which stay in the base store until the next refit
+        hits = self.vec_store.search(qv, k + len(self.deleted))
+        d_hits = self.delta_store.search(qv, k) if self.delta_store is not None else None
+        return self._embed_top(hits, d_hits, k)
+
+    def embed_rows_batch(
+        self, queries: list[str], ks: list[int], allowed: list[RowFilter | None]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        embed_rows for each query: one encoder call for the batch, and one store search
+        (a matrix product for the exact stores) for the unfiltered queries. Filtered queries
+        run their own filtered search. Exact stores return the same rows as embed_rows, with
+        scores equal up to float32 rounding (a matrix product sums in a different order).
+        """
+        qvs = self.encode_queries(queries)
+        out = {
+            j: self._embed_rows_filtered(qvs[j], ks[j], a)
+            for j, a in enumerate(allowed)
+            if a is not None
+        }
+        plain = [j for j in range(len(queries)) if j not in out]
+        if plain:
+            Q = np.stack([qvs[j] for j in plain])
+            k_max = max(ks[j] for j in plain)
+            hits = self.vec_store.search_batch(Q, k_max + len(self.deleted))
+            d_hits = None
+            if self.delta_store is not None:
+                d_hits = self.delta_store.search_batch(Q, k_max)
+            for i, j in enumerate(plain):
+                out[j] = self._embed_top(hits[i], d_hits[i] if d_hits else None, ks[j])
+        return [out[j] for j in range(len(queries))]
+
+    def _embed_top(
+        self,
+        hits: list[tuple[str, float]],
+        d_hits: list[tuple[str, float]] | None,
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k live rows from base store `hits` (over-fetched past tombstones) and delta."""
+        rows, sims = self._hit_rows(hits)
+        if self._alive is not None:
+            keep = self._alive[rows]
+            rows, sims = rows[keep], sims[keep]
+        if d_hits is None:
+            return rows[:k], sims[:k]
+        assert self.delta is not None
+        n_base = len(self.corpus)
+        rows = np.concatenate(
+            [rows, np.fromiter((n_base + self.delta.row_of[i] for i, _ in d_hits), np.int64)]
         )
-        idx = np.argsort(-sims)[:k]
-        return [(self.ids[i], float(sims[i])) for i in idx]
+        sims = np.concatenate([sims, np.fromiter((s for _, s in d_hits), np.float64)])
+        top = _top_k(sims, k)
+        return rows[top], sims[top]
 
+    def _hit_rows(self, hits: list[tuple[str, float]]) -> tuple[np.ndarray, np.ndarray]:
+        rows = np.fromiter((self.corpus.row_of[i] for i, _ in hits), dtype=np.int64)
+        sims = np.fromiter((s for _, s in hits), dtype=np.float64)
+        return rows, sims
 
-_vec_store = InMemoryVectorStore(dim=_emb_dim)
-_vec_store.add(ids, vecs)
+    def _embed_rows_filtered(
+        self, qv: np.ndarray, k: int, allowed: RowFilter
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k embedding rows among `allowed`. Few allowed rows: exact brute force over them.
+        Otherwise: search the vector index for about k / selectivity hits and drop the
+        disallowed ones, widening until k remain or the index has nothing more to give.
+        """
+        n_base = len(self.corpus)
+        qv = _normalize(qv[None, :])[0]  # the query the vector stores score with
+        if allowed.rows is not None:
+            rows = allowed.rows
+            split = int(np.searchsorted(rows, n_base))
+            sims = self.corpus.vecs[rows[:split]] @ qv
+            if split < rows.size:
+                sims = np.concatenate([sims, self.delta.vecs[rows[split:] - n_base] @ qv])
+            top = _top_k(sims, k)
+            return rows[top], sims[top].astype(np.float64)
+        mask = allowed.mask
+        assert mask is not None
+        fetch = min(n_base, 2 * k * len(self) // max(allowed.count, 1) + len(self.deleted))
+        while True:
+            hits = self.vec_store.search(qv, fetch)
+            rows, sims = self._hit_rows(hits)
+            keep = mask[rows]
+            rows, sims = rows[keep], sims[keep]
+            # an ANN index returns fewer hits than asked once its probed lists run out
+            if rows.size >= k or fetch >= n_base or len(hits) < fetch:
+                break
+            fetch = min(n_base, fetch * 4)
+        if self.delta is not None:
+            d_rows = np.flatnonzero(mask[n_base:])
+            rows = np.concatenate([rows, d_rows + n_base])
+            sims = np.concatenate([sims, self.delta.vecs[d_rows] @ qv])
+        top = _top_k(sims, k)
+        return rows[top], sims[top]
 
+    def sharded_rows(
+        self, q: str, k: int, allowed: RowFilter | None = None
+    ) -> tuple[tuple[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]]:
+        """
+        keyword_rows and embed_rows in one pass, with the base segment scored by the shard
+        workers while this thread scores the delta segment (and ANN embeddings, which are
+        not sharded). Same results as the two in-process calls.
+        """
+        assert self.shards is not None
+        n_base = len(self.corpus)
+        live = allowed
+        if live is None and self._alive is not None:
+            live = RowFilter(len(self), mask=self._alive)  # tombstones only
+        qv = self.encode_query(q)
+        if self.kw_index is not None:
+            kw = ("bm25", *self.kw_index.query_terms(q))
+        else:
+            kw = ("tfidf", *self.corpus.tfidf_encode([q]).row(0))
+        futures = self.shards.submit(kw, qv, k, local_filter(live, 0, n_base))
 
-# ----------------------------
-# Scoring components
-# ----------------------------
-def _keyword_scores(q: str, k: int) -> list[tuple[str, float]]:
-    qv = _tfidf_encode([q])[0]
-    sims = _X @ qv
-    idx = np.argsort(-sims)[:k]
-    return [(ids[i], float(sims[i])) for i in idx]
+        parts = []
+        vectors = self.shards.vectors
+        if self.delta is not None:
+            d = self.delta
+            seg = Segment(0, len(d), n_base, d.X, d.kw_index, d.vecs)
+            d_kw = ("bm25", *d.kw_index.query_terms(q)) if self.kw_index is not None else kw
+            d_live = local_filter(live, n_base, len(self.ids))
+            parts.append(score_segment(seg, d_kw, qv if vectors else None, k, d_live))
+        em = None if vectors else self.embed_rows(q, k, allowed)
+        parts += [f.result() for f in futures]
 
+        kw_rows, kw_sims = merge_top([(p[0], p[1]) for p in parts], k)
+        if self.kw_index is not None and kw_sims.size and kw_sims[0] > 0:
+            kw_sims = kw_sims / kw_sims[0]  # as keyword_rows
+        if em is None:
+            em = merge_top([(p[2], p[3]) for p in parts], k)
+        return (kw_rows, kw_sims), em
 
-def _embed_scores(q: str, k: int) -> list[tuple[str, float]]:
-    try:
-        qv = _emb_model.encode([q], normalize_embeddings=True)  # type: ignore[name-defined]
-        qv = np.asarray(qv[0], dtype=np.float32)
-    except Exception:
-        qv = _tfidf_encode([q])[0]
-        qv = qv / (np.linalg.norm(qv) + 1e-8)
-    return _vec_store.search(qv, k)
+    def row_vecs(self, rows: np.ndarray) -> np.ndarray:
+        """Stored embeddings of merged-space `rows` (base or delta segment)."""
+        n_base = len(self.corpus)
+        if self.delta is None or not (rows >= n_base).any():
+            return self.corpus.vecs[rows]
+        out = np.empty((rows.size, self.corpus.vecs.shape[1]), dtype=np.float32)
+        base = rows < n_base
+        out[base] = self.corpus.vecs[rows[base]]
+        out[~base] = self.delta.vecs[rows[~base] - n_base]
+        return out
 
+    def embed_scores(self, q: str, k: int) -> list[tuple[str, float]]:
+        rows, sims = self.embed_rows(q, k)
+        return [(self.ids[r], float(s)) for r, s in zip(rows, sims, strict=True)]
 
-def _recency_boost(ts: int, now_ts: int) -> float:
-    half_life = settings.recency_halflife_days * 86400.0
-    age = max(0.0, now_ts - ts)
-    return 2 ** (-age / half_life)
+    def embed_docs(self, docs: list[str]) -> np.ndarray:
+        if self.embedder is not None:
+            return embed_docs(self.embedder, docs, settings.embed_batch_size)
+        vecs = self.corpus.tfidf_encode(docs).to_dense()
+        return vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-8)
+
+    # ----------------------------
+    # Ingestion
+    # ----------------------------
+    def apply(
+        self,
+        upserts: list[dict[str, Any]],
+        deletes: list[str] | None = None,
+        snippets: dict[str, str] | None = None,
+    ) -> HybridEngine:
+        """
+        A new engine with `deletes` then `upserts` applied (an upsert replaces any doc with
+        the same id). Only the new docs are embedded; the base segment is shared, and the
+        delta segment is re-indexed from its live docs.
+        """
+        upserts = list({it["id"]: it for it in upserts}.values())
+        snippets = snippets or {}
+        gone = set(deletes or ()) | {it["id"] for it in upserts}
+        deleted = self.deleted | {i for i in gone if i in self.corpus.row_of}
+
+        items, snips, vecs = [], {}, []
+        if self.delta is not None:
+            keep = [r for r, doc_id in enumerate(self.delta.ids) if doc_id not in gone]
+            items = [self.delta.items[r] for r in keep]
+            snips = {it["id"]: self.delta.snippets.get(it["id"], "") for it in items}
+            vecs.append(self.delta.vecs[keep])
+        if upserts:
+            snips.update((it["id"], snippets.get(it["id"], "")) for it in upserts)
+            vecs.append(self.embed_docs([doc_text(it, snips) for it in upserts]))
+            items = items + upserts
+        delta = extend_corpus(self.corpus, items, snips, np.concatenate(vecs)) if items else None
+        return HybridEngine(
+            self.corpus,
+            self.embedder,
+            self.vec_store,
+            delta,
+            frozenset(deleted),
+            self.version + 1,
+            self.query_cache,
+            self.query_encoder,
+            self.shards,
+        )
+
+    def refit(self, progress: Progress | None = None) -> HybridEngine:
+        """Rebuild from the live docs: fresh vocabulary/IDF and vector index, embeddings reused."""
+        if not self.pending:
+            return self
+        c = self.corpus
+        live = np.arange(len(c)) if self._alive is None else np.flatnonzero(self._alive[: len(c)])
+        items = [c.items[r] for r in live]
+        vecs: np.ndarray | None = np.asarray(c.vecs[live], dtype=np.float32)
+        if self.delta is not None:
+            items += self.delta.items
+            vecs = np.concatenate([vecs, self.delta.vecs])
+        if c.embedding_model == EMBED_FALLBACK:
+            vecs = None  # pseudo-embeddings follow the new TF-IDF vocabulary
+        snips = {it["id"]: self.snippets[it["id"]] for it in items if it["id"] in self.snippets}
+        bm25 = (c.kw_index.k1, c.kw_index.b) if c.kw_index is not None else None
+        hashing = c.tfidf.n_features if isinstance(c.tfidf, HashingTfidfVectorizer) else 0
+        corpus = build_corpus(
+            items, snips, self.embedder, c.embedding_model, bm25, progress, vecs, hashing
+        )
+        # TF-IDF pseudo-embeddings of a query change with the vocabulary
+        cache = self.query_cache if vecs is not None else None
+        return HybridEngine(
+            corpus,
+            self.embedder,
+            version=self.version + 1,
+            query_cache=cache,
+            query_encoder=self.query_encoder,
+            shards=_make_shards(corpus) if self.shards is not None else None,
+        )
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def search(
+        self, query: str, k: int, topics: list[str] | None, since: str | None
+    ) -> list[dict[str, Any]]:
+        query = normalize_query(query)
+        base_k = max(k * 6, 30)
+        allowed = None
+        t0 = time.perf_counter()
+        if settings.filter_pushdown:
+            allowed = self.row_filter(topics, since)
+            if allowed is not None:
+                topics = since = None  # already applied
+                tf = time.perf_counter()
+                _STAGE["prefilter"].observe(tf - t0)
+                record("prefilter", t0, tf, rows=allowed.count, brute=allowed.rows is not None)
+                t0 = tf
+        if self.shards is not None:
+            kw, em = self.sharded_rows(query, base_k, allowed)
+            t1 = time.perf_counter()
+            _STAGE["shards"].observe(t1 - t0)
+            record("shards", t0, t1, shards=len(self.shards), candidates=int(kw[0].size))
+            return self.fuse(kw, em, k, topics, since)
+        kw = self.keyword_rows(query, base_k, allowed)
+        t1 = time.perf_counter()
+        em = self.embed_rows(query, base_k, allowed)
+        t2 = time.perf_counter()
+        _STAGE["keyword"].observe(t1 - t0)
+        _STAGE["embed"].observe(t2 - t1)
+        record("keyword", t0, t1, candidates=int(kw[0].size))
+        record("embed", t1, t2, candidates=int(em[0].size))
+        return self.fuse(kw, em, k, topics, since)
+
+    def search_batch(
+        self, requests: list[tuple[str, int, list[str] | None, str | None]]
+    ) -> list[list[dict[str, Any]]]:
+        """
+        `search` for each (query, k, topics, since): TF-IDF keyword scores come from one
+        sparse product per segment and embeddings from one encoder call plus one matrix
+        product for the whole batch; filters and fusion then run per query. With the exact vector
+        index, the results match `search` up to float32 rounding. With shards, each query is
+        searched on its own.
+        """
+        if self.shards is not None:
+            return [self.search(*r) for r in requests]
+        queries = [normalize_query(q) for q, _, _, _ in requests]
+        ks = [max(k * 6, 30) for _, k, _, _ in requests]
+        allowed: list[RowFilter | None] = [None] * len(requests)
+        post = [(topics, since) for _, _, topics, since in requests]
+        t0 = time.perf_counter()
+        if settings.filter_pushdown:
+            for j, (topics, since) in enumerate(post):
+                allowed[j] = self.row_filter(topics, since)
+                if allowed[j] is not None:
+                    post[j] = (None, None)  # already applied
+            tf = time.perf_counter()
+            record("prefilter", t0, tf, filtered=sum(a is not None for a in allowed))
+            t0 = tf
+        kws = self.keyword_rows_batch(queries, ks, allowed)
+        t1 = time.perf_counter()
+        ems = self.embed_rows_batch(queries, ks, allowed)
+        t2 = time.perf_counter()
+        _STAGE["keyword"].observe(t1 - t0)
+        _STAGE["embed"].observe(t2 - t1)
+        record("keyword", t0, t1, queries=len(queries))
+        record("embed", t1, t2, queries=len(queries))
+        return [
+            self.fuse(kw, em, k, topics, since)
+            for kw, em, (_, k, _, _), (topics, since) in zip(kws, ems, requests, post, strict=True)
+        ]
+
+    def fuse(
+        self,
+        kw: tuple[np.ndarray, np.ndarray],
+        em: tuple[np.ndarray, np.ndarray],
+        k: int,
+        topics: list[str] | None,
+        since: str | None,
+    ) -> list[dict[str, Any]]:
+        """Merge keyword and embedding candidates (rows, sims), filter, rank and diversify."""
+        (kw_rows, kw_sims), (em_rows, em_sims) = kw, em
+        now_ts = int(time.time())
+        t0 = time.perf_counter()
+
+        # merge + recency (one slot per distinct candidate row)
+        cand = np.union1d(kw_rows, em_rows)
+        s_kw = np.zeros(cand.size, dtype=np.float64)
+        s_kw[np.searchsorted(cand, kw_rows)] = kw_sims
+        s_em = np.zeros(cand.size, dtype=np.float64)
+        s_em[np.searchsorted(cand, em_rows)] = em_sims
+        scores = (
+            settings.alpha_embed * s_em
+            + settings.beta_keyword * s_kw
+            + settings.gamma_recency * _recency_boost(self.timestamps[cand], now_ts)
+        )
+
+        t1 = time.perf_counter()
+
+        # filters
+        keep = np.ones(cand.size, dtype=bool)
+        if since:
+            cutoff = parse_since_to_timestamp(since, now_ts)
+            keep &= self.timestamps[cand] >= cutoff
+
+        if topics:
+            vocab = self.topic_vocab
+            wanted = np.fromiter(
+                {vocab[t.lower()] for t in topics if t.lower() in vocab}, dtype=np.int32
+            )
+            keep &= self.topics.rows_any(cand, wanted)
+
+        cand, scores = cand[keep], scores[keep]
+        t2 = time.perf_counter()
+
+        # rank (score desc, row asc on ties: cand is sorted) + diversify by domain, or MMR.
+        # Only a ranked prefix is sorted; positions index into cand.
+        if settings.diversity == "mmr":
+            pool = _top_k(scores, settings.mmr_pool if settings.mmr_pool > 0 else scores.size)
+            V = self.row_vecs(cand[pool])
+            picks = _mmr(
+                scores[pool],
+                V @ V.T,
+                k,
+                settings.mmr_lambda,
+                self.domain_codes[cand[pool]],
+                settings.max_per_domain,
+            )
+            chosen = pool[picks]
+        else:
+            codes, m = self.domain_codes[cand], 4 * k
+            while True:  # widen the prefix until the cap leaves k rows or it holds every row
+                order = _top_k(scores, m)
+                chosen = _diversify(order, codes, settings.max_per_domain)[:k]
+                if chosen.size >= k or order.size == scores.size:
+                    break
+                m *= 4
+        out: list[dict[str, Any]] = []
+        for row, score in zip(cand[chosen].tolist(), scores[chosen].tolist(), strict=True):
+            meta = self.items[row]
+            out.append(
+                {
+                    "item_id": self.ids[row],
+                    "score": round(score, 6),
+                    "slug": meta["slug"],
+                    "title": meta["title"],
+                }
+            )
+        t3 = time.perf_counter()
+        _STAGE["merge"].observe(t1 - t0)
+        _STAGE["filter"].observe(t2 - t1)
+        _STAGE["diversify"].observe(t3 - t2)
+        record("merge", t0, t1)
+        record("filter", t1, t2, kept=int(cand.size))
+        record("diversify", t2, t3)
+        return out
+
+    def resolve_items(self, item_ids: list[str]) -> list[dict[str, Any]]:
+        result: list[dict[str, Any]] = []
+        for iid in item_ids:
+            row = self.row_of.get(iid)
+            if row is None:
+                continue
+            it = self.items[row]
+            result.append(
+                {
+                    "item_id": it["id"],
+                    "title": it["title"],
+                    "url": it["url"],
+                    "published_at": it["published_at"],
+                    "snippet": self.snippets.get(iid, ""),
+                }
+            )
+        return result
 
 
 # ----------------------------
-# Public API
+# Lifecycle: lazy, single-flight warmup with progress for /ready
 # ----------------------------
+class EngineNotReady(RuntimeError):
+    pass
+
+
+class _Warmup:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._waiters: dict[asyncio.AbstractEventLoop, asyncio.Event] = {}  # for wait_async
+        self.engine: HybridEngine | None = None
+        self.status = "idle"  # idle | loading | ready | failed
+        self.stage = ""
+        self.error: str | None = None
+        self.stages: dict[str, float] = {}
+        self._stage_t0 = 0.0
+        self._t0 = 0.0
+        self.duration_s: float | None = None
+
+    def start(self, background: bool) -> None:
+        with self._lock:
+            started = self.status != "idle"
+            if not started:
+                self.status = "loading"
+                self._t0 = self._stage_t0 = time.perf_counter()
+        if started:
+            if not background:
+                self._done.wait()
+            return
+        if background:
+            threading.Thread(target=self._run, name="retrieval-warmup", daemon=True).start()
+        else:
+            self._run()
+
+    def _progress(self, stage: str) -> None:
+        now = time.perf_counter()
+        if self.stage:
+            self.stages[self.stage] = round(now - self._stage_t0, 4)
+        self.stage, self._stage_t0 = stage, now
+
+    def _run(self) -> None:
+        try:
+            self.engine = HybridEngine.load(self._progress)
+            self._progress("")
+            self.status = "ready"
+        except Exception as e:
+            logger.exception("retrieval warmup failed")
+            self.error = repr(e)
+            self.status = "failed"
+        finally:
+            self.duration_s = round(time.perf_counter() - self._t0, 4)
+            logger.info(
+                "retrieval warmup %s in %.3fs %s", self.status, self.duration_s, self.stages
+            )
+            self._done.set()
+            with self._lock:
+                waiters, self._waiters = self._waiters, {}
+            for loop, event in waiters.items():
+                with contextlib.suppress(RuntimeError):  # loop already closed
+                    loop.call_soon_threadsafe(event.set)
+
+    def wait(self, timeout: float | None) -> HybridEngine:
+        if self.engine is not None:
+            return self.engine
+        self.start(background=True)
+        if not self._done.wait(timeout):
+            raise self._not_ready()
+        return self._result()
+
+    async def wait_async(self, timeout: float | None) -> HybridEngine:
+        """wait() for coroutines: awaits an asyncio.Event instead of holding a thread."""
+        if self.engine is not None:
+            return self.engine
+        self.start(background=True)
+        with self._lock:
+            event = None
+            if not self._done.is_set():
+                event = self._waiters.setdefault(asyncio.get_running_loop(), asyncio.Event())
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except TimeoutError:
+                raise self._not_ready() from None
+        return self._result()
+
+    def _not_ready(self) -> EngineNotReady:
+        return EngineNotReady(f"retrieval engine still warming up (stage: {self.stage})")
+
+    def _result(self) -> HybridEngine:
+        if self.engine is None:
+            raise EngineNotReady(f"retrieval engine failed to start: {self.error}")
+        return self.engine
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = self.duration_s
+        if elapsed is None and self.status == "loading":
+            elapsed = round(time.perf_counter() - self._t0, 4)
+        return {
+            "status": self.status,
+            "stage": self.stage or None,
+            "stages": dict(self.stages),
+            "elapsed_s": elapsed,
+            "docs": len(self.engine) if self.engine else None,
+            "error": self.error,
+        }
+
+
+_warmup = _Warmup()
+
+
+def warmup(background: bool = False) -> None:
+    """Start building/loading the engine (idempotent); blocks unless background=True."""
+    _warmup.start(background)
+
+
+def get_engine(timeout: float | None = None) -> HybridEngine:
+    """The ready engine; starts warmup on first use and waits up to `timeout` seconds."""
+    return _warmup.wait(timeout)
+
+
+async def aget_engine(timeout: float | None = None) -> HybridEngine:
+    """get_engine() without blocking the event loop or a worker thread while warmup runs."""
+    return await _warmup.wait_async(timeout)
+
+
+def readiness() -> dict[str, Any]:
+    return {**_warmup.snapshot(), "cache": cache_stats()}
+
+
+def _result_ttl() -> float:
+    return min(settings.result_cache_ttl_s, settings.recency_halflife_days * 86.4)
+
+
+_result_cache = LRUCache(settings.result_cache_size, ttl_s=_result_ttl())
+
+
+def _publish(engine: HybridEngine) -> None:
+    _warmup.engine = engine
+    _result_cache.clear()  # keys carry the version too, so in-flight stale puts never hit
+
+
+def cache_stats() -> dict[str, Any]:
+    engine = _warmup.engine
+    return {
+        "query_embeddings": engine.query_cache.stats() if engine else None,
+        "results": _result_cache.stats(),
+        "encoder": engine.query_encoder.stats() if engine and engine.query_encoder else None,
+    }
+
+
+_ingest_lock = threading.Lock()
+_refit_thread: threading.Thread | None = None
+
+
+def _refit() -> None:
+    with _ingest_lock:
+        engine = _warmup.engine
+        if engine is None or not engine.pending:
+            return
+        t0 = time.perf_counter()
+        _publish(engine.refit())
+        dt = time.perf_counter() - t0
+        logger.info(
+            "refit %d docs (%d pending changes) in %.3fs", len(_warmup.engine), engine.pending, dt
+        )
+
+
+def refit(background: bool = False) -> None:
+    """Rebuild the engine from its live docs (new IDF); ingest waits, searches do not."""
+    global _refit_thread
+    if not background:
+        _refit()
+        return
+    with _ingest_lock:
+        if _refit_thread is not None and _refit_thread.is_alive():
+            return
+        _refit_thread = threading.Thread(target=_refit, name="retrieval-refit", daemon=True)
+        _refit_thread.start()
+
+
+def ingest(
+    upserts: list[dict[str, Any]],
+    deletes: list[str] | None = None,
+    snippets: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """
+    Add/replace `upserts` and remove `deletes` in the live engine. The batch is published
+    with one reference swap, so concurrent searches see all of it or none of it. Schedules
+    a background refit once enough changes are pending.
+    """
+    t0 = time.perf_counter()
+    with _ingest_lock:
+        engine = get_engine(settings.ready_timeout_s)
+        removed = sum(1 for i in set(deletes or ()) if i in engine.row_of)
+        new = engine.apply(upserts, deletes, snippets)
+        _publish(new)
+    threshold = max(settings.ingest_refit_docs, settings.ingest_refit_ratio * len(new.corpus))
+    refitting = new.pending >= threshold
+    if refitting:
+        refit(background=True)
+    return {
+        "upserted": len({it["id"] for it in upserts}),
+        "deleted": removed,
+        "docs": len(new),
+        "pending": new.pending,
+        "refit_scheduled": refitting,
+        "elapsed_s": round(time.perf_counter() - t0, 4),
+    }
+
+
+def _result_key(
+    engine: HybridEngine, query: str, k: int, topics: list[str] | None, since: str | None
+) -> tuple[Any, ...]:
+    topic_key = tuple(sorted({t.lower() for t in topics})) if topics else None
+    return (engine.version, normalize_query(query), k, topic_key, since)
+
+
 def hybrid_search(
     query: str, k: int, topics: list[str] | None, since: str | None
 ) -> list[dict[str, Any]]:
-    now_ts = int(time.time())
-    base_k = max(k * 6, 30)
-
-    kw = dict(_keyword_scores(query, base_k))
-    em = dict(_embed_scores(query, base_k))
-
-    # merge + recency
-    scores: dict[str, float] = {}
-    for doc_id in set(list(kw.keys()) + list(em.keys())):
-        s_kw = kw.get(doc_id, 0.0)
-        s_em = em.get(doc_id, 0.0)
-        idx = ids.index(doc_id)
-        ts = timestamps[idx]
-        rec = _recency_boost(ts, now_ts)
-        score = (
-            settings.alpha_embed * s_em
-            + settings.beta_keyword * s_kw
-            + settings.gamma_recency * rec
-        )
-        scores[doc_id] = score
-
-    # filters
-    if since:
-        cutoff = parse_since_to_timestamp(since, now_ts)
-        scores = {i: s for i, s in scores.items() if timestamps[ids.index(i)] >= cutoff}
-
-    if topics:
-        topics_set = set(t.lower() for t in topics)
-
-        def has_topic(it):
-            return bool(set(t.lower() for t in it.get("topics", [])) & topics_set)
-
-        scores = {i: s for i, s in scores.items() if has_topic(_items[ids.index(i)])}
-
-    # diversify by domain
-    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
-    per_domain: dict[str, int] = {}
-    out: list[dict[str, Any]] = []
-    for doc_id, sc in ranked:
-        meta = _items[ids.index(doc_id)]
-        dom = domains[ids.index(doc_id)]
-        if per_domain.get(dom, 0) >= settings.max_per_domain:
-            continue
-        out.append(
-            {
-                "item_id": doc_id,
-                "score": round(sc, 6),
-                "slug": meta["slug"],
-                "title": meta["title"],
-            }
-        )
-        per_domain[dom] = per_domain.get(dom, 0) + 1
-        if len(out) >= k:
-            break
-    return out
+    engine = get_engine(settings.ready_timeout_s)
+    query = normalize_query(query)
+    key = _result_key(engine, query, k, topics, since)
+    with span("hybrid_search", k=k) as s:
+        t0 = time.perf_counter()
+        hits = _result_cache.get(key)
+        if hits is None:
+            hits = engine.search(query, k, topics, since)
+            _result_cache.put(key, hits)
+            _SEARCH_MISS.observe(time.perf_counter() - t0)
+            s["cache"] = "miss"
+        else:
+            _SEARCH_HIT.observe(time.perf_counter() - t0)
+            s["cache"] = "hit"
+        s["results"] = len(hits)
+    return [dict(h) for h in hits]
+
+
+def hybrid_search_batch(
+    requests: list[tuple[str, int, list[str] | None, str | None]],
+) -> list[list[dict[str, Any]]]:
+    """
+    hybrid_search for each (query, k, topics, since): cached results are reused and the
+    rest are scored together by HybridEngine.search_batch.
+    """
+    engine = get_engine(settings.ready_timeout_s)
+    keys = [_result_key(engine, *r) for r in requests]
+    out = [_result_cache.get(key) for key in keys]
+    miss = [j for j, hits in enumerate(out) if hits is None]
+    with span("hybrid_search_batch", queries=len(requests)) as s:
+        if miss:
+            t0 = time.perf_counter()
+            for j, hits in zip(miss, engine.search_batch([requests[j] for j in miss]), strict=True):
+                _result_cache.put(keys[j], hits)
+                out[j] = hits
+            per_query = (time.perf_counter() - t0) / len(miss)  # one observation per search
+            for _ in miss:
+                _SEARCH_MISS.observe(per_query)
+        s["misses"] = len(miss)
+    return [[dict(h) for h in hits or ()] for hits in out]
 
 
 def resolve_items(item_ids: list[str]) -> list[dict[str, Any]]:
-    by_id = {it["id"]: it for it in _items}
-    result: list[dict[str, Any]] = []
-    for iid in item_ids:
-        it = by_id.get(iid)
-        if not it:
-            continue
-        result.append(
-            {
-                "item_id": it["id"],
-                "title": it["title"],
-                "url": it["url"],
-                "published_at": it["published_at"],
-                "snippet": _snips.get(iid, ""),
-            }
-        )
-    return result
+    return get_engine(settings.ready_timeout_s).resolve_items(item_ids)
@@ -0,0 +1,321 @@
+"""
+Out-of-core index build: a stream of items in, an index directory (index_io format) out.
+
+Items are read in chunks of `chunk_size`. Each chunk is tokenized, counted into hashed
+keyword features (utils.tfidf.HashingTfidfVectorizer, so there is no vocabulary to hold) and
+embedded, and every per-row array is appended to a file in the staging directory. Only the
+document frequencies (one counter per hashed feature) and the small domain/topic tables stay
+in memory. Once the stream ends, TF-IDF weights and the BM25 postings are computed from the
+spilled counts, again a chunk of rows at a time, and written straight into the .npy files.
+Peak memory therefore depends on `chunk_size` and `hash_features`, not on corpus size.
+
+    python scripts/build_index.py --jsonl items.jsonl --chunk-size 10000
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Iterator
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import IO, Any
+
+import numpy as np
+
+from ..config import settings
+from ..utils.tfidf import HashingTfidfVectorizer
+from .corpus import doc_text, embed_docs, item_domain, published_ts
+from .index_io import publish_index, staging_dir
+from .store_keyword import InvertedIndex
+
+
+def iter_jsonl(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Items of a JSONL file, one per line; the snippet text is the item's "snippet" key."""
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _chunks(items: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    chunk: list[dict[str, Any]] = []
+    for it in items:
+        chunk.append(it)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _npy_header(f: IO[bytes], dtype: np.dtype, shape: tuple[int, ...]) -> None:
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False}
+    np.lib.format.write_array_header_1_0(f, {**header, "shape": shape})
+
+
+class _Spill:
+    """
+    A growing array kept in a raw file: rows are appended chunk by chunk, read back a block
+    at a time with `read`, and finally copied into an .npy (which load_index memory-maps).
+    Nothing is memory-mapped here, so resident memory stays at one block.
+    """
+
+    def __init__(self, path: Path, dtype: Any, width: int | None = None):
+        self.path = path.with_suffix(".raw")
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.rows = 0
+        self._f: IO[bytes] = self.path.open("wb")
+
+    def append(self, arr: np.ndarray) -> None:
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        if self.width is None and arr.ndim == 2:
+            self.width = arr.shape[1]
+        self._f.write(arr.tobytes())
+        self.rows += arr.shape[0]
+
+    def read(self, a: int, b: int) -> np.ndarray:
+        """Rows [a, b)."""
+        self._f.close()
+        width = self.width or 1
+        out = np.fromfile(
+            self.path, self.dtype, (b - a) * width, offset=a * width * self.dtype.itemsize
+        )
+        return out if self.width is None else out.reshape(-1, width)
+
+    def save(self, path: Path) -> None:
+        self._f.close()
+        shape = (self.rows,) if self.width is None else (self.rows, self.width)
+        with path.open("wb") as f, self.path.open("rb") as src:
+            _npy_header(f, self.dtype, shape)
+            shutil.copyfileobj(src, f, 1 << 20)
+        self.discard()
+
+    def close(self) -> None:
+        self._f.close()
+
+    def discard(self) -> None:
+        self._f.close()
+        os.remove(self.path)
+
+
+class _JsonWriter:
+    """A JSON array (or object, with `pairs`) written one element at a time."""
+
+    def __init__(self, path: Path, pairs: bool = False):
+        self._f = path.open("w", encoding="utf-8")
+        self._pairs = pairs
+        self._sep = ""
+        self._f.write("{" if pairs else "[")
+
+    def add(self, value: Any, key: str | None = None) -> None:
+        head = f"{json.dumps(key)}: " if self._pairs else ""
+        self._f.write(self._sep + head + json.dumps(value, ensure_ascii=False))
+        self._sep = ",\n"
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.write("}" if self._pairs else "]")
+            self._f.close()
+
+
+def _row_blocks(indptr: _Spill, size: int) -> Iterator[tuple[int, int, np.ndarray, int, int]]:
+    """(row lo, row hi, indptr[lo:hi + 1], entry lo, entry hi) for blocks of `size` rows."""
+    n = indptr.rows - 1
+    for lo in range(0, n, size):
+        hi = min(lo + size, n)
+        ptr = indptr.read(lo, hi + 1)
+        yield lo, hi, ptr, int(ptr[0]), int(ptr[-1])
+
+
+def build_index_stream(
+    items: Iterable[dict[str, Any]],
+    out: str | Path,
+    embedder: Any,
+    embedding_model: str,
+    bm25: tuple[float, float] | None = None,
+    hash_features: int = 1 << 20,
+    chunk_size: int = 10_000,
+    progress: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Build the index for `items` (e.g. iter_jsonl) into directory `out`, atomically replaced,
+    and return its manifest. `embedder` is required: hashed TF-IDF rows are too wide to
+    stand in for embeddings. `progress(stage)` is called as each stage starts.
+    """
+    if embedder is None:
+        raise ValueError("a streaming build needs an embedder")
+    report = progress or (lambda _stage: None)
+    out = Path(out)
+    tmp = staging_dir(out)
+    vec = HashingTfidfVectorizer(hash_features)
+    spill: dict[str, _Spill] = {}
+    writers: list[_JsonWriter] = []
+    try:
+        for name, dtype in (
+            ("timestamps", np.int64),
+            ("domain_codes", np.int32),
+            ("topics_indptr", np.int64),
+            ("topics_indices", np.int32),
+            ("kw_indptr", np.int64),
+            ("kw_indices", np.int32),
+            ("kw_counts", np.float32),
+            ("doc_len", np.float32),
+            ("vectors", np.float32),
+        ):
+            spill[name] = _Spill(tmp / name, dtype)
+        for name in ("ids.json", "items.json", "snippets.json"):
+            writers.append(_JsonWriter(tmp / name, pairs=name == "snippets.json"))
+        ids_out, items_out, snips_out = writers
+        domain_code: dict[str, int] = {}
+        topic_vocab: dict[str, int] = {}
+        df = np.zeros(hash_features, dtype=np.int64)
+        spill["topics_indptr"].append(np.zeros(1))
+        spill["kw_indptr"].append(np.zeros(1))
+        n = n_topics = nnz = total_len = 0
+
+        report("stream")
+        for chunk in _chunks(items, chunk_size):
+            snips: dict[str, str] = {}
+            for it in chunk:
+                it = dict(it)
+                snippet = it.pop("snippet", None)
+                if snippet is not None:
+                    snips[it["id"]] = snippet
+                    snips_out.add(snippet, key=it["id"])
+                ids_out.add(it["id"])
+                items_out.add(it)
+            docs = [doc_text(it, snips) for it in chunk]
+            spill["timestamps"].append(
+                np.asarray([published_ts(it["published_at"]) for it in chunk])
+            )
+            spill["domain_codes"].append(
+                np.asarray(
+                    [
+                        domain_code.setdefault(item_domain(it["url"]), len(domain_code))
+                        for it in chunk
+                    ]
+                )
+            )
+            t_ptr, t_idx = [], []
+            for it in chunk:
+                topics = {t.lower() for t in it.get("topics", [])}
+                codes = {topic_vocab.setdefault(t, len(topic_vocab)) for t in topics}
+                t_idx.extend(sorted(codes))
+                n_topics += len(codes)
+                t_ptr.append(n_topics)
+            spill["topics_indptr"].append(np.asarray(t_ptr))
+            spill["topics_indices"].append(np.asarray(t_idx))
+
+            counts = vec.counts(docs)
+            spill["kw_indptr"].append(counts.indptr[1:] + nnz)
+            spill["kw_indices"].append(counts.indices)
+            spill["kw_counts"].append(counts.data)
+            lens = np.bincount(counts.row_ids, counts.data, minlength=len(docs))
+            spill["doc_len"].append(lens)
+            total_len += int(lens.sum())
+            df += np.bincount(counts.indices, minlength=hash_features)
+            spill["vectors"].append(embed_docs(embedder, docs, settings.embed_batch_size))
+            n += len(chunk)
+            nnz += counts.nnz
+        for w in writers:
+            w.close()
+        if n == 0:
+            raise ValueError("no items to index")
+
+        report("tfidf")
+        vec.fit_df(df, n)
+        np.save(tmp / "tfidf_idf.npy", vec.idf_)
+        indptr, indices, counts, doc_len = (
+            spill[name] for name in ("kw_indptr", "kw_indices", "kw_counts", "doc_len")
+        )
+        with (tmp / "kw_data.npy").open("wb") as f:
+            _npy_header(f, np.dtype(np.float32), (nnz,))
+            for lo, hi, ptr, a, b in _row_blocks(indptr, chunk_size):
+                rows = np.repeat(np.arange(hi - lo), np.diff(ptr))
+                totals = doc_len.read(lo, hi).astype(np.float64)[rows]  # as HashingTfidfVectorizer
+                data = counts.read(a, b) / totals * vec.idf_[indices.read(a, b)]
+                f.write(data.astype(np.float32).tobytes())
+
+        manifest_bm25 = None
+        if bm25 is not None:
+            report("bm25")
+            kw = InvertedIndex(bm25[0], bm25[1], hash_features)
+            kw.n_docs_, kw.avgdl_ = n, total_len / n
+            _write_postings(tmp, kw, df, indptr, indices, counts, doc_len, chunk_size)
+            manifest_bm25 = {
+                "k1": kw.k1,
+                "b": kw.b,
+                "n_docs": kw.n_docs_,
+                "avgdl": kw.avgdl_,
+                "n_features": hash_features,
+            }
+
+        report("manifest")
+        for name, sp in spill.items():
+            if name in ("kw_counts", "doc_len"):
+                sp.discard()
+            else:
+                sp.save(tmp / f"{name}.npy")
+        (tmp / "domains.json").write_text(json.dumps(list(domain_code)), encoding="utf-8")
+        (tmp / "topics.json").write_text(json.dumps(topic_vocab), encoding="utf-8")
+        return publish_index(
+            tmp,
+            out,
+            n_docs=n,
+            embedding_model=embedding_model,
+            embedding_dim=spill["vectors"].width,
+            tfidf="hashing",
+            tfidf_features=hash_features,
+            bm25=manifest_bm25,
+        )
+
+    finally:  # on failure, leave no open spill files or half-written staging directory
+        for f in (*spill.values(), *writers):
+            f.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _write_postings(
+    tmp: Path,
+    kw: InvertedIndex,
+    df: np.ndarray,
+    indptr: _Spill,
+    indices: _Spill,
+    counts: _Spill,
+    doc_len: _Spill,
+    chunk_size: int,
+) -> None:
+    """
+    BM25 postings of `kw` (InvertedIndex layout, hashed terms) from the spilled counts: a
+    counting sort by term, filled one block of rows at a time so rows stay ascending within
+    a term. The outputs are mapped per block only, so their pages do not pile up.
+    """
+    n = kw.n_docs_
+    term_ptr = np.zeros(df.size + 1, dtype=np.int64)
+    np.cumsum(df, out=term_ptr[1:])
+    nnz = int(term_ptr[-1])
+    for name, dtype in (("bm25_doc_ids", np.int32), ("bm25_impacts", np.float32)):
+        with (tmp / f"{name}.npy").open("wb") as f:
+            _npy_header(f, np.dtype(dtype), (nnz,))
+            f.truncate(f.tell() + nnz * np.dtype(dtype).itemsize)
+    fill = term_ptr[:-1].copy()
+    for lo, hi, ptr, a, b in _row_blocks(indptr, chunk_size):
+        rows = np.repeat(np.arange(hi - lo), np.diff(ptr))
+        terms = indices.read(a, b)
+        order = np.argsort(terms, kind="stable")
+        sorted_terms = terms[order]
+        uniq, first, cnt = np.unique(sorted_terms, return_index=True, return_counts=True)
+        pos = fill[sorted_terms] + np.arange(order.size) - np.repeat(first, cnt)
+        fill[uniq] += cnt
+        doc_ids = np.load(tmp / "bm25_doc_ids.npy", mmap_mode="r+")
+        doc_ids[pos] = lo + rows[order]
+        del doc_ids
+        impacts = np.load(tmp / "bm25_impacts.npy", mmap_mode="r+")
+        impacts[pos] = kw.impacts_of(counts.read(a, b)[order], doc_len.read(lo, hi)[rows[order]])
+        del impacts
+    kw.idf_ = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+    np.save(tmp / "bm25_term_ptr.npy", term_ptr)
+    np.save(tmp / "bm25_idf.npy", kw.idf_)
+    (tmp / "bm25_vocab.json").write_text("{}", encoding="utf-8")
@@ -0,0 +1,262 @@
+"""
+On-disk index format (one directory, written by scripts/build_index.py):
+
+    manifest.json        version, counts, embedding model, per-file sha256, overall checksum
+    ids.json, items.json, snippets.json, domains.json, topics.json
+    timestamps.npy, domain_codes.npy, topics_indptr.npy, topics_indices.npy
+    kw_indptr.npy, kw_indices.npy, kw_data.npy      TF-IDF keyword matrix (CSR)
+    tfidf_vocab.json + tfidf_idf.npy                 SimpleTfidfVectorizer state, or
+    tfidf_idf.npy                                    HashingTfidfVectorizer state, or
+    tfidf.pkl                                        a fitted sklearn TfidfVectorizer
+                                                     (only unpickled if its sha256
+                                                     matches the manifest)
+    vectors.npy                                      L2-normalized embeddings (float32)
+    bm25_*.npy + bm25_vocab.json                     optional BM25 postings (vocab is {}
+                                                     when terms are hashed)
+
+Arrays are loaded with np.load(mmap_mode="r"), so startup does no parsing of the large
+buffers and every worker on a node shares the same pages through the OS page cache.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+import pickle
+import shutil
+from typing import Any
+
+import numpy as np
+
+from ..utils.sparse import CsrMatrix
+from ..utils.tfidf import HashingTfidfVectorizer, SimpleTfidfVectorizer
+from .corpus import CorpusIndex
+from .store_keyword import InvertedIndex
+
+FORMAT_VERSION = 2  # 2: keyword tokens split on punctuation (utils.text.tokenize)
+MANIFEST = "manifest.json"
+
+
+class IndexFormatError(RuntimeError):
+    pass
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    path.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+
+
+def _read_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def staging_dir(path: Path) -> Path:
+    """Fresh empty directory next to `path` to write an index into before publish_index."""
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    return tmp
+
+
+def save_index(corpus: CorpusIndex, path: str | Path) -> dict[str, Any]:
+    """Write `corpus` to directory `path` (atomically replaced) and return the manifest."""
+    path = Path(path)
+    tmp = staging_dir(path)
+
+    arrays: dict[str, np.ndarray] = {
+        "timestamps": corpus.timestamps,
+        "domain_codes": corpus.domain_codes,
+        "topics_indptr": corpus.topics.indptr,
+        "topics_indices": corpus.topics.indices,
+        "kw_indptr": corpus.X.indptr,
+        "kw_indices": corpus.X.indices,
+        "kw_data": corpus.X.data,
+        "vectors": np.ascontiguousarray(corpus.vecs, dtype=np.float32),
+    }
+    _write_json(tmp / "ids.json", corpus.ids)
+    _write_json(tmp / "items.json", corpus.items)
+    _write_json(tmp / "snippets.json", corpus.snippets)
+    _write_json(tmp / "domains.json", corpus.domain_names)
+    _write_json(tmp / "topics.json", corpus.topic_vocab)
+
+    if isinstance(corpus.tfidf, SimpleTfidfVectorizer):
+        tfidf_kind = "simple"
+        _write_json(tmp / "tfidf_vocab.json", corpus.tfidf.vocab_)
+        arrays["tfidf_idf"] = np.asarray(corpus.tfidf.idf_, dtype=np.float32)
+    elif isinstance(corpus.tfidf, HashingTfidfVectorizer):
+        tfidf_kind = "hashing"
+        arrays["tfidf_idf"] = np.asarray(corpus.tfidf.idf_, dtype=np.float32)
+    else:
+        tfidf_kind = "sklearn"
+        (tmp / "tfidf.pkl").write_bytes(pickle.dumps(corpus.tfidf))
+
+    bm25 = None
+    if corpus.kw_index is not None:
+        kw = corpus.kw_index
+        bm25 = {
+            "k1": kw.k1,
+            "b": kw.b,
+            "n_docs": kw.n_docs_,
+            "avgdl": kw.avgdl_,
+            "n_features": kw.n_features,
+        }
+        _write_json(tmp / "bm25_vocab.json", kw.vocab_)
+        arrays.update(
+            {
+                "bm25_term_ptr": kw.term_ptr,
+                "bm25_doc_ids": kw.doc_ids,
+                "bm25_impacts": kw.impacts,
+                "bm25_idf": kw.idf_,
+            }
+        )
+
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+
+    return publish_index(
+        tmp,
+        path,
+        n_docs=len(corpus),
+        embedding_model=corpus.embedding_model,
+        embedding_dim=int(corpus.vecs.shape[1]),
+        tfidf=tfidf_kind,
+        tfidf_features=getattr(corpus.tfidf, "n_features", None),
+        bm25=bm25,
+    )
+
+
+def publish_index(tmp: Path, path: Path, **fields: Any) -> dict[str, Any]:
+    """
+    Checksum the files written to `tmp`, add the manifest (with `fields`) and atomically
+    replace directory `path` with it.
+    """
+    files = {p.name: _sha256(p) for p in sorted(tmp.iterdir())}
+    manifest = {
+        "version": FORMAT_VERSION,
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        **fields,
+        "files": files,
+        "checksum": hashlib.sha256(
+            "".join(f"{n}:{d}\n" for n, d in files.items()).encode()
+        ).hexdigest(),
+    }
+    _write_json(tmp / MANIFEST, manifest)
+
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(path: str | Path) -> dict[str, Any]:
+    path = Path(path)
+    try:
+        manifest = _read_json(path / MANIFEST)
+    except (OSError, ValueError) as e:
+        raise IndexFormatError(f"cannot read {path / MANIFEST}: {e}") from e
+    if manifest.get("version") != FORMAT_VERSION:
+        raise IndexFormatError(
+            f"index version {manifest.get('version')} != supported {FORMAT_VERSION}"
+        )
+    return manifest
+
+
+def verify_index(path: str | Path) -> dict[str, Any]:
+    """Recompute every file digest; raises IndexFormatError on any mismatch."""
+    path = Path(path)
+    manifest = read_manifest(path)
+    for name, digest in manifest["files"].items():
+        f = path / name
+        if not f.exists() or _sha256(f) != digest:
+            raise IndexFormatError(f"checksum mismatch for {f}")
+    return manifest
+
+
+def load_index(path: str | Path, verify: bool = False, mmap: bool = True) -> CorpusIndex:
+    """
+    Load an index directory. Arrays are memory-mapped read-only unless mmap=False.
+    verify=True re-hashes every file first (reads the whole index; off by default).
+    """
+    path = Path(path)
+    manifest = verify_index(path) if verify else read_manifest(path)
+    missing = [n for n in manifest["files"] if not (path / n).exists()]
+    if missing:
+        raise IndexFormatError(f"index at {path} is missing {missing}")
+    mode = "r" if mmap else None
+
+    def arr(name: str) -> np.ndarray:
+        return np.load(path / f"{name}.npy", mmap_mode=mode)
+
+    ids = _read_json(path / "ids.json")
+    vecs = arr("vectors")
+    if len(ids) != manifest["n_docs"] or vecs.shape != (len(ids), manifest["embedding_dim"]):
+        raise IndexFormatError(f"index at {path} does not match its manifest")
+
+    topic_vocab = _read_json(path / "topics.json")
+    topic_indices = arr("topics_indices")
+    topics = CsrMatrix(
+        arr("topics_indptr"),
+        topic_indices,
+        np.ones(topic_indices.shape[0], dtype=np.float32),
+        (len(ids), len(topic_vocab)),
+    )
+
+    if manifest["tfidf"] == "simple":
+        tfidf: Any = SimpleTfidfVectorizer()
+        tfidf.vocab_ = _read_json(path / "tfidf_vocab.json")
+        tfidf.idf_ = np.asarray(arr("tfidf_idf"))
+        n_terms = len(tfidf.vocab_)
+    elif manifest["tfidf"] == "hashing":
+        tfidf = HashingTfidfVectorizer(manifest["tfidf_features"])
+        tfidf.idf_ = np.asarray(arr("tfidf_idf"))
+        n_terms = tfidf.n_features
+    else:
+        raw = (path / "tfidf.pkl").read_bytes()
+        if hashlib.sha256(raw).hexdigest() != manifest["files"].get("tfidf.pkl"):
+            raise IndexFormatError(f"checksum mismatch for {path / 'tfidf.pkl'}")
+        tfidf = pickle.loads(raw)
+        n_terms = len(tfidf.vocabulary_)
+    X = CsrMatrix(arr("kw_indptr"), arr("kw_indices"), arr("kw_data"), (len(ids), n_terms))
+
+    kw_index = None
+    if manifest.get("bm25"):
+        kw_index = InvertedIndex(
+            manifest["bm25"]["k1"], manifest["bm25"]["b"], manifest["bm25"]["n_features"]
+        )
+        kw_index.ids = ids
+        kw_index.n_docs_ = manifest["bm25"]["n_docs"]
+        kw_index.avgdl_ = manifest["bm25"]["avgdl"]
+        kw_index.vocab_ = _read_json(path / "bm25_vocab.json")
+        kw_index.term_ptr = arr("bm25_term_ptr")
+        kw_index.doc_ids = arr("bm25_doc_ids")
+        kw_index.impacts = arr("bm25_impacts")
+        kw_index.idf_ = arr("bm25_idf")
+
+    return CorpusIndex(
+        ids=ids,
+        items=_read_json(path / "items.json"),
+        snippets=_read_json(path / "snippets.json"),
+        timestamps=arr("timestamps"),
+        domain_names=_read_json(path / "domains.json"),
+        domain_codes=arr("domain_codes"),
+        topic_vocab=topic_vocab,
+        topics=topics,
+        tfidf=tfidf,
+        X=X,
+        vecs=vecs,
+        embedding_model=manifest["embedding_model"],
+        kw_index=kw_index,
+    )
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+
+class BatchingQueryEncoder:
+    """
+    Micro-batches concurrent single-query encodes into one embedder.encode call.
+    - The first waiting query opens a window; the batch closes after max_wait_ms or at
+      max_batch queries, whichever comes first, and every caller gets its own row.
+    - Duplicate strings within a batch are encoded once.
+    - max_batch <= 1 calls the embedder directly (no worker thread).
+    - `encode_many` encodes a caller's own batch directly, in one call.
+    """
+
+    def __init__(self, embedder: Any, max_batch: int = 32, max_wait_ms: float = 2.0):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._queue: queue.SimpleQueue[tuple[str, Future[np.ndarray]]] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self.batches = 0
+        self.queries = 0
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        vecs = self.embedder.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+        return np.asarray(vecs, dtype=np.float32).reshape(len(texts), -1)
+
+    def encode(self, q: str) -> np.ndarray:
+        if self.max_batch <= 1:
+            return self._encode([q])[0]
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="query-encoder", daemon=True
+                    )
+                    self._worker.start()
+        fut: Future[np.ndarray] = Future()
+        self._queue.put((q, fut))
+        return fut.result()
+
+    def encode_many(self, texts: list[str]) -> np.ndarray:
+        """Rows for `texts` from one embedder call: an explicit batch needs no window."""
+        texts = list(texts)
+        vecs = self._encode(texts)
+        self.batches += 1
+        self.queries += len(texts)
+        return vecs
+
+    def _collect(self) -> list[tuple[str, Future[np.ndarray]]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:  # window closed: take only what is already queued
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = list(dict.fromkeys(q for q, _ in batch))
+            try:
+                vecs = self._encode(texts)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            row = {t: i for i, t in enumerate(texts)}
+            for q, fut in batch:
+                fut.set_result(vecs[row[q]])
+            self.batches += 1
+            self.queries += len(batch)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch": round(self.queries / self.batches, 2) if self.batches else 0.0,
+        }
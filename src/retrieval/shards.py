@@ -0,0 +1,289 @@
+"""
+Sharded scoring of the base segment on worker processes (RETRIEVAL_SHARDS > 1).
+
+The base rows are split into contiguous ranges, one worker process per range. Workers map
+the scoring arrays (TF-IDF CSR or BM25 postings, and embeddings) without copying them:
+arrays backed by a memory-mapped INDEX_DIR are opened by file, anything else is copied
+once into `multiprocessing.shared_memory`. Per query every shard returns its own top-k
+keyword and embedding rows; the engine merges them with the delta segment (scored in
+process by the same `score_segment`) in score-desc, row-asc order. Every row's score is
+independent of the shard layout, so any shard count returns identical results. Keyword
+scores also match the in-process path bit for bit. Embedding scores match it up to float32
+rounding: the in-process path uses BLAS, whose rounding depends on the matrix blocking.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+import itertools
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import os
+from typing import Any
+import weakref
+
+import numpy as np
+
+from ..utils.sparse import CsrMatrix
+from .corpus import CorpusIndex
+from .filters import RowFilter
+from .store_keyword import InvertedIndex
+from .store_vector import _normalize, _top_k
+
+# ("bm25", term ids, weights) or ("tfidf", query indices, query values)
+KeywordQuery = tuple[str, np.ndarray, np.ndarray]
+Hits = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # kw rows/sims, embed rows/sims
+
+
+def dot_rows(vectors: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """
+    vectors @ q computed row by row. BLAS rounds a row's dot product differently depending on
+    the rows blocked with it, so a shard of a matrix would not reproduce the full product;
+    this does (at ~1.3-1.5x the single-threaded BLAS cost).
+    """
+    return np.einsum("ij,j->i", vectors, q)
+
+
+@dataclass
+class Segment:
+    """
+    Scoring arrays for rows [lo, hi) of one corpus segment.
+    - X and vecs hold only those rows; kw_index postings cover the whole segment.
+    - `offset` maps segment rows to engine rows (0 for the base, len(base) for the delta).
+    """
+
+    lo: int
+    hi: int
+    offset: int
+    X: CsrMatrix | None = None
+    kw_index: InvertedIndex | None = None
+    vecs: np.ndarray | None = None
+
+
+def score_segment(
+    seg: Segment,
+    kw: KeywordQuery | None,
+    qv: np.ndarray | None,
+    k: int,
+    allowed: RowFilter | None,
+) -> Hits:
+    """
+    Top-k keyword and embedding rows (engine rows) of one segment. `allowed` is in local rows
+    (0 = seg.lo) and folds in both filters and tombstones; `qv` None skips embeddings.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    kw_rows, kw_sims = empty, np.zeros(0, dtype=np.float32)
+    if kw is not None and kw[0] == "bm25":
+        assert seg.kw_index is not None
+        rows, sims = seg.kw_index.score_terms(kw[1], kw[2], seg.lo, seg.hi)
+        if allowed is not None:
+            keep = allowed.keep(rows - seg.lo)
+            rows, sims = rows[keep], sims[keep]
+        top = _top_k(sims, k)
+        kw_rows, kw_sims = rows[top].astype(np.int64) + seg.offset, sims[top]
+    elif kw is not None:
+        assert seg.X is not None
+        sims = seg.X.dot_sparse(kw[1], kw[2])
+        kw_rows, kw_sims = _top_allowed(sims, k, allowed)
+        kw_rows = kw_rows + seg.lo + seg.offset
+
+    em_rows, em_sims = empty, np.zeros(0, dtype=np.float64)
+    if qv is not None and seg.vecs is not None:
+        qv = _normalize(qv[None, :])[0]  # as the vector store and brute force
+        if allowed is not None and allowed.rows is not None:
+            sims = dot_rows(seg.vecs[allowed.rows], qv)
+            top = _top_k(sims, k)
+            em_rows, em_sims = allowed.rows[top], sims[top]
+        else:
+            sims = dot_rows(seg.vecs, qv)
+            em_rows, em_sims = _top_allowed(sims, k, allowed)
+        em_rows, em_sims = em_rows + seg.lo + seg.offset, em_sims.astype(np.float64)
+    return kw_rows, kw_sims, em_rows, em_sims
+
+
+def _top_allowed(
+    sims: np.ndarray, k: int, allowed: RowFilter | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k positions of dense `sims` among the allowed ones, with their scores."""
+    if allowed is None:
+        top = _top_k(sims, k)
+        return top, sims[top]
+    if allowed.rows is not None:
+        top = _top_k(sims[allowed.rows], k)
+        return allowed.rows[top], sims[allowed.rows[top]]
+    mask = allowed.mask
+    assert mask is not None
+    top = _top_k(np.where(mask, sims, -np.inf), k)
+    top = top[mask[top]]
+    return top, sims[top]
+
+
+def merge_top(parts: list[tuple[np.ndarray, np.ndarray]], k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Global top-k (score desc, row asc) of per-segment top-k lists."""
+    rows = np.concatenate([p[0] for p in parts])
+    sims = np.concatenate([p[1] for p in parts])
+    top = np.lexsort((rows, -sims))[:k]
+    return rows[top], sims[top]
+
+
+def local_filter(allowed: RowFilter | None, lo: int, hi: int) -> RowFilter | None:
+    """`allowed` restricted to engine rows [lo, hi), renumbered from 0."""
+    if allowed is None:
+        return None
+    if allowed.rows is not None:
+        a, b = np.searchsorted(allowed.rows, (lo, hi))
+        rows = allowed.rows[a:b] - lo
+        return RowFilter(int(rows.size), rows=rows)
+    assert allowed.mask is not None
+    mask = allowed.mask[lo:hi]
+    return RowFilter(int(np.count_nonzero(mask)), mask=mask)
+
+
+# ----------------------------
+# Shared arrays
+# ----------------------------
+def _file_backing(arr: np.ndarray) -> tuple[str, int] | None:
+    """(file, byte offset) when `arr` is a contiguous view of a file memory map."""
+    top, base = None, arr
+    while base is not None:
+        if isinstance(base, np.memmap):
+            top = base
+        base = getattr(base, "base", None)
+    if top is None or top.filename is None or not arr.flags.c_contiguous:
+        return None
+    return top.filename, top.offset + arr.ctypes.data - top.ctypes.data
+
+
+def _share(arr: np.ndarray, blocks: list[SharedMemory]) -> tuple[Any, ...]:
+    backing = _file_backing(arr)
+    if backing is not None:
+        return ("file", *backing, arr.dtype.str, arr.shape)
+    arr = np.ascontiguousarray(arr)
+    shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+    blocks.append(shm)
+    return ("shm", shm.name, 0, arr.dtype.str, arr.shape)
+
+
+def _attach(spec: tuple[Any, ...], blocks: list[SharedMemory]) -> np.ndarray:
+    kind, name, offset, dtype, shape = spec
+    if kind == "file":
+        return np.memmap(name, dtype=dtype, mode="r", offset=offset, shape=shape)
+    # workers share the owner's resource tracker, so attaching does not add an unlink
+    shm = SharedMemory(name=name)
+    blocks.append(shm)
+    out = np.ndarray(shape, dtype, buffer=shm.buf)
+    out.flags.writeable = False
+    return out
+
+
+# ----------------------------
+# Worker process
+# ----------------------------
+_segment: Segment | None = None
+_blocks: list[SharedMemory] = []  # keeps attached blocks mapped
+
+
+def _init_worker(specs: dict[str, tuple[Any, ...]], lo: int, hi: int, n_cols: int) -> None:
+    global _segment
+    arrays = {name: _attach(spec, _blocks) for name, spec in specs.items()}
+    seg = Segment(lo, hi, 0)
+    if "kw_indptr" in arrays:
+        indptr = arrays["kw_indptr"]
+        X = CsrMatrix(indptr, arrays["kw_indices"], arrays["kw_data"], (indptr.size - 1, n_cols))
+        seg.X = X.row_slice(lo, hi)
+    if "bm25_term_ptr" in arrays:
+        seg.kw_index = InvertedIndex()
+        seg.kw_index.term_ptr = arrays["bm25_term_ptr"]
+        seg.kw_index.doc_ids = arrays["bm25_doc_ids"]
+        seg.kw_index.impacts = arrays["bm25_impacts"]
+    if "vectors" in arrays:
+        seg.vecs = arrays["vectors"][lo:hi]
+    _segment = seg
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _score(
+    kw: KeywordQuery | None, qv: np.ndarray | None, k: int, allowed: RowFilter | None
+) -> Hits:
+    assert _segment is not None
+    return score_segment(_segment, kw, qv, k, allowed)
+
+
+def _release(executors: list[ProcessPoolExecutor], blocks: list[SharedMemory]) -> None:
+    for ex in executors:
+        ex.shutdown(wait=False, cancel_futures=True)
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+class ShardPool:
+    """
+    Worker processes scoring contiguous ranges of one corpus's base rows (see module doc).
+    - One single-process executor per shard, so each worker only builds views of its range.
+    - `bm25` picks the BM25 postings, else the TF-IDF matrix; `vectors` also shards the
+      embeddings (exact vector index only; ANN indexes are searched in process).
+    - Workers start (spawn) before the constructor returns. They and the shared-memory
+      blocks are released once no engine generation references the pool, or at exit.
+    """
+
+    def __init__(self, corpus: CorpusIndex, n_shards: int, bm25: bool, vectors: bool):
+        n = len(corpus)
+        cuts = np.linspace(0, n, n_shards + 1).astype(np.int64).tolist()
+        self.bounds = list(itertools.pairwise(cuts))
+        self.bm25, self.vectors = bm25, vectors
+        self._blocks: list[SharedMemory] = []
+        arrays: dict[str, np.ndarray] = {}
+        if bm25:
+            assert corpus.kw_index is not None
+            kw = corpus.kw_index
+            arrays.update(
+                bm25_term_ptr=kw.term_ptr, bm25_doc_ids=kw.doc_ids, bm25_impacts=kw.impacts
+            )
+        else:
+            X = corpus.X
+            arrays.update(kw_indptr=X.indptr, kw_indices=X.indices, kw_data=X.data)
+        if vectors:
+            arrays["vectors"] = corpus.vecs
+        specs = {name: _share(arr, self._blocks) for name, arr in arrays.items()}
+        ctx = multiprocessing.get_context("spawn")  # no fork of a threaded server
+        self._executors = [
+            ProcessPoolExecutor(
+                1,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(specs, lo, hi, corpus.X.shape[1]),
+            )
+            for lo, hi in self.bounds
+        ]
+        self._finalizer = weakref.finalize(self, _release, self._executors, self._blocks)
+        self.pids = [f.result() for f in [ex.submit(_ping) for ex in self._executors]]
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    @property
+    def shared_bytes(self) -> int:
+        """Bytes copied into shared memory (file-backed arrays are not counted)."""
+        return sum(shm.size for shm in self._blocks)
+
+    def submit(
+        self,
+        kw: KeywordQuery | None,
+        qv: np.ndarray | None,
+        k: int,
+        allowed: RowFilter | None,
+    ) -> list[Future[Hits]]:
+        """Score every shard in parallel; `allowed` is in base rows (None = all)."""
+        return [
+            ex.submit(_score, kw, qv if self.vectors else None, k, local_filter(allowed, lo, hi))
+            for ex, (lo, hi) in zip(self._executors, self.bounds, strict=True)
+        ]
+
+    def close(self) -> None:
+        self._finalizer()
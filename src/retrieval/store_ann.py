@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import heapq
+import math
+import random
+
+import numpy as np
+
+from .store_vector import InMemoryVectorStore, _normalize, _top_k_rows
+
+
+def _nearest_centroid(X: np.ndarray, C: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    out = np.empty(X.shape[0], dtype=np.int32)
+    for a in range(0, X.shape[0], chunk):
+        out[a : a + chunk] = np.argmax(X[a : a + chunk] @ C.T, axis=1)
+    return out
+
+
+def spherical_kmeans(X: np.ndarray, n_clusters: int, iters: int, seed: int = 0) -> np.ndarray:
+    """K-means on unit vectors (cosine); returns normalized centroids (n_clusters, dim)."""
+    rng = np.random.default_rng(seed)
+    C = X[rng.choice(X.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest_centroid(X, C)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=n_clusters)
+        used = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[used]
+        sums = np.zeros_like(C)
+        sums[used] = np.add.reduceat(X[order], starts, axis=0)
+        empty = counts == 0
+        if empty.any():  # re-seed empty clusters from random points
+            sums[empty] = X[rng.choice(X.shape[0], int(empty.sum()))]
+        C = _normalize(sums)
+    return C
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index (pure NumPy) with the InMemoryVectorStore search contract.
+    - Spherical k-means coarse quantizer trained on the first batch (nlist=0 -> ~4*sqrt(N)).
+    - A query scans only the `nprobe` lists whose centroids are closest; nprobe=nlist is exact.
+    - Vectors live in an InMemoryVectorStore; lists are CSR-style slot ranges rebuilt lazily
+      after writes, so upsert/delete keep working.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: int = 0,
+        nprobe: int = 8,
+        iters: int = 20,
+        max_train: int = 100_000,
+        seed: int = 0,
+        compact_ratio: float = 0.25,
+    ):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iters = iters
+        self.max_train = max_train
+        self.seed = seed
+        self.compact_ratio = compact_ratio
+        self.store = InMemoryVectorStore(dim, compact_ratio=math.inf)
+        self.centroids: np.ndarray | None = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._lists: tuple[np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def nbytes(self) -> int:
+        c = 0 if self.centroids is None else self.centroids.nbytes
+        return self.store.nbytes + self._assign.nbytes + c
+
+    def train(self, vectors: np.ndarray) -> None:
+        X = _normalize(vectors)
+        if X.shape[0] > self.max_train:
+            rng = np.random.default_rng(self.seed)
+            X = X[rng.choice(X.shape[0], self.max_train, replace=False)]
+        n = self.nlist or int(4 * math.sqrt(X.shape[0]))
+        n = max(1, min(n, X.shape[0]))
+        self.centroids = spherical_kmeans(X, n, self.iters, self.seed)
+
+    def add(self, ids: list[str], vectors: np.ndarray) -> None:
+        self.upsert(ids, vectors)
+
+    def upsert(self, ids: list[str], vectors: np.ndarray) -> None:
+        if self.centroids is None:
+            self.train(vectors)
+        assert self.centroids is not None
+        self.store.upsert(ids, vectors)
+        slots = self.store.slots(ids)
+        used = len(self.store.ids)
+        if self._assign.size < used:
+            self._assign = np.concatenate(
+                [self._assign, np.zeros(used - self._assign.size, dtype=np.int32)]
+            )
+        self._assign[slots] = _nearest_centroid(self.store.vecs[slots], self.centroids)
+        self._lists = None
+
+    def delete(self, ids: list[str]) -> int:
+        n = self.store.delete(ids)
+        dead = len(self.store.ids) - len(self.store)
+        if dead > self.compact_ratio * max(len(self.store.ids), 1):
+            keep = self.store.compact()
+            if keep is not None:
+                self._assign = self._assign[keep]
+        self._lists = None
+        return n
+
+    def _build_lists(self) -> tuple[np.ndarray, np.ndarray]:
+        assert self.centroids is not None
+        live = np.flatnonzero(self.store.alive)
+        assign = self._assign[live]
+        slots = live[np.argsort(assign, kind="stable")]
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return ptr, slots
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[list[tuple[str, float]]]:
+        Q = _normalize(np.atleast_2d(Q))
+        if not len(self) or k <= 0 or self.centroids is None:
+            return [[] for _ in range(Q.shape[0])]
+        if self._lists is None:
+            self._lists = self._build_lists()
+        ptr, list_slots = self._lists
+        probe = _top_k_rows(Q @ self.centroids.T, min(self.nprobe, self.centroids.shape[0]))
+        vecs, ids = self.store.vecs, self.store.ids
+        out: list[list[tuple[str, float]]] = []
+        for q, lists in zip(Q, probe, strict=True):
+            slots = np.concatenate([list_slots[ptr[c] : ptr[c + 1]] for c in lists])
+            if slots.size == 0:
+                out.append([])
+                continue
+            sims = vecs[slots] @ q
+            top = _top_k_rows(sims[None, :], min(k, slots.size))[0]
+            out.append([(ids[slots[t]], float(sims[t])) for t in top])  # type: ignore[misc]
+        return out
+
+    def search(self, q: np.ndarray, k: int) -> list[tuple[str, float]]:
+        return self.search_batch(q[None, :], k)[0]
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small-world graph (NumPy + heapq) with the same search contract.
+    - Cosine similarity on normalized vectors; M links per node (2*M on layer 0).
+    - Neighbours are chosen with the diversity heuristic from the HNSW paper.
+    - Deletes are tombstones (still used for navigation); upserting an id re-inserts it.
+      Rebuild the index to reclaim tombstoned nodes.
+    - Insertion is Python-level, so builds are slow; prefer IVF for very large corpora.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        M: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.M = M
+        self.M0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._ml = 1.0 / math.log(max(M, 2))
+        self._rng = random.Random(seed)
+        self._vecs = np.zeros((1024, dim), dtype=np.float32)
+        self.ids: list[str] = []  # node -> id (kept for tombstoned nodes)
+        self._slot_of: dict[str, int] = {}
+        self._deleted: set[int] = set()
+        self._links: list[list[list[int]]] = []  # node -> layer -> neighbours
+        self._n_links = 0  # total over _links, kept up to date by _insert for nbytes
+        self._entry = -1
+        self._max_level = -1
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._vecs.nbytes + 8 * self._n_links)
+
+    def add(self, ids: list[str], vectors: np.ndarray) -> None:
+        self.upsert(ids, vectors)
+
+    def upsert(self, ids: list[str], vectors: np.ndarray) -> None:
+        assert vectors.shape[1] == self.dim
+        self.delete([i for i in ids if i in self._slot_of])
+        for doc_id, v in zip(ids, _normalize(vectors), strict=True):
+            self._insert(doc_id, v)
+
+    def delete(self, ids: list[str]) -> int:
+        n = 0
+        for doc_id in ids:
+            node = self._slot_of.pop(doc_id, None)
+            if node is not None:
+                self._deleted.add(node)
+                n += 1
+        return n
+
+    def _search_layer(
+        self, q: np.ndarray, eps: list[int], ef: int, level: int
+    ) -> list[tuple[float, int]]:
+        sims = (self._vecs[eps] @ q).tolist()
+        visited = set(eps)
+        cand = [(-s, e) for s, e in zip(sims, eps, strict=True)]
+        best = [(s, e) for s, e in zip(sims, eps, strict=True)]
+        heapq.heapify(cand)
+        heapq.heapify(best)
+        while len(best) > ef:
+            heapq.heappop(best)
+        while cand:
+            neg, c = heapq.heappop(cand)
+            if len(best) >= ef and -neg < best[0][0]:
+                break
+            nbrs = [n for n in self._links[c][level] if n not in visited]
+            if not nbrs:
+                continue
+            visited.update(nbrs)
+            for s, n in zip((self._vecs[nbrs] @ q).tolist(), nbrs, strict=True):
+                if len(best) < ef or s > best[0][0]:
+                    heapq.heappush(cand, (-s, n))
+                    heapq.heappush(best, (s, n))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(best, reverse=True)
+
+    def _select(self, cands: list[tuple[float, int]], m: int) -> list[int]:
+        """Diversity heuristic: keep c only if it is closer to the base than to any kept node."""
+        kept: list[int] = []
+        pruned: list[int] = []
+        for s, c in cands:
+            if len(kept) >= m:
+                break
+            if not kept or bool(np.all(self._vecs[kept] @ self._vecs[c] < s)):
+                kept.append(c)
+            else:
+                pruned.append(c)
+        return kept + pruned[: m - len(kept)]
+
+    def _insert(self, doc_id: str, v: np.ndarray) -> None:
+        node = len(self.ids)
+        if node >= self._vecs.shape[0]:
+            grown = np.zeros((self._vecs.shape[0] * 2, self.dim), dtype=np.float32)
+            grown[:node] = self._vecs[:node]
+            self._vecs = grown
+        self._vecs[node] = v
+        self.ids.append(doc_id)
+        self._slot_of[doc_id] = node
+        level = int(-math.log(1.0 - self._rng.random()) * self._ml)
+        self._links.append([[] for _ in range(level + 1)])
+        if self._entry < 0:
+            self._entry, self._max_level = node, level
+            return
+
+        ep = [self._entry]
+        for lvl in range(self._max_level, level, -1):
+            ep = [self._search_layer(v, ep, 1, lvl)[0][1]]
+        for lvl in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(v, ep, self.ef_construction, lvl)
+            m_max = self.M0 if lvl == 0 else self.M
+            self._links[node][lvl] = self._select(found, self.M)
+            self._n_links += len(self._links[node][lvl])
+            for n in self._links[node][lvl]:
+                nl = self._links[n][lvl]
+                nl.append(node)
+                if len(nl) > m_max:
+                    sims = self._vecs[nl] @ self._vecs[n]
+                    order = np.argsort(-sims)
+                    kept = self._select([(float(sims[i]), nl[i]) for i in order], m_max)
+                    self._n_links -= len(nl) - len(kept)
+                    self._links[n][lvl] = kept
+                self._n_links += 1
+            ep = [n for _, n in found]
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+
+    def search(self, q: np.ndarray, k: int) -> list[tuple[str, float]]:
+        if not self._slot_of or k <= 0:
+            return []
+        q = _normalize(q)
+        ep = [self._entry]
+        for lvl in range(self._max_level, 0, -1):
+            ep = [self._search_layer(q, ep, 1, lvl)[0][1]]
+        found = self._search_layer(q, ep, max(self.ef_search, k), 0)
+        hits = [(s, n) for s, n in found if n not in self._deleted][:k]
+        return [(self.ids[n], s) for s, n in hits]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[list[tuple[str, float]]]:
+        return [self.search(q, k) for q in np.atleast_2d(Q)]
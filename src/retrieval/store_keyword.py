@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+
+from ..utils.text import tokenize
+from ..utils.tfidf import feature_hash
+
+
+class InvertedIndex:
+    """
+    Keyword index with per-term posting lists and BM25 scoring (pure NumPy).
+    - Postings are stored CSC-style: rows for term t are doc_ids[term_ptr[t]:term_ptr[t+1]].
+    - The BM25 tf/length part is precomputed per posting ("impact"), so a query only
+      gathers its own terms' postings, multiplies by IDF and accumulates.
+    - Query cost is O(sum of posting-list lengths), independent of corpus size.
+    - `n_features` > 0 hashes terms (utils.tfidf.feature_hash) instead of keeping a
+      vocabulary: term ids are then stable across index segments and builds.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, n_features: int = 0):
+        self.k1 = k1
+        self.b = b
+        self.n_features = n_features
+        self.ids: list[str] = []
+        self.vocab_: dict[str, int] = {}
+        self.idf_: np.ndarray = np.zeros(0, dtype=np.float32)
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.impacts = np.zeros(0, dtype=np.float32)
+        self.n_docs_ = 0
+        self.avgdl_ = 0.0
+
+    def _tokenize(self, s: str) -> list[str]:
+        return tokenize(s)
+
+    def impacts_of(self, tf: np.ndarray, doc_len: np.ndarray) -> np.ndarray:
+        """BM25 tf/length factor of postings with term counts `tf` in docs of `doc_len`."""
+        norm = self.k1 * (1.0 - self.b + self.b * doc_len / max(self.avgdl_, 1e-8))
+        return (tf * (self.k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def fit(
+        self, ids: list[str], corpus: list[str], reference: InvertedIndex | None = None
+    ) -> InvertedIndex:
+        """
+        Build postings for `corpus`. With `reference`, IDF and average length come from that
+        (larger, already fitted) index, so scores of the two are comparable: used for the
+        small delta segment of incremental ingestion until the next full refit.
+        """
+        assert len(ids) == len(corpus)
+        self.ids = list(ids)
+        vocab: dict[str, int] = {}
+        terms: list[int] = []
+        rows: list[int] = []
+        tfs: list[int] = []
+        doc_len = np.zeros(len(corpus), dtype=np.float32)
+        n_features = self.n_features
+        for row, doc in enumerate(corpus):
+            toks = self._tokenize(doc)
+            doc_len[row] = len(toks)
+            if n_features:
+                toks = [feature_hash(tok, n_features) for tok in toks]  # type: ignore[misc]
+            for tok, c in Counter(toks).items():
+                terms.append(tok if n_features else vocab.setdefault(tok, len(vocab)))
+                rows.append(row)
+                tfs.append(c)
+        self.vocab_ = vocab
+
+        term_arr = np.asarray(terms, dtype=np.int32)
+        order = np.argsort(term_arr, kind="stable")  # keeps rows ascending within a term
+        self.doc_ids = np.asarray(rows, dtype=np.int32)[order]
+        tf = np.asarray(tfs, dtype=np.float32)[order]
+        df = np.bincount(term_arr, minlength=n_features or len(vocab))
+        self.term_ptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+
+        n = len(corpus)
+        if reference is None:
+            self.n_docs_ = n
+            self.avgdl_ = float(doc_len.sum(dtype=np.float64)) / n if n else 0.0
+            self.idf_ = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        else:
+            self.n_docs_ = reference.n_docs_ + n
+            self.avgdl_ = reference.avgdl_
+            self.idf_ = np.log(1.0 + (self.n_docs_ - df + 0.5) / (df + 0.5)).astype(np.float32)
+            if n_features:
+                known = np.diff(reference.term_ptr) > 0
+                self.idf_[known] = reference.idf_[known]
+            for tok, t in vocab.items():
+                ref_t = reference.vocab_.get(tok)
+                if ref_t is not None:
+                    self.idf_[t] = reference.idf_[ref_t]
+        self.impacts = self.impacts_of(tf, doc_len[self.doc_ids])
+        return self
+
+    def query_terms(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """Term ids of `query` in the vocabulary and their weights (IDF x count in query)."""
+        if self.n_features:
+            ptr, n = self.term_ptr, self.n_features
+            hashed = (feature_hash(tok, n) for tok in self._tokenize(query))
+            qtf = Counter(t for t in hashed if ptr[t + 1] > ptr[t])
+            terms = np.fromiter(qtf, dtype=np.int64, count=len(qtf))
+        else:
+            qtf = Counter(t for t in self._tokenize(query) if t in self.vocab_)
+            terms = np.fromiter((self.vocab_[tok] for tok in qtf), dtype=np.int64, count=len(qtf))
+        weights = np.asarray(
+            [self.idf_[t] * c for t, c in zip(terms.tolist(), qtf.values(), strict=True)],
+            dtype=np.float32,
+        )
+        return terms, weights
+
+    def score_terms(
+        self, terms: np.ndarray, weights: np.ndarray, lo: int = 0, hi: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) for documents in rows [lo, hi) containing at least one of `terms`."""
+        if terms.size == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        rows_parts: list[np.ndarray] = []
+        contrib_parts: list[np.ndarray] = []
+        for t, w in zip(terms.tolist(), weights, strict=True):
+            a, b = int(self.term_ptr[t]), int(self.term_ptr[t + 1])
+            if lo > 0 or hi is not None:  # postings are sorted by row
+                posting = self.doc_ids[a:b]
+                b = a + int(np.searchsorted(posting, hi)) if hi is not None else b
+                a += int(np.searchsorted(posting, lo))
+            rows_parts.append(self.doc_ids[a:b])
+            contrib_parts.append(self.impacts[a:b] * w)
+        if len(rows_parts) == 1:
+            return rows_parts[0], contrib_parts[0]
+        rows, inv = np.unique(np.concatenate(rows_parts), return_inverse=True)
+        scores = np.bincount(inv, weights=np.concatenate(contrib_parts), minlength=rows.size)
+        return rows.astype(np.int32), scores.astype(np.float32)
+
+    def score_rows(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """Return (rows, scores) for every document containing at least one query term."""
+        return self.score_terms(*self.query_terms(query))
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        rows, scores = self.score_rows(query)
+        if rows.size == 0 or k <= 0:
+            return []
+        if rows.size > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[part], scores[part]
+        order = np.lexsort((rows, -scores))  # score desc, row asc on ties
+        return [(self.ids[rows[i]], float(scores[i])) for i in order]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.term_ptr.nbytes + self.doc_ids.nbytes + self.impacts.nbytes)
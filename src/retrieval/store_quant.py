@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from .store_vector import InMemoryVectorStore, _normalize, _top_k_rows
+
+_INT8_MAX = 127.0
+
+
+def quantize(
+    X: np.ndarray, mode: str, dim_scale: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Codes for float32 rows `X`, and per-row scales (int8 without `dim_scale`, else None).
+    - "float16": a plain cast.
+    - "int8": symmetric, x ~= code * scale, with one scale per row or the given per-dimension
+      `dim_scale` (values beyond it are clipped).
+    """
+    if mode == "float16":
+        return X.astype(np.float16), None
+    if dim_scale is not None:
+        return np.clip(np.rint(X / dim_scale), -_INT8_MAX, _INT8_MAX).astype(np.int8), None
+    scales = np.abs(X).max(axis=1) / _INT8_MAX
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(X / scales[:, None]), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedVectorStore:
+    """
+    Exact cosine search contract (InMemoryVectorStore) over float16 or int8 codes.
+    - A search scans the codes for the `rescore * k` best slots, then rescores those from
+      the float32 vectors. Only the shortlisted rows are read from them, so they can stay in
+      the INDEX_DIR memory map while the codes (1/2 or 1/4 the size) are what gets scanned.
+    - int8 `scale`: "vector" (one scale per row) or "dim" (one per dimension, fitted on the
+      first batch like the IVF quantizer).
+    - Writes go to the wrapped float32 store; codes follow its slots.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        mode: str = "int8",
+        scale: str = "vector",
+        rescore: int = 4,
+        chunk: int = 2048,  # rows cast to float32 at a time: keep it cache-sized
+        compact_ratio: float = 0.25,
+    ):
+        assert mode in ("float16", "int8") and scale in ("vector", "dim")
+        self.dim = dim
+        self.mode = mode
+        self.scale = scale
+        self.rescore = rescore
+        self.chunk = chunk
+        self.compact_ratio = compact_ratio
+        self.store = InMemoryVectorStore(dim, compact_ratio=math.inf)
+        self.dim_scale: np.ndarray | None = None
+        dtype = np.float16 if mode == "float16" else np.int8
+        self._codes = np.zeros((0, dim), dtype=dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+
+    @classmethod
+    def wrap(cls, ids: list[str], vecs: np.ndarray, **kwargs) -> QuantizedVectorStore:
+        """Quantize already-normalized vectors, keeping `vecs` (e.g. an mmap) for rescoring."""
+        store = cls(vecs.shape[1], **kwargs)
+        store.store = InMemoryVectorStore.wrap(ids, vecs)
+        store.store.compact_ratio = math.inf
+        store._encode(np.arange(len(ids)))
+        return store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes scanned per search: codes and scales (the float32 rows are the corpus's)."""
+        d = 0 if self.dim_scale is None else self.dim_scale.nbytes
+        return int(self._codes.nbytes + self._scales.nbytes + self.store.alive.nbytes + d)
+
+    def _encode(self, slots: np.ndarray) -> None:
+        used = len(self.store.ids)
+        if self._codes.shape[0] < used:
+            cap = max(used, 2 * self._codes.shape[0])
+            codes = np.zeros((cap, self.dim), dtype=self._codes.dtype)
+            codes[: self._codes.shape[0]] = self._codes
+            scales = np.ones(cap, dtype=np.float32)
+            scales[: self._scales.size] = self._scales
+            self._codes, self._scales = codes, scales
+        vecs = self.store.vecs
+        if self.mode == "int8" and self.scale == "dim" and self.dim_scale is None:
+            peak = np.abs(vecs[slots]).max(axis=0) if slots.size else np.ones(self.dim)
+            self.dim_scale = np.where(peak > 0, peak / _INT8_MAX, 1.0).astype(np.float32)
+        for a in range(0, slots.size, self.chunk):
+            part = slots[a : a + self.chunk]
+            codes, scales = quantize(np.asarray(vecs[part]), self.mode, self.dim_scale)
+            self._codes[part] = codes
+            if scales is not None:
+                self._scales[part] = scales
+
+    def add(self, ids: list[str], vectors: np.ndarray) -> None:
+        self.upsert(ids, vectors)
+
+    def upsert(self, ids: list[str], vectors: np.ndarray) -> None:
+        self.store.upsert(ids, vectors)
+        self._encode(self.store.slots(ids))
+
+    def delete(self, ids: list[str]) -> int:
+        n = self.store.delete(ids)
+        dead = len(self.store.ids) - len(self.store)
+        if dead > self.compact_ratio * max(len(self.store.ids), 1):
+            keep = self.store.compact()
+            if keep is not None:
+                self._codes = self._codes[keep]
+                self._scales = self._scales[keep]
+        return n
+
+    def coarse(self, Q: np.ndarray) -> np.ndarray:
+        """Approximate similarities of normalized queries `Q` to every used slot."""
+        n = len(self.store.ids)
+        Qs = Q * self.dim_scale if self.dim_scale is not None else Q
+        sims = np.empty((Q.shape[0], n), dtype=np.float32)
+        for a in range(0, n, self.chunk):
+            b = min(a + self.chunk, n)
+            sims[:, a:b] = Qs @ self._codes[a:b].astype(np.float32).T
+        if self.mode == "int8" and self.dim_scale is None:
+            sims *= self._scales[:n]
+        return sims
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[list[tuple[str, float]]]:
+        Q = _normalize(np.atleast_2d(Q))
+        if not len(self) or k <= 0:
+            return [[] for _ in range(Q.shape[0])]
+        sims = self.coarse(Q)
+        alive = self.store.alive
+        if len(self) < alive.size:
+            sims[:, ~alive] = -np.inf
+        short = _top_k_rows(sims, min(self.rescore * k, len(self)))
+        vecs, ids = self.store.vecs, self.store.ids
+        out: list[list[tuple[str, float]]] = []
+        for q, slots in zip(Q, short, strict=True):
+            slots = np.sort(slots)  # sequential reads from the memory map
+            exact = vecs[slots] @ q
+            top = _top_k_rows(exact[None, :], min(k, slots.size))[0]
+            out.append([(ids[slots[t]], float(exact[t])) for t in top])  # type: ignore[misc]
+        return out
+
+    def search(self, q: np.ndarray, k: int) -> list[tuple[str, float]]:
+        return self.search_batch(q[None, :], k)[0]
@@ -3,26 +3,167 @@ from __future__ import annotations
 import numpy as np
 
 
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-8)
+
+
+def _top_k(sims: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores (score desc, position asc on ties) via argpartition."""
+    if k <= 0 or sims.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if sims.size > k:
+        part = np.argpartition(-sims, k - 1)[:k]
+        # argpartition keeps arbitrary members of a tie at the k-th score: take the first
+        kth = sims[part].min()
+        better = np.flatnonzero(sims > kth)
+        part = np.concatenate([better, np.flatnonzero(sims == kth)[: k - better.size]])
+    else:
+        part = np.arange(sims.size)
+    return part[np.lexsort((part, -sims[part]))]
+
+
+def _top_k_rows(sims: np.ndarray, k: int) -> np.ndarray:
+    """Column positions of the k best scores per row (score desc, position asc on ties)."""
+    n = sims.shape[1]
+    if k < n:
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), (sims.shape[0], n))
+    top = np.take_along_axis(sims, part, axis=1)
+    order = np.lexsort((part, -top), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
 class InMemoryVectorStore:
-    def __init__(self, dim: int):
+    """
+    Exact cosine-similarity vector store (pure NumPy).
+    - Vectors are L2-normalized on insert, so a search is a single matmul.
+    - Rows live in an over-allocated buffer that grows geometrically (amortized appends).
+    - `delete` tombstones a slot; `compact` reclaims slots once enough are dead.
+    - `search_batch` scores many queries with one matrix-matrix product.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024, compact_ratio: float = 0.25):
         self.dim = dim
-        self.ids: list[str] = []
-        self.vecs: np.ndarray | None = None
+        self.compact_ratio = compact_ratio
+        self.ids: list[str | None] = []  # slot -> id (None for tombstones)
+        self._slot_of: dict[str, int] = {}
+        self._buf = np.zeros((max(capacity, 1), dim), dtype=np.float32)
+        self._alive = np.zeros(max(capacity, 1), dtype=bool)
+        self._dead = 0
+
+    @classmethod
+    def wrap(cls, ids: list[str], vecs: np.ndarray) -> InMemoryVectorStore:
+        """
+        Adopt already-normalized vectors without copying (e.g. a read-only np.load mmap).
+        The buffer is copied into private memory on the first write.
+        """
+        store = cls(vecs.shape[1], capacity=1)
+        store.ids = list(ids)
+        store._slot_of = {doc_id: s for s, doc_id in enumerate(store.ids)}
+        store._buf = vecs
+        store._alive = np.ones(len(store.ids), dtype=bool)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @property
+    def vecs(self) -> np.ndarray:
+        """Normalized vectors for every used slot (tombstoned rows are zero)."""
+        return self._buf[: len(self.ids)]
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Liveness mask for every used slot."""
+        return self._alive[: len(self.ids)]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._buf.nbytes + self._alive.nbytes)
+
+    def _reserve(self, n: int) -> None:
+        if n <= self._buf.shape[0] and self._buf.flags.writeable:
+            return
+        cap = max(self._buf.shape[0], 1)
+        while cap < n:
+            cap *= 2
+        buf = np.zeros((cap, self.dim), dtype=np.float32)
+        buf[: len(self.ids)] = self._buf[: len(self.ids)]
+        alive = np.zeros(cap, dtype=bool)
+        alive[: len(self.ids)] = self._alive[: len(self.ids)]
+        self._buf, self._alive = buf, alive
 
     def add(self, ids: list[str], vectors: np.ndarray) -> None:
+        self.upsert(ids, vectors)
+
+    def upsert(self, ids: list[str], vectors: np.ndarray) -> None:
         assert vectors.shape[1] == self.dim
-        self.ids.extend(ids)
-        if self.vecs is None:
-            self.vecs = vectors.astype(np.float32)
-        else:
-            self.vecs = np.vstack([self.vecs, vectors.astype(np.float32)])
+        assert len(ids) == vectors.shape[0]
+        vectors = _normalize(vectors)
+        slots = np.empty(len(ids), dtype=np.int64)
+        self._reserve(len(self.ids) + len(ids))
+        for j, doc_id in enumerate(ids):
+            slot = self._slot_of.get(doc_id)
+            if slot is None:
+                slot = len(self.ids)
+                self.ids.append(doc_id)
+                self._slot_of[doc_id] = slot
+            slots[j] = slot
+        self._buf[slots] = vectors
+        self._alive[slots] = True
+
+    def delete(self, ids: list[str]) -> int:
+        self._reserve(len(self.ids))
+        slots = [s for s in (self._slot_of.pop(i, None) for i in ids) if s is not None]
+        for s in slots:
+            self.ids[s] = None
+        self._buf[slots] = 0.0
+        self._alive[slots] = False
+        self._dead += len(slots)
+        if self._dead > self.compact_ratio * max(len(self.ids), 1):
+            self.compact()
+        return len(slots)
+
+    def compact(self) -> np.ndarray | None:
+        """
+        Drop tombstoned slots, preserving the relative order of live rows.
+        Returns the old slot of every surviving row (None if nothing moved).
+        """
+        if not self._dead:
+            return None
+        keep = np.flatnonzero(self._alive[: len(self.ids)])
+        live = self._buf[keep]
+        self.ids = [self.ids[s] for s in keep.tolist()]
+        self._slot_of = {doc_id: s for s, doc_id in enumerate(self.ids)}  # type: ignore[misc]
+        self._buf[: keep.size] = live
+        self._buf[keep.size :] = 0.0
+        self._alive[:] = False
+        self._alive[: keep.size] = True
+        self._dead = 0
+        return keep
+
+    def slots(self, ids: list[str]) -> np.ndarray:
+        return np.fromiter((self._slot_of[i] for i in ids), dtype=np.int64, count=len(ids))
+
+    def get(self, doc_id: str) -> np.ndarray | None:
+        slot = self._slot_of.get(doc_id)
+        return None if slot is None else self._buf[slot]
+
+    def search_batch(self, Q: np.ndarray, k: int) -> list[list[tuple[str, float]]]:
+        Q = np.atleast_2d(np.asarray(Q, dtype=np.float32))
+        if not self._slot_of or k <= 0:
+            return [[] for _ in range(Q.shape[0])]
+        sims = _normalize(Q) @ self.vecs.T
+        if self._dead:
+            sims[:, ~self._alive[: len(self.ids)]] = -np.inf
+        top = _top_k_rows(sims, min(k, len(self._slot_of)))
+        return [
+            [(self.ids[s], float(sims[r, s])) for s in row]  # type: ignore[misc]
+            for r, row in enumerate(top.tolist())
+        ]
 
     def search(self, q: np.ndarray, k: int) -> list[tuple[str, float]]:
-        if self.vecs is None or len(self.ids) == 0:
-            return []
-        q = q.astype(np.float32)
-        sims = (self.vecs @ q) / (
-            np.linalg.norm(self.vecs, axis=1) * (np.linalg.norm(q) + 1e-8) + 1e-8
-        )
-        idx = np.argsort(-sims)[:k]
-        return [(self.ids[i], float(sims[i])) for i in idx]
+        return self.search_batch(q[None, :], k)[0]
@@ -0,0 +1,288 @@
+"""
+Request-scoped trace spans and optional profiling, for finding out why one request is slow.
+
+    trace, _ = start("cprofile")       # None unless tracing this request
+    with activate(trace):
+        with span("hybrid_search", k=6) as s:
+            s["cache"] = "miss"
+    trace.finish()                      # {"trace_id", "total_ms", "spans", "profile"}
+
+The active trace lives in a ContextVar, so tasks and executor calls started with a copied
+context record into it. With no active trace, `span` returns a shared no-op after one
+ContextVar lookup, and `record` returns immediately.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import cProfile
+import json
+import os
+from pathlib import Path
+import pstats
+import random
+import sys
+import threading
+import time
+from typing import Any
+from uuid import uuid4
+
+PROFILERS = ("cprofile", "sample")
+
+_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+_parent: ContextVar[int | None] = ContextVar("trace_parent", default=None)
+# cProfile and the sampler observe the whole process, so one profiled request at a time
+_profile_lock = threading.Lock()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        return None
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_prev", "attrs", "id", "trace")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict[str, Any]):
+        self.trace = trace
+        self.attrs = {"id": None, "parent": None, "name": name, **attrs}  # the recorded span
+
+    def __enter__(self) -> _Span:
+        self._prev = _parent.get()
+        self.id = self.trace._open(self._prev, self.attrs)
+        _parent.set(self.id)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, _tb: Any) -> None:
+        # set, not reset(token): async generators may exit in another context
+        _parent.set(self._prev)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace._close(self.id)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack each `interval_s` on a daemon thread and counts
+    collapsed stacks ("outer;...;leaf"), the flame-graph input format.
+    - Idle threads show up in their wait call (e.g. the event loop in `select`).
+    """
+
+    def __init__(self, interval_s: float = 0.005, max_depth: int = 64):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-sampler", daemon=True)
+
+    def start(self) -> SamplingProfiler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval_s):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                thread = names.get(tid) or str(tid)
+                self.stacks[";".join([thread, *reversed(stack)])] += 1
+
+    def result(self, top: int = 50) -> dict[str, Any]:
+        return {
+            "kind": "sample",
+            "interval_ms": self.interval_s * 1000,
+            "samples": self.samples,
+            "stacks": [{"stack": s, "count": n} for s, n in self.stacks.most_common(top)],
+        }
+
+
+def _cprofile_result(prof: cProfile.Profile, top: int = 40) -> dict[str, Any]:
+    stats = pstats.Stats(prof).stats  # {(file, line, func): (cc, nc, tt, ct, callers)}
+    rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top]
+    return {
+        "kind": "cprofile",
+        "top": [
+            {
+                "func": f"{os.path.basename(file)}:{line}({func})",
+                "calls": nc,
+                "tottime_ms": round(tt * 1000, 3),
+                "cumtime_ms": round(ct * 1000, 3),
+            }
+            for (file, line, func), (_cc, nc, tt, ct, _callers) in rows
+        ],
+    }
+
+
+class Trace:
+    """
+    Spans of one request: flat list of {id, parent, name, start_ms, ms, **attrs}, with
+    start_ms relative to the trace start. Thread-safe; spans may come from executor threads.
+    - profiler "cprofile" profiles the thread that created the trace (the event loop);
+      "sample" samples every thread. Both see other concurrent requests too.
+    """
+
+    def __init__(self, profiler: str | None = None, sample_interval_s: float = 0.005):
+        self.trace_id = uuid4().hex
+        self.t0 = time.perf_counter()
+        self.spans: list[dict[str, Any]] = []
+        self._starts: list[float] = []
+        self._lock = threading.Lock()
+        self._profiler: cProfile.Profile | SamplingProfiler | None = None
+        self._profile: dict[str, Any] | None = None
+        self._result: dict[str, Any] | None = None
+        if profiler:
+            self._start_profiler(profiler, sample_interval_s)
+
+    def _start_profiler(self, kind: str, interval_s: float) -> None:
+        if kind not in PROFILERS:
+            self._profile = {"kind": kind, "error": f"unknown profiler, use {PROFILERS}"}
+        elif not _profile_lock.acquire(blocking=False):
+            self._profile = {"kind": kind, "error": "another request is being profiled"}
+        elif kind == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = SamplingProfiler(interval_s).start()
+
+    def _open(self, parent: int | None, span: dict[str, Any]) -> int:
+        now = time.perf_counter()
+        with self._lock:
+            span["id"], span["parent"] = len(self.spans), parent
+            self.spans.append(span)
+            self._starts.append(now)
+            return span["id"]
+
+    def _close(self, span_id: int) -> None:
+        now = time.perf_counter()
+        span, start = self.spans[span_id], self._starts[span_id]
+        span["start_ms"] = round((start - self.t0) * 1000, 3)
+        span["ms"] = round((now - start) * 1000, 3)
+
+    def record(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """Add a finished span from perf_counter stamps the caller already took."""
+        with self._lock:
+            self.spans.append(
+                {
+                    "id": len(self.spans),
+                    "parent": _parent.get(),
+                    "name": name,
+                    **attrs,
+                    "start_ms": round((start - self.t0) * 1000, 3),
+                    "ms": round((end - start) * 1000, 3),
+                }
+            )
+            self._starts.append(start)
+
+    def finish(self) -> dict[str, Any]:
+        """Stop any profiler and return the JSON-ready trace (idempotent)."""
+        if self._result is not None:
+            return self._result
+        prof, self._profiler = self._profiler, None
+        if isinstance(prof, cProfile.Profile):
+            prof.disable()
+            self._profile = _cprofile_result(prof)
+            _profile_lock.release()
+        elif isinstance(prof, SamplingProfiler):
+            prof.stop()
+            self._profile = prof.result()
+            _profile_lock.release()
+        out: dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+            "spans": self.spans,
+        }
+        if self._profile is not None:
+            out["profile"] = self._profile
+        self._result = out
+        return out
+
+    def save(self, directory: str | Path) -> Path:
+        path = Path(directory) / f"{self.trace_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.finish()), encoding="utf-8")
+        return path
+
+
+def start(
+    header: str | None,
+    allow_header: bool = True,
+    sample_rate: float = 0.0,
+    profiler: str = "",
+    sample_interval_ms: float = 5.0,
+) -> tuple[Trace | None, bool]:
+    """
+    (trace, requested) for a new request: traced when the X-Trace header asks for it
+    ("1"/"spans", or a profiler name) and `allow_header`, else with probability
+    `sample_rate` using `profiler`. `requested` says the client asked for the result.
+    """
+    interval_s = sample_interval_ms / 1000
+    if header and allow_header:
+        mode = header.strip().lower()
+        kind = None if mode in ("1", "true", "spans") else mode
+        return Trace(kind, interval_s), True
+    if sample_rate > 0 and random.random() < sample_rate:
+        return Trace(profiler or None, interval_s), False
+    return None, False
+
+
+def current() -> Trace | None:
+    return _trace.get()
+
+
+@contextmanager
+def activate(trace: Trace | None) -> Iterator[Trace | None]:
+    """Make `trace` the active trace for this context (and tasks it starts)."""
+    prev, prev_parent = _trace.get(), _parent.get()
+    _trace.set(trace)
+    _parent.set(None)
+    try:
+        yield trace
+    finally:
+        _trace.set(prev)
+        _parent.set(prev_parent)
+
+
+def span(name: str, **attrs: Any) -> _Span | _NullSpan:
+    """Timed child of the current span; a shared no-op when nothing is being traced."""
+    trace = _trace.get()
+    if trace is None:
+        return _NULL
+    return _Span(trace, name, attrs)
+
+
+def record(name: str, start: float, end: float, **attrs: Any) -> None:
+    trace = _trace.get()
+    if trace is not None:
+        trace.record(name, start, end, **attrs)
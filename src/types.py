@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class ChatFilters(BaseModel):
@@ -20,5 +21,27 @@ class ChatRequest(BaseModel):
 
 class RetrieveRequest(BaseModel):
     query: str
-    k: int = 5
+    k: int = Field(default=5, ge=1, le=100)
     filters: ChatFilters | None = None
+
+
+class IngestItem(BaseModel):
+    id: str
+    slug: str
+    title: str
+    url: str
+    published_at: str  # YYYY-MM-DD
+    excerpt: str = ""
+    topics: list[str] = []
+    snippet: str = ""
+
+    @field_validator("published_at")
+    @classmethod
+    def _check_date(cls, v: str) -> str:
+        datetime.strptime(v, "%Y-%m-%d")  # ValueError -> 422
+        return v
+
+
+class IngestRequest(BaseModel):
+    upsert: list[IngestItem] = []
+    delete: list[str] = []
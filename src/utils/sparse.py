@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+
+
+def coo_matmul(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    vals: np.ndarray,
+    n_rows: int,
+    Q: CsrMatrix,
+    budget: int = 1 << 24,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Sparse entries (rows, cols, vals) of an (n_rows, n_cols) matrix P times every query row
+    of `Q` (P @ Q.T) in one vectorized pass: per query, the rows with a product (sorted)
+    and their scores (float32, summed in float64). A (row, col) pair must appear at most
+    once. Work is the entries each query matches, as in separate products; a batch that
+    would expand to more than `budget` products is split in two.
+    """
+    order = np.argsort(Q.indices, kind="stable")  # Q by column: the queries using each
+    q_cols, q_rows, q_vals = Q.indices[order], Q.row_ids[order], Q.data[order]
+    start = np.searchsorted(q_cols, cols, "left")
+    rep = np.searchsorted(q_cols, cols, "right") - start
+    total = int(rep.sum())
+    if total > budget and len(Q) > 1:
+        mid = len(Q) // 2
+        return coo_matmul(rows, cols, vals, n_rows, Q.row_slice(0, mid), budget) + coo_matmul(
+            rows, cols, vals, n_rows, Q.row_slice(mid, len(Q)), budget
+        )
+    entry = np.repeat(np.arange(cols.size), rep)
+    pos = np.arange(total) + np.repeat(start - (np.cumsum(rep) - rep), rep)
+    key = q_rows[pos].astype(np.int64) * n_rows + rows[entry]
+    keys, inv = np.unique(key, return_inverse=True)
+    sums = np.bincount(inv, vals[entry] * q_vals[pos].astype(np.float64), minlength=keys.size)
+    bounds = np.searchsorted(keys, np.arange(len(Q) + 1, dtype=np.int64) * n_rows)
+    return [
+        ((keys[a:b] - j * n_rows).astype(np.int32), sums[a:b].astype(np.float32))
+        for j, (a, b) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist(), strict=True))
+    ]
+
+
+class CsrMatrix:
+    """
+    Minimal compressed-sparse-row matrix (pure NumPy) to avoid scipy.
+    - indptr[i]:indptr[i+1] slices `indices`/`data` for row i.
+    - Column indices are sorted within each row.
+    - Memory is O(nnz + rows), never O(rows * cols).
+    """
+
+    __slots__ = ("_row_ids", "data", "indices", "indptr", "shape")
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        shape: tuple[int, int],
+    ):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.shape = (int(shape[0]), int(shape[1]))
+        self._row_ids: np.ndarray | None = None
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[tuple[Iterable[int], Iterable[float]]], n_cols: int
+    ) -> CsrMatrix:
+        """Build from (column indices, values) pairs, one pair per row."""
+        indptr = [0]
+        indices: list[int] = []
+        data: list[float] = []
+        for cols, vals in rows:
+            pairs = sorted(zip(cols, vals, strict=True))
+            indices.extend(c for c, _ in pairs)
+            data.extend(v for _, v in pairs)
+            indptr.append(len(indices))
+        return cls(
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(data, dtype=np.float32),
+            (len(indptr) - 1, n_cols),
+        )
+
+    @classmethod
+    def from_scipy(cls, m) -> CsrMatrix:
+        """Adopt the buffers of a scipy.sparse matrix (e.g. sklearn's TF-IDF output)."""
+        m = m.tocsr()
+        m.sort_indices()
+        return cls(m.indptr, m.indices, m.data, m.shape)
+
+    @classmethod
+    def vstack(cls, mats: list[CsrMatrix], n_cols: int) -> CsrMatrix:
+        """Stack row blocks (copies); `n_cols` may exceed a block's width."""
+        offsets = np.cumsum([0] + [m.nnz for m in mats[:-1]])
+        indptr = np.concatenate(
+            [[0]] + [m.indptr[1:] + off for m, off in zip(mats, offsets, strict=True)]
+        )
+        return cls(
+            indptr,
+            np.concatenate([m.indices for m in mats]),
+            np.concatenate([m.data for m in mats]),
+            (sum(m.shape[0] for m in mats), n_cols),
+        )
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indices.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.indptr.nbytes + self.indices.nbytes + self.data.nbytes)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def row(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        a, b = self.indptr[i], self.indptr[i + 1]
+        return self.indices[a:b], self.data[a:b]
+
+    def row_slice(self, lo: int, hi: int) -> CsrMatrix:
+        """Rows [lo, hi) as a matrix sharing `indices`/`data` (only `indptr` is copied)."""
+        a, b = int(self.indptr[lo]), int(self.indptr[hi])
+        indptr = self.indptr[lo : hi + 1] - a
+        return CsrMatrix(indptr, self.indices[a:b], self.data[a:b], (hi - lo, self.shape[1]))
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Row number of every stored entry (computed once, O(nnz))."""
+        if self._row_ids is None:
+            counts = np.diff(self.indptr)
+            self._row_ids = np.repeat(np.arange(self.shape[0], dtype=np.int32), counts)
+        return self._row_ids
+
+    def dot_sparse(self, q_indices: np.ndarray, q_data: np.ndarray) -> np.ndarray:
+        """
+        Score every row against a sparse query vector: returns X @ q as a dense (rows,) array.
+        `q_indices` must be sorted and unique (as produced by `row`).
+        """
+        out_len = self.shape[0]
+        if q_indices.size == 0 or self.nnz == 0:
+            return np.zeros(out_len, dtype=np.float32)
+        pos = np.searchsorted(q_indices, self.indices)
+        np.minimum(pos, q_indices.size - 1, out=pos)
+        hit = q_indices[pos] == self.indices
+        weights = self.data[hit] * q_data[pos[hit]].astype(np.float64)
+        sims = np.bincount(self.row_ids[hit], weights=weights, minlength=out_len)
+        return sims.astype(np.float32)
+
+    def dot_sparse_batch(self, Q: CsrMatrix) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        X @ q for every row q of `Q`, with one pass over X for the whole batch: per query,
+        the rows sharing a column with it and their scores (coo_matmul); other rows score 0.
+        """
+        terms = np.unique(Q.indices)
+        if terms.size == 0 or self.nnz == 0:
+            empty = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+            return [empty] * len(Q)
+        pos = np.searchsorted(terms, self.indices)
+        np.minimum(pos, terms.size - 1, out=pos)
+        hit = terms[pos] == self.indices
+        return coo_matmul(self.row_ids[hit], self.indices[hit], self.data[hit], self.shape[0], Q)
+
+    def rows_any(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """For each row in `rows`, whether it stores an entry in any of `cols` (bool array)."""
+        starts = self.indptr[rows]
+        lens = self.indptr[rows + 1] - starts
+        total = int(lens.sum())
+        if total == 0 or cols.size == 0:
+            return np.zeros(rows.shape[0], dtype=bool)
+        owner = np.repeat(np.arange(rows.shape[0]), lens)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lens) - lens, lens)
+        hit = np.isin(self.indices[starts[owner] + offsets], cols)
+        return np.bincount(owner[hit], minlength=rows.shape[0]) > 0
+
+    def to_dense(self) -> np.ndarray:
+        X = np.zeros(self.shape, dtype=np.float32)
+        X[self.row_ids, self.indices] = self.data
+        return X
@@ -1,4 +1,15 @@
 import re
+import string
+
+# keyword tokens are runs of anything but whitespace and punctuation: ASCII punctuation
+# (and "_") and common typographic marks become spaces, so "GPT-4o," -> "gpt", "4o"
+_PUNCT = string.punctuation + (
+    "\u2018\u2019\u201c\u201d\u201e"  # curly quotes
+    "\u2013\u2014\u2026"  # en/em dash, ellipsis
+    "\u00ab\u00bb\u2039\u203a"  # guillemets
+    "\u00b7\u2022\u00bf\u00a1"  # middle dot, bullet, inverted ? and !
+)
+_SEPARATORS = str.maketrans(_PUNCT, " " * len(_PUNCT))
 
 
 def sentence_chunks(text: str, max_len: int = 200):
@@ -12,3 +23,13 @@ def sentence_chunks(text: str, max_len: int = 200):
             buf = (buf + " " + p).strip()
     if buf:
         yield buf + " "
+
+
+def normalize_query(q: str) -> str:
+    """Cache/scoring key for a query: case-folded, whitespace collapsed."""
+    return " ".join(q.lower().split())
+
+
+def tokenize(s: str) -> list[str]:
+    """Keyword tokens of `s`: lowercased, split on whitespace and punctuation (C string ops)."""
+    return s.lower().translate(_SEPARATORS).split()
@@ -2,16 +2,21 @@ from __future__ import annotations
 
 from collections import Counter
 import math
+import zlib
 
 import numpy as np
 
+from .sparse import CsrMatrix
+from .text import tokenize
+
 
 class SimpleTfidfVectorizer:
     """
     Minimal TF-IDF (pure Python + NumPy) to avoid scikit-learn/scipy.
-    - Tokenizes on basic whitespace & lowercases.
+    - Tokenizes with utils.text.tokenize (lowercased words, punctuation stripped).
     - Supports max_features cap.
-    - Methods: fit_transform(corpus) -> np.ndarray, transform(texts) -> np.ndarray
+    - Methods: fit_transform(corpus) -> CsrMatrix, transform(texts) -> CsrMatrix
+    - Output is sparse (CSR), so memory grows with nnz, not rows * vocabulary.
     """
 
     def __init__(self, max_features: int = 20000):
@@ -20,9 +25,23 @@ class SimpleTfidfVectorizer:
         self.idf_: np.ndarray | None = None
 
     def _tokenize(self, s: str) -> list[str]:
-        return [t for t in s.lower().split() if t]
+        return tokenize(s)
+
+    def _encode_row(self, toks: list[str]) -> tuple[list[int], list[float]]:
+        assert self.idf_ is not None
+        cnt = Counter(toks)
+        total = sum(cnt.values()) or 1
+        cols: list[int] = []
+        vals: list[float] = []
+        for tok, c in cnt.items():
+            idx = self.vocab_.get(tok)
+            if idx is None:
+                continue
+            cols.append(idx)
+            vals.append((c / total) * float(self.idf_[idx]))
+        return cols, vals
 
-    def fit_transform(self, corpus: list[str]) -> np.ndarray:
+    def fit_transform(self, corpus: list[str]) -> CsrMatrix:
         # build DF
         df: Counter[str] = Counter()
         tokenized = [self._tokenize(doc) for doc in corpus]
@@ -40,29 +59,64 @@ class SimpleTfidfVectorizer:
         self.idf_ = idf
 
         # build TF-IDF matrix
-        X = np.zeros((N, len(self.vocab_)), dtype=np.float32)
-        for row, toks in enumerate(tokenized):
-            cnt = Counter(toks)
-            total = sum(cnt.values()) or 1
-            for tok, c in cnt.items():
-                idx = self.vocab_.get(tok)
-                if idx is None:
-                    continue
-                tf = c / total
-                X[row, idx] = tf * idf[idx]
-        return X
-
-    def transform(self, texts: list[str]) -> np.ndarray:
+        return CsrMatrix.from_rows((self._encode_row(toks) for toks in tokenized), len(self.vocab_))
+
+    def transform(self, texts: list[str]) -> CsrMatrix:
         assert self.vocab_ and self.idf_ is not None, "Call fit_transform first."
-        X = np.zeros((len(texts), len(self.vocab_)), dtype=np.float32)
-        for row, s in enumerate(texts):
-            toks = self._tokenize(s)
-            cnt = Counter(toks)
-            total = sum(cnt.values()) or 1
-            for tok, c in cnt.items():
-                idx = self.vocab_.get(tok)
-                if idx is None:
-                    continue
-                tf = c / total
-                X[row, idx] = tf * self.idf_[idx]
-        return X
+        return CsrMatrix.from_rows(
+            (self._encode_row(self._tokenize(s)) for s in texts), len(self.vocab_)
+        )
+
+
+def feature_hash(tok: str, n_features: int) -> int:
+    """Stable (unsalted, unlike hash()) feature id of a token."""
+    return zlib.crc32(tok.encode()) % n_features
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF over a fixed hashed feature space: no vocabulary to fit or store.
+    - A token's column is crc32(token) % n_features; colliding tokens share a column.
+    - `counts(texts)` gives raw term counts per row, so a corpus can be counted chunk by
+      chunk; `fit_df(df, n_docs)` then sets the IDF from the summed document frequencies.
+    - Same weighting as SimpleTfidfVectorizer: tf / doc length x smoothed IDF.
+    """
+
+    def __init__(self, n_features: int = 1 << 20):
+        self.n_features = n_features
+        self.idf_: np.ndarray | None = None
+
+    def counts(self, texts: list[str]) -> CsrMatrix:
+        """Raw term counts (float32), columns sorted within each row."""
+        n = self.n_features
+        lens = np.zeros(len(texts), dtype=np.int64)
+        keys: list[int] = []
+        for r, text in enumerate(texts):
+            toks = tokenize(text)
+            lens[r] = len(toks)
+            keys.extend(r * n + zlib.crc32(t.encode()) % n for t in toks)
+        uniq, cnt = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+        rows = uniq // n
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(texts)), out=indptr[1:])
+        return CsrMatrix(indptr, uniq % n, cnt.astype(np.float32), (len(texts), n))
+
+    def fit_df(self, df: np.ndarray, n_docs: int) -> HashingTfidfVectorizer:
+        self.idf_ = (np.log((1 + n_docs) / (1 + df)) + 1.0).astype(np.float32)
+        return self
+
+    def weight(self, counts: CsrMatrix) -> CsrMatrix:
+        """TF-IDF rows from `counts` rows."""
+        assert self.idf_ is not None, "Call fit_df or fit_transform first."
+        rows = counts.row_ids
+        totals = np.bincount(rows, weights=counts.data, minlength=counts.shape[0])
+        data = counts.data / totals[rows] * self.idf_[counts.indices]
+        return CsrMatrix(counts.indptr, counts.indices, data, counts.shape)
+
+    def fit_transform(self, corpus: list[str]) -> CsrMatrix:
+        counts = self.counts(corpus)
+        df = np.bincount(counts.indices, minlength=self.n_features)
+        return self.fit_df(df, len(corpus)).weight(counts)
+
+    def transform(self, texts: list[str]) -> CsrMatrix:
+        return self.weight(self.counts(texts))
@@ -0,0 +1,37 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src.graph import answerer
+
+FIX = Path(__file__).resolve().parents[1] / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def fixtures():
+    """(items, snippets) from fixtures/."""
+    items = json.loads((FIX / "items.json").read_text(encoding="utf-8"))
+    snips = json.loads((FIX / "snippets.json").read_text(encoding="utf-8"))
+    return items, snips
+
+
+class StubModel:
+    """Chat model stand-in: streams "answer to <query> [1]" in two chunks after `delay_s`."""
+
+    def __init__(self):
+        self.delay_s = 0.0
+
+    async def astream_answer(self, query, *_args, **_kwargs):
+        await asyncio.sleep(self.delay_s)
+        yield f"answer to {query}"
+        yield " [1]"
+
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    """Route answerer.get_model() to a StubModel for the test."""
+    model = StubModel()
+    monkeypatch.setattr(answerer, "get_model", lambda: model)
+    return model
@@ -0,0 +1 @@
+"""Test doubles shared by the tests and the benchmarks: fake upstream servers and encoders."""
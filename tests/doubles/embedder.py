@@ -0,0 +1,32 @@
+"""
+HashEmbedder: a stand-in sentence encoder with the SentenceTransformer.encode signature. It
+maps token hashes through a fixed random projection, so it needs no model download.
+"""
+
+import zlib
+
+import numpy as np
+
+
+class HashEmbedder:
+    """Deterministic bag-of-hashed-tokens encoder with the SentenceTransformer.encode contract."""
+
+    def __init__(self, dim: int = 64, buckets: int = 4096, seed: int = 0):
+        self.dim = dim
+        self.buckets = buckets
+        self._proj = np.random.default_rng(seed).normal(size=(buckets, dim)).astype(np.float32)
+
+    def encode(
+        self, docs: list[str], batch_size: int = 32, normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        out = np.empty((len(docs), self.dim), dtype=np.float32)
+        for a in range(0, len(docs), batch_size):
+            batch = docs[a : a + batch_size]
+            counts = np.zeros((len(batch), self.buckets), dtype=np.float32)
+            for r, doc in enumerate(batch):
+                for tok in doc.lower().split():
+                    counts[r, zlib.crc32(tok.encode()) % self.buckets] += 1.0
+            out[a : a + len(batch)] = counts @ self._proj
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-8
+        return out
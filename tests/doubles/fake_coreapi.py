@@ -0,0 +1,111 @@
+"""
+In-process stand-in for the Core API (GET /search, /items/{slug}, /items?slugs=) over the
+fixture items, served by uvicorn on a free localhost port.
+
+    server = FakeCoreApi(latency_ms=10).start()
+    ... CORE_API_BASE=server.base_url USE_MOCKS=false ...
+    server.paths         # Counter of request paths
+    server.stop()
+
+`fail_first=n` answers the first n requests with 503 (for retry tests).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import json
+from pathlib import Path
+import re
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from .servers import ThreadedServer
+
+FIXTURES = Path(__file__).resolve().parents[2] / "fixtures"
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+class FakeCoreApi(ThreadedServer):
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        fail_first: int = 0,
+        items: list[dict[str, Any]] | None = None,
+        snippets: dict[str, str] | None = None,
+    ):
+        self.latency_s = latency_ms / 1000
+        self.fail_first = fail_first
+        self.items = items or json.loads((FIXTURES / "items.json").read_text(encoding="utf-8"))
+        snippets = snippets or json.loads((FIXTURES / "snippets.json").read_text(encoding="utf-8"))
+        self.by_slug = {
+            it["slug"]: {**it, "snippet": snippets.get(it["id"], "")} for it in self.items
+        }
+        self._terms = {
+            it["slug"]: _words(" ".join([it["title"], it.get("excerpt", "")])) for it in self.items
+        }
+        self.paths: Counter[str] = Counter()
+        super().__init__(
+            Starlette(
+                routes=[
+                    Route("/search", self._search, methods=["GET"]),
+                    Route("/items", self._items, methods=["GET"]),
+                    Route("/items/{slug}", self._item, methods=["GET"]),
+                ]
+            )
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def requests(self) -> int:
+        return sum(self.paths.values())
+
+    async def _enter(self, request: Request) -> JSONResponse | None:
+        self.paths[request.url.path] += 1
+        await asyncio.sleep(self.latency_s)
+        if self.requests <= self.fail_first:
+            return JSONResponse({"detail": "unavailable"}, status_code=503)
+        return None
+
+    async def _search(self, request: Request) -> JSONResponse:
+        if failed := await self._enter(request):
+            return failed
+        q = _words(request.query_params.get("q", ""))
+        k = int(request.query_params.get("k", 10))
+        topics = {t for t in request.query_params.get("topic", "").lower().split(",") if t}
+        since = request.query_params.get("since", "")
+        hits = []
+        for it in self.items:
+            if topics and not topics & {t.lower() for t in it.get("topics", [])}:
+                continue
+            if since and it["published_at"] < since:
+                continue
+            score = len(q & self._terms[it["slug"]]) / (len(q) or 1)
+            hits.append({"slug": it["slug"], "item_id": it["id"], "score": round(score, 4)})
+        hits.sort(key=lambda h: (-h["score"], h["slug"]))
+        return JSONResponse({"results": hits[:k]})
+
+    async def _item(self, request: Request) -> JSONResponse:
+        if failed := await self._enter(request):
+            return failed
+        it = self.by_slug.get(request.path_params["slug"])
+        if it is None:
+            return JSONResponse({"detail": "not found"}, status_code=404)
+        return JSONResponse(it)
+
+    async def _items(self, request: Request) -> JSONResponse:
+        if failed := await self._enter(request):
+            return failed
+        slugs = request.query_params.get("slugs", "").split(",")
+        return JSONResponse({"items": [self.by_slug[s] for s in slugs if s in self.by_slug]})
@@ -0,0 +1,133 @@
+"""
+In-process fake of the OpenAI endpoints the service uses (GET /v1/models and
+POST /v1/responses, streaming or not), served by uvicorn on a free localhost port.
+
+    server = FakeOpenAI(latency_ms=20).start()
+    server = FakeOpenAI(latency_ms=300, tokens_per_s=50, tokens=200).start()   # TTFT + rate
+    ... OPENAI_BASE_URL=server.base_url ...
+    server.connections   # distinct client sockets seen = TCP handshakes
+    server.stop()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from .servers import ThreadedServer
+
+ANSWER = "Fake answer citing the first source [1] and the second [2]."
+FILLER = ["the", "retrieved", "sources", "describe", "this", "in", "more", "detail"]
+
+
+def answer_text(tokens: int = 0) -> str:
+    """ANSWER, padded with filler words to `tokens` words when that is longer."""
+    words = ANSWER.split(" ")
+    words += [FILLER[i % len(FILLER)] for i in range(max(0, tokens - len(words)))]
+    return " ".join(words)
+
+
+def _response(model: str, text: str, prompt_words: int = 0) -> dict[str, Any]:
+    # usage counts words as tokens
+    out_words = len(text.split())
+    return {
+        "id": "resp_fake",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [
+            {
+                "id": "msg_fake",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": prompt_words,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": out_words,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": prompt_words + out_words,
+        },
+    }
+
+
+class FakeOpenAI(ThreadedServer):
+    """
+    latency_ms is the time to the first token (or the whole response when not streaming);
+    streamed words then arrive every chunk_ms, or at tokens_per_s when that is set.
+    tokens pads the answer to that many words.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        chunk_ms: float = 0.0,
+        tokens_per_s: float = 0.0,
+        tokens: int = 0,
+    ):
+        self.latency_s = latency_ms / 1000
+        self.chunk_s = 1.0 / tokens_per_s if tokens_per_s > 0 else chunk_ms / 1000
+        self.answer = answer_text(tokens)
+        self.connections: set[tuple[str, int]] = set()
+        self.requests = 0
+        super().__init__(
+            Starlette(
+                routes=[
+                    Route("/v1/models", self._models, methods=["GET"]),
+                    Route("/v1/responses", self._responses, methods=["POST"]),
+                ]
+            )
+        )
+
+    def _seen(self, request: Request) -> None:
+        if request.client:
+            self.connections.add((request.client.host, request.client.port))
+        self.requests += 1
+
+    async def _models(self, request: Request) -> JSONResponse:
+        self._seen(request)
+        data = [{"id": "fake", "object": "model", "created": 0, "owned_by": "fake"}]
+        return JSONResponse({"object": "list", "data": data})
+
+    async def _responses(self, request: Request):
+        self._seen(request)
+        body = await request.json()
+        await asyncio.sleep(self.latency_s)
+        prompt = body.get("input", [])
+        words = sum(len(m.get("content", "").split()) for m in prompt if isinstance(m, dict))
+        if not body.get("stream"):
+            return JSONResponse(_response(body.get("model", "fake"), self.answer, words))
+
+        async def events():
+            for i, word in enumerate(self.answer.split(" ")):
+                delta = word if i == 0 else " " + word
+                event = {"item_id": "msg_fake", "output_index": 0, "content_index": 0}
+                event.update(delta=delta, sequence_number=i)
+                yield _sse("response.output_text.delta", event)
+                await asyncio.sleep(self.chunk_s)
+            done = {"response": _response(body.get("model", "fake"), self.answer, words)}
+            yield _sse("response.completed", done)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+
+def _sse(kind: str, data: dict[str, Any]) -> str:
+    return f"event: {kind}\ndata: {json.dumps({'type': kind, **data})}\n\n"
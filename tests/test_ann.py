@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.retrieval.store_ann import HNSWIndex, IVFIndex
+from src.retrieval.store_vector import InMemoryVectorStore
+
+
+def _data(n=2000, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"d{i}" for i in range(n)]
+    return ids, rng.normal(size=(n, dim)).astype(np.float32), rng.normal(size=(50, dim))
+
+
+def _recall(index, exact, Q, k=10):
+    return np.mean(
+        [
+            len({h[0] for h in index.search(q, k)} & {h[0] for h in exact.search(q, k)}) / k
+            for q in Q
+        ]
+    )
+
+
+def test_ivf_full_probe_is_exact_and_partial_probe_has_good_recall():
+    ids, X, Q = _data()
+    exact = InMemoryVectorStore(8)
+    exact.add(ids, X)
+    ivf = IVFIndex(8, nlist=32, nprobe=32)
+    ivf.add(ids, X)
+    for q in Q[:10]:
+        assert [h[0] for h in ivf.search(q, 5)] == [h[0] for h in exact.search(q, 5)]
+    ivf.nprobe = 8
+    assert _recall(ivf, exact, Q) > 0.8
+
+
+def test_ivf_upsert_and_delete():
+    ids, X, _ = _data(n=300)
+    ivf = IVFIndex(8, nlist=8, nprobe=8)
+    ivf.add(ids, X)
+    ivf.delete(ids[:150])  # forces compaction
+    assert len(ivf) == 150
+    assert ivf.search(X[0], 1)[0][0] != "d0"
+    ivf.upsert(["d0"], X[0][None, :])
+    assert ivf.search(X[0], 1)[0][0] == "d0"
+
+
+def test_hnsw_recall_and_tombstones():
+    ids, X, Q = _data()
+    exact = InMemoryVectorStore(8)
+    exact.add(ids, X)
+    hnsw = HNSWIndex(8, M=8, ef_construction=64, ef_search=64)
+    hnsw.add(ids, X)
+    assert _recall(hnsw, exact, Q) > 0.95
+    hnsw.delete(["d7"])
+    assert all(h[0] != "d7" for h in hnsw.search(X[7], 10))
+    hnsw.upsert(["d7"], X[7][None, :])
+    n_links = sum(len(layer) for node in hnsw._links for layer in node)
+    assert hnsw.nbytes == hnsw._vecs.nbytes + 8 * n_links
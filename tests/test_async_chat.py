@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.app import app
+from src.retrieval import hybrid
+
+GEN_S = 0.5
+CHAT = {"message": "What's new in app dev?", "role": "user"}
+
+
+@pytest.fixture
+def slow_model(stub_model):
+    """Generation takes GEN_S seconds, like a long completion."""
+    hybrid.get_engine()  # warm outside the timed section
+    stub_model.delay_s = GEN_S
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t")
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("slow_model")
+async def test_health_stays_fast_during_long_generation():
+    async with _client() as client:
+        chat = asyncio.create_task(client.post("/agent/v1/chat/stream", json=CHAT))
+        await asyncio.sleep(GEN_S / 5)
+        t0 = time.perf_counter()
+        health = await client.get("/health")
+        health_s = time.perf_counter() - t0
+        resp = await chat
+    assert health.status_code == 200
+    assert health_s < GEN_S / 2
+    assert "event: token" in resp.text and "answer to" in resp.text
+    assert "event: done" in resp.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("slow_model")
+async def test_concurrent_streams_overlap():
+    async with _client() as client:
+        t0 = time.perf_counter()
+        resps = await asyncio.gather(
+            *(client.post("/agent/v1/chat/stream", json=CHAT) for _ in range(8))
+        )
+        total = time.perf_counter() - t0
+    assert all(r.status_code == 200 for r in resps)
+    assert total < 3 * GEN_S  # serialized would be 8 * GEN_S
@@ -0,0 +1,139 @@
+import asyncio
+import sqlite3
+import time
+from typing import Annotated
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.constants import END, START
+from langgraph.graph import StateGraph
+from pydantic import BaseModel, Field
+import pytest
+
+from src.config import settings
+from src.graph import graph
+from src.graph.checkpoint import BoundedMemorySaver, SqliteSaver
+from src.graph.graph import windowed_messages
+from src.types import ChatRequest
+
+
+class State(BaseModel):
+    messages: Annotated[list[AnyMessage], windowed_messages] = Field(default_factory=list)
+
+
+async def reply(state: State):
+    return {"messages": AIMessage(f"re: {state.messages[-1].content}")}
+
+
+def _app(saver):
+    g = StateGraph(State)
+    g.add_node("reply", reply)
+    g.add_edge(START, "reply")
+    g.add_edge("reply", END)
+    return g.compile(checkpointer=saver)
+
+
+async def _turn(app, thread_id: str, text: str = "hi") -> list[AnyMessage]:
+    out = await app.ainvoke(
+        {"messages": [HumanMessage(text)]}, {"configurable": {"thread_id": thread_id}}
+    )
+    return out["messages"]
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.mark.asyncio
+async def test_lru_keeps_most_recent_conversations():
+    saver = BoundedMemorySaver(max_threads=3)
+    app = _app(saver)
+    for t in "abcde":
+        await _turn(app, t)
+    await _turn(app, "c")
+    await _turn(app, "f")
+    assert saver.stats()["conversations"] == 3
+    assert saver.evicted == 3
+    assert set(saver.storage) == {"c", "e", "f"}
+    assert all(k[0] in {"c", "e", "f"} for k in saver.blobs)
+
+
+@pytest.mark.asyncio
+async def test_idle_conversations_expire():
+    clock = Clock()
+    saver = BoundedMemorySaver(idle_ttl_s=60, clock=clock)
+    app = _app(saver)
+    await _turn(app, "old")
+    clock.t = 30
+    await _turn(app, "recent")
+    clock.t = 61
+    await _turn(app, "new")
+    assert set(saver.storage) == {"recent", "new"}
+    # an expired conversation starts over
+    assert len(await _turn(app, "old")) == 2
+
+
+@pytest.mark.asyncio
+async def test_long_conversation_stays_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "conversation_max_messages", 6)
+    saver = BoundedMemorySaver(keep=2)
+    app = _app(saver)
+    sizes = []
+    for i in range(30):
+        messages = await _turn(app, "t", f"question {i}")
+        sizes.append((saver.nbytes, len(saver.blobs)))
+    assert len(messages) == 6 and messages[-1].content == "re: question 29"
+    assert sum(len(cps) for cps in saver.storage["t"].values()) <= 2
+    assert sizes[-1][1] == sizes[10][1] and sizes[-1][0] < 1.05 * sizes[10][0]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_state_survives_restart_and_evicts(tmp_path):
+    path = tmp_path / "state.sqlite"
+    saver = SqliteSaver(path, max_threads=2)
+    await _turn(_app(saver), "a", "first")
+    saver.close()
+
+    saver = SqliteSaver(path, max_threads=2)
+    app = _app(saver)
+    messages = await _turn(app, "a", "second")
+    assert [m.content for m in messages] == ["first", "re: first", "second", "re: second"]
+    await _turn(app, "b")
+    await _turn(app, "c")
+    assert saver.stats()["conversations"] == 2
+    assert await saver.aget_tuple({"configurable": {"thread_id": "a"}}) is None
+    n = saver.conn.execute("SELECT COUNT(*) FROM checkpoints WHERE thread_id='c'").fetchone()[0]
+    assert n <= saver.keep
+    saver.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_waits_for_a_lock_off_the_event_loop(tmp_path):
+    saver = SqliteSaver(tmp_path / "state.sqlite")
+    other = sqlite3.connect(tmp_path / "state.sqlite", isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # another worker holds the write lock
+    config = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    put = asyncio.create_task(saver.aput(config, empty_checkpoint(), {}, {}))
+    t0 = time.perf_counter()
+    await asyncio.sleep(0.05)
+    assert time.perf_counter() - t0 < 1.0 and not put.done()
+    other.execute("COMMIT")
+    saved = await put
+    found = await saver.aget_tuple(saved)
+    assert found is not None and found.config == saved
+    saver.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("stub_model")
+async def test_requests_without_conversation_id_leave_no_state():
+    before = graph.checkpointer.stats()["conversations"]
+    for _ in range(3):
+        req = ChatRequest(message="What's new in app dev?", role="user")
+        chunks = [c async for c in graph.ainvoke(req)]
+        assert any(b"answer to" in c for c in chunks)
+    assert graph.checkpointer.stats()["conversations"] == before
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import pytest
+from tests.doubles.fake_coreapi import FakeCoreApi
+
+from src.config import settings
+from src.graph import retriever
+from src.retrieval import client_coreapi
+from src.retrieval.client_coreapi import CoreApiClient
+
+
+@pytest.fixture
+def server():
+    server = FakeCoreApi(latency_ms=20).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "core_api_backoff_s", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_searches_share_one_request(server):
+    client = CoreApiClient(server.base_url)
+    results = await asyncio.gather(*(client.search("vector db", 3, None) for _ in range(20)))
+    await client.aclose()
+    assert server.paths["/search"] == 1
+    assert client.coalesced == 19
+    assert all(r == results[0] for r in results)
+    assert results[0] and results[0] is not results[1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_backoff")
+async def test_retries_unavailable_then_succeeds(server):
+    server.fail_first = 2
+    client = CoreApiClient(server.base_url)
+    assert await client.search("rag", 2, None)
+    await client.aclose()
+    assert client.retries == 2 and server.paths["/search"] == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("no_backoff")
+async def test_retries_are_bounded(server):
+    server.fail_first = 10
+    client = CoreApiClient(server.base_url)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.search("rag", 2, None)
+    await client.aclose()
+    assert server.paths["/search"] == settings.core_api_retries + 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batch", [False, True])
+async def test_items_keep_order_and_skip_unknown(server, monkeypatch, batch):
+    monkeypatch.setattr(settings, "core_api_batch_items", batch)
+    slugs = [it["slug"] for it in server.items[:3]][::-1]
+    client = CoreApiClient(server.base_url)
+    items = await client.items([slugs[0], "missing", *slugs[1:]])
+    await client.aclose()
+    assert [it["slug"] for it in items] == slugs
+    assert server.requests == (1 if batch else 4)
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_docs_uses_core_api_without_mocks(server, monkeypatch):
+    monkeypatch.setattr(settings, "use_mocks", False)
+    monkeypatch.setattr(client_coreapi, "_client", CoreApiClient(server.base_url))
+    out = await retriever.aretrieve_docs({"query": "vector db postgres", "k": 2})
+    await client_coreapi.close_core_client()
+    docs = out["retrieved"]
+    assert len(docs) == 2
+    assert docs[0]["item_id"] and docs[0]["title"] and docs[0]["url"]
@@ -0,0 +1,82 @@
+from benchmarks.synthetic import synthetic_corpus
+import numpy as np
+import pytest
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus, published_ts
+from src.retrieval.hybrid import HybridEngine
+from src.utils.time import parse_since_to_timestamp
+
+NOW = published_ts("2025-11-05")
+QUERY = "open source model release"
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    items, snips = synthetic_corpus(3000, seed=3)
+    return build_corpus(items, snips, HashEmbedder(dim=32), "hash")
+
+
+def _passes(item, topics, since):
+    ok = not topics or bool(set(item["topics"]) & set(topics))
+    if since:
+        ok = ok and published_ts(item["published_at"]) >= parse_since_to_timestamp(since, NOW)
+    return ok
+
+
+@pytest.mark.parametrize(
+    "topics,since", [(["agents"], None), (None, "P7D"), (["hardware", "policy"], "P60D")]
+)
+def test_filter_index_rows_and_mask_match_a_scan(corpus, topics, since):
+    f = corpus.filters
+    codes = np.array([corpus.topic_vocab[t] for t in topics]) if topics else None
+    cutoff = parse_since_to_timestamp(since, NOW) if since else None
+    expected = [r for r, it in enumerate(corpus.items) if _passes(it, topics, since)]
+    assert f.rows(codes, cutoff).tolist() == expected
+    assert np.flatnonzero(f.mask(codes, cutoff)).tolist() == expected
+    assert f.estimate(codes, cutoff) >= len(expected)
+
+
+def test_pushdown_fills_k_with_matches_outside_the_unfiltered_top(corpus, monkeypatch):
+    engine = HybridEngine(corpus, HashEmbedder(dim=32))
+    topics, since = ["hardware"], "2025-09-01"
+    monkeypatch.setattr(settings, "filter_pushdown", False)
+    post = engine.search(QUERY, 10, topics, since)
+    monkeypatch.setattr(settings, "filter_pushdown", True)
+    pushed = engine.search(QUERY, 10, topics, since)
+    assert len(pushed) == 10 > len(post)
+    rows = [engine.row_of[h["item_id"]] for h in pushed]
+    assert all(_passes(engine.items[r], topics, None) for r in rows)
+    assert min(engine.timestamps[rows]) >= parse_since_to_timestamp(since)
+
+
+@pytest.mark.parametrize("vector_index", ["exact", "ivf"])
+def test_brute_force_and_index_search_agree(corpus, monkeypatch, vector_index):
+    monkeypatch.setattr(settings, "vector_index", vector_index)
+    monkeypatch.setattr(settings, "ivf_nprobe", 10_000)  # probe every list: exact
+    engine = HybridEngine(corpus, HashEmbedder(dim=32))
+    allowed = engine.row_filter(["agents", "cloud"], None)
+    assert allowed.rows is not None
+    brute = engine.embed_rows(QUERY, 30, allowed)
+    monkeypatch.setattr(settings, "filter_brute_force_rows", 0)
+    masked = engine.row_filter(["agents", "cloud"], None)
+    assert masked.mask is not None and masked.count == allowed.count
+    via_index = engine.embed_rows(QUERY, 30, masked)
+    assert via_index[0].tolist() == brute[0].tolist()
+    np.testing.assert_allclose(via_index[1], brute[1], rtol=1e-5)
+
+
+@pytest.mark.parametrize("limit", [20000, 0])
+def test_pushdown_sees_delta_docs_and_skips_tombstones(corpus, monkeypatch, limit):
+    monkeypatch.setattr(settings, "filter_brute_force_rows", limit)
+    engine = HybridEngine(corpus, HashEmbedder(dim=32))
+    target = next(it for it in corpus.items if "agents" in it["topics"])
+    new = engine.apply(
+        [{**target, "id": "fresh", "title": "quokka agents", "published_at": "2099-01-01"}],
+        [target["id"]],
+    )
+    hits = [h["item_id"] for h in new.search("quokka agents", 50, ["agents"], "2099-01-01")]
+    assert hits == ["fresh"]
+    hits = [h["item_id"] for h in new.search(QUERY, 300, ["agents"], None)]
+    assert "fresh" in hits and target["id"] not in hits
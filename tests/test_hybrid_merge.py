@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from src.config import settings
+from src.retrieval import hybrid
+from src.utils.time import parse_since_to_timestamp
+
+NOW = 1762300800  # 2025-11-05
+
+
+def _reference_search(query, k, topics, since):
+    """The pre-vectorization merge/filter/diversify loop, kept verbatim as an oracle."""
+    engine = hybrid.get_engine()
+    ids, timestamps, items = engine.corpus.ids, engine.corpus.timestamps, engine.corpus.items
+    domains = engine.corpus.domain_codes
+    base_k = max(k * 6, 30)
+    kw = dict(engine.keyword_scores(query, base_k))
+    em = dict(engine.embed_scores(query, base_k))
+    half_life = settings.recency_halflife_days * 86400.0
+    scores = {}
+    for doc_id in set(list(kw.keys()) + list(em.keys())):
+        ts = timestamps[ids.index(doc_id)]
+        rec = 2 ** (-max(0.0, NOW - ts) / half_life)
+        scores[doc_id] = (
+            settings.alpha_embed * em.get(doc_id, 0.0)
+            + settings.beta_keyword * kw.get(doc_id, 0.0)
+            + settings.gamma_recency * rec
+        )
+    if since:
+        cutoff = parse_since_to_timestamp(since, NOW)
+        scores = {i: s for i, s in scores.items() if timestamps[ids.index(i)] >= cutoff}
+    if topics:
+        want = {t.lower() for t in topics}
+        scores = {
+            i: s
+            for i, s in scores.items()
+            if {t.lower() for t in items[ids.index(i)].get("topics", [])} & want
+        }
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    per_domain, out = {}, []
+    for doc_id, sc in ranked:
+        meta, dom = items[ids.index(doc_id)], domains[ids.index(doc_id)]
+        if per_domain.get(dom, 0) >= settings.max_per_domain:
+            continue
+        out.append(
+            {"item_id": doc_id, "score": round(sc, 6), "slug": meta["slug"], "title": meta["title"]}
+        )
+        per_domain[dom] = per_domain.get(dom, 0) + 1
+        if len(out) >= k:
+            break
+    return out
+
+
+QUERIES = ["vector db for pg", "langgraph compare", "app dev this week", "zzz"]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("k", [1, 3, 5])
+@pytest.mark.parametrize("topics", [None, ["app-dev"], ["Data", "agents"], ["nope"]])
+@pytest.mark.parametrize("since", [None, "2025-10-25", "P10D"])
+def test_vectorized_merge_matches_reference(monkeypatch, query, k, topics, since):
+    monkeypatch.setattr(hybrid.time, "time", lambda: float(NOW))
+    want = _reference_search(query, k, topics, since)
+    assert hybrid.hybrid_search(query, k, topics, since) == want
+
+
+def test_diversify_matches_per_domain_loop():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 7, size=500).astype(np.int32)
+    ranked = rng.permutation(500)
+    seen, expected = {}, []
+    for row in ranked:
+        if seen.get(codes[row], 0) < 2:
+            expected.append(row)
+            seen[codes[row]] = seen.get(codes[row], 0) + 1
+    assert hybrid._diversify(ranked, codes, 2).tolist() == expected
+
+
+def _reference_mmr(rel, vecs, k, lam, codes, cap):
+    picked, per_domain = [], {}
+    while len(picked) < k:
+        best, best_gain = None, -np.inf
+        for i in range(len(rel)):
+            if i in picked or (cap and per_domain.get(codes[i], 0) >= cap):
+                continue
+            penalty = max((float(vecs[i] @ vecs[j]) for j in picked), default=0.0)
+            gain = lam * rel[i] - (1 - lam) * penalty
+            if gain > best_gain:
+                best, best_gain = i, gain
+        if best is None:
+            break
+        picked.append(best)
+        per_domain[codes[best]] = per_domain.get(codes[best], 0) + 1
+    return picked
+
+
+@pytest.mark.parametrize("lam", [0.0, 0.5, 0.7, 1.0])
+@pytest.mark.parametrize("cap", [0, 1, 2])
+def test_mmr_matches_greedy_loop(lam, cap):
+    rng = np.random.default_rng(1)
+    vecs = rng.normal(size=(80, 16)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    rel = np.sort(rng.random(80))[::-1]
+    codes = rng.integers(0, 6, size=80).astype(np.int32)
+    picks = hybrid._mmr(rel, vecs @ vecs.T, 10, lam, codes, cap)
+    assert picks.tolist() == _reference_mmr(rel, vecs, 10, lam, codes, cap)
+
+
+def test_mmr_search_keeps_domain_cap(monkeypatch):
+    engine = hybrid.get_engine()
+    monkeypatch.setattr(hybrid.time, "time", lambda: float(NOW))
+    ranked = engine.search("vector db for pg", 5, None, None)
+    monkeypatch.setattr(settings, "diversity", "mmr")
+    monkeypatch.setattr(settings, "mmr_pool", 0)
+    monkeypatch.setattr(settings, "mmr_lambda", 1.0)  # relevance only: same as the domain cap
+    assert engine.search("vector db for pg", 5, None, None) == ranked
+    monkeypatch.setattr(settings, "mmr_lambda", 0.3)
+    hits = engine.search("vector db for pg", 5, None, None)
+    assert len(hits) == len(ranked)
+    domains = [engine.domain_codes[engine.row_of[h["item_id"]]] for h in hits]
+    assert max(domains.count(d) for d in domains) <= settings.max_per_domain
@@ -0,0 +1,98 @@
+import json
+
+from benchmarks.synthetic import synthetic_corpus, synthetic_queries
+import numpy as np
+import pytest
+from tests.doubles.embedder import HashEmbedder
+
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+from src.retrieval.index_build import build_index_stream, iter_jsonl
+from src.retrieval.index_io import load_index
+from src.utils.text import tokenize
+from src.utils.tfidf import HashingTfidfVectorizer, SimpleTfidfVectorizer
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Use GPT-4o, v1.2! (pg_vector) “Naïve” caf\u00e9\u2019s") == [
+        "use",
+        "gpt",
+        "4o",
+        "v1",
+        "2",
+        "pg",
+        "vector",
+        "naïve",
+        "café",
+        "s",
+    ]
+
+
+def test_hashing_tfidf_matches_vocabulary_tfidf_without_collisions():
+    docs = ["vector db for postgres", "", "langgraph agents guide, agents!", "postgres fts"]
+    X = HashingTfidfVectorizer(1 << 16).fit_transform(docs)
+    Y = SimpleTfidfVectorizer().fit_transform(docs)
+    assert X.shape[1] == 1 << 16 and X.nnz == Y.nnz
+    for r in range(len(docs)):
+        assert np.allclose(np.sort(X.row(r)[1]), np.sort(Y.row(r)[1]))
+
+
+def test_streamed_build_matches_in_memory_build(tmp_path):
+    items, snips = synthetic_corpus(1200, seed=7)
+    path = tmp_path / "items.jsonl"
+    with path.open("w", encoding="utf-8") as f:
+        for it in items:
+            f.write(json.dumps(dict(it, snippet=snips[it["id"]])) + "\n")
+    embedder = HashEmbedder(dim=16)
+    manifest = build_index_stream(
+        iter_jsonl(path),
+        tmp_path / "idx",
+        embedder,
+        "hash",
+        bm25=(1.2, 0.75),
+        hash_features=1 << 14,
+        chunk_size=250,
+    )
+    assert manifest["n_docs"] == 1200 and manifest["tfidf"] == "hashing"
+    streamed = load_index(tmp_path / "idx", verify=True)
+    ref = build_corpus(items, snips, embedder, "hash", bm25=(1.2, 0.75), hash_features=1 << 14)
+
+    assert streamed.ids == ref.ids and streamed.items == ref.items
+    assert streamed.snippets == ref.snippets
+    np.testing.assert_array_equal(streamed.timestamps, ref.timestamps)
+    np.testing.assert_allclose(streamed.vecs, ref.vecs, atol=1e-6)  # batches differ at the end
+    assert [streamed.domain_names[c] for c in streamed.domain_codes] == [
+        ref.domain_names[c] for c in ref.domain_codes
+    ]
+    for name in ("indptr", "indices", "data"):
+        np.testing.assert_array_equal(getattr(streamed.X, name), getattr(ref.X, name))
+    assert streamed.kw_index is not None and ref.kw_index is not None
+    for name in ("term_ptr", "doc_ids", "impacts", "idf_"):
+        np.testing.assert_array_equal(getattr(streamed.kw_index, name), getattr(ref.kw_index, name))
+    for q in synthetic_queries(10):
+        assert streamed.kw_index.search(q, 5) == ref.kw_index.search(q, 5)
+        assert streamed.tfidf_encode([q]).indices.tolist() == ref.tfidf_encode([q]).indices.tolist()
+
+
+def test_engine_over_streamed_index_ingests_and_refits(tmp_path):
+    items, snips = synthetic_corpus(300, seed=8)
+    embedder = HashEmbedder(dim=16)
+    stream = (dict(it, snippet=snips[it["id"]]) for it in items)
+    build_index_stream(stream, tmp_path / "idx", embedder, "hash", (1.2, 0.75), 1 << 12, 64)
+    engine = HybridEngine(load_index(tmp_path / "idx"), embedder)
+    new = dict(items[0], id="new_1", title="zyxwv quokka release")
+    engine = engine.apply([new], [items[1]["id"]])
+    assert engine.search("quokka zyxwv", 1, None, None)[0]["item_id"] == "new_1"
+    engine = engine.refit()
+    assert isinstance(engine.corpus.tfidf, HashingTfidfVectorizer)
+    assert engine.corpus.kw_index is not None and engine.corpus.kw_index.n_features == 1 << 12
+    assert engine.search("quokka zyxwv", 1, None, None)[0]["item_id"] == "new_1"
+
+
+def test_failed_build_removes_staging_directory(tmp_path):
+    items, snips = synthetic_corpus(100, seed=9)
+    stream = [dict(it, snippet=snips[it["id"]]) for it in items]
+    stream[70]["published_at"] = "not a date"
+    with pytest.raises(ValueError):
+        build_index_stream(stream, tmp_path / "idx", HashEmbedder(dim=8), "hash", chunk_size=32)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.retrieval.corpus import build_corpus
+from src.retrieval.index_io import IndexFormatError, load_index, save_index, verify_index
+
+
+@pytest.fixture
+def corpus(fixtures):
+    items, snips = fixtures
+    return build_corpus(items, snips, embedder=None, embedding_model="none", bm25=(1.2, 0.75))
+
+
+def test_roundtrip_is_memory_mapped_and_equivalent(tmp_path, corpus):
+    save_index(corpus, tmp_path / "idx")
+    loaded = load_index(tmp_path / "idx", verify=True)
+
+    assert isinstance(loaded.vecs, np.memmap)
+    assert loaded.ids == corpus.ids
+    np.testing.assert_array_equal(loaded.vecs, corpus.vecs)
+    np.testing.assert_array_equal(loaded.timestamps, corpus.timestamps)
+
+    q = loaded.tfidf_encode(["vector db for pg"]).row(0)
+    np.testing.assert_allclose(loaded.X.dot_sparse(*q), corpus.X.dot_sparse(*q))
+    assert loaded.kw_index is not None
+    want = corpus.kw_index.search("postgres vector", 3)
+    assert loaded.kw_index.search("postgres vector", 3) == want
+
+
+def test_corruption_and_version_are_detected(tmp_path, corpus):
+    idx = tmp_path / "idx"
+    save_index(corpus, idx)
+    with (idx / "vectors.npy").open("r+b") as f:
+        f.seek(-4, 2)
+        f.write(b"\x00\x00\x80\x7f")
+    with pytest.raises(IndexFormatError):
+        verify_index(idx)
+
+    manifest = json.loads((idx / "manifest.json").read_text())
+    manifest["version"] = 999
+    (idx / "manifest.json").write_text(json.dumps(manifest))
+    with pytest.raises(IndexFormatError):
+        load_index(idx)
+
+
+def test_tfidf_pickle_is_checked_before_loading(tmp_path, corpus):
+    idx = tmp_path / "idx"
+    save_index(corpus, idx)
+    manifest = json.loads((idx / "manifest.json").read_text())
+    manifest.update(tfidf="sklearn", files={**manifest["files"], "tfidf.pkl": "0" * 64})
+    (idx / "manifest.json").write_text(json.dumps(manifest))
+    (idx / "tfidf.pkl").write_bytes(b"not a pickle")
+    with pytest.raises(IndexFormatError, match=r"tfidf\.pkl"):
+        load_index(idx)
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+import pytest
+
+from src.app import app
+from src.config import settings
+from src.retrieval import hybrid
+from src.retrieval.corpus import build_corpus
+
+QUERY = "DevDay tools for app developers"
+
+
+def _clone(item, new_id):
+    return {**item, "id": new_id, "slug": item["slug"] + "-2"}
+
+
+def test_upsert_and_delete_are_visible_in_new_generation_only(fixtures):
+    items, snips = fixtures
+    engine = hybrid.get_engine()
+    assert engine.search(QUERY, 3, None, None)[0]["item_id"] == "it_001"
+
+    new = engine.apply([_clone(items[0], "it_900")], ["it_001"], {"it_900": snips["it_001"]})
+
+    assert new.search(QUERY, 3, None, None)[0]["item_id"] == "it_900"
+    assert all(h["item_id"] != "it_001" for h in new.search(QUERY, 10, None, None))
+    assert new.resolve_items(["it_001", "it_900"])[0]["snippet"] == snips["it_001"]
+    assert len(new) == len(engine)
+    # the old generation is untouched
+    assert engine.search(QUERY, 3, None, None)[0]["item_id"] == "it_001"
+    assert engine.resolve_items(["it_900"]) == []
+
+
+def test_update_replaces_base_and_delta_docs(fixtures):
+    items, _ = fixtures
+    engine = hybrid.get_engine()
+    new = engine.apply([{**items[1], "title": "Renamed"}])
+    new = new.apply([{**items[1], "title": "Renamed again"}, _clone(items[2], "it_901")])
+    assert new.resolve_items([items[1]["id"]])[0]["title"] == "Renamed again"
+    assert len(new) == len(engine) + 1
+    hits = [h["item_id"] for h in new.search("renamed", 10, None, None)]
+    assert len(hits) == len(set(hits))
+    new = new.apply([], ["it_901"])  # base tombstone + its delta replacement
+    assert new.pending == 2 and new.delta is not None and new.delta.ids == [items[1]["id"]]
+
+
+def test_refit_matches_a_fresh_build(fixtures):
+    items, snips = fixtures
+    engine = hybrid.get_engine()
+    added = _clone(items[3], "it_902")
+    new = engine.apply([added], [items[0]["id"]], {"it_902": "fresh snippet about agents"})
+    refit = new.refit()
+    assert refit.delta is None and not refit.deleted
+
+    live = [*items[1:], added]
+    snips = {**snips, "it_902": "fresh snippet about agents"}
+    corpus = build_corpus(live, snips, engine.embedder, engine.corpus.embedding_model)
+    fresh = hybrid.HybridEngine(corpus, engine.embedder)
+    for q in (QUERY, "agents", "security"):
+        assert refit.search(q, 5, None, None) == fresh.search(q, 5, None, None)
+
+
+def test_bm25_delta_uses_base_statistics(fixtures, monkeypatch):
+    items, snips = fixtures
+    monkeypatch.setattr(settings, "keyword_engine", "bm25")
+    corpus = build_corpus(items, snips, None, "x", bm25=(1.2, 0.75))
+    engine = hybrid.HybridEngine(corpus, None)
+    new = engine.apply([_clone(items[0], "it_903")], [items[0]["id"]], {"it_903": snips["it_001"]})
+    assert new.delta.kw_index.avgdl_ == corpus.kw_index.avgdl_
+    before = dict(engine.keyword_scores(QUERY, 5))
+    after = dict(new.keyword_scores(QUERY, 5))
+    assert after["it_903"] == pytest.approx(before[items[0]["id"]])
+    assert items[0]["id"] not in after
+
+
+def test_admin_ingest_endpoint(fixtures, monkeypatch):
+    items, _ = fixtures
+    engine = hybrid.get_engine()
+    monkeypatch.setattr(hybrid._warmup, "engine", engine)  # restored after the test
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    body = {"upsert": [{**_clone(items[0], "it_904"), "snippet": "x"}], "delete": ["it_002"]}
+    client = TestClient(app)
+
+    assert client.post("/agent/v1/admin/ingest", json=body).status_code == 403
+    r = client.post("/agent/v1/admin/ingest", json=body, headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
+    assert r.json()["upserted"] == 1 and r.json()["deleted"] == 1
+    assert r.json()["docs"] == len(engine)
+    assert hybrid.resolve_items(["it_904", "it_002"])[0]["item_id"] == "it_904"
+
+    bad = {"upsert": [{**_clone(items[0], "it_905"), "published_at": "2025-13-40"}]}
+    r = client.post("/agent/v1/admin/ingest", json=bad, headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 422
@@ -0,0 +1,46 @@
+from collections import Counter
+import math
+
+import pytest
+
+from src.retrieval.store_keyword import InvertedIndex
+
+DOCS = {
+    "a": "vector db options for postgres vector search",
+    "b": "langgraph agents guide",
+    "c": "sqlite fts for small rag workloads",
+    "d": "postgres tips",
+}
+
+
+def _bm25(query: str, k1: float = 1.2, b: float = 0.75) -> dict[str, float]:
+    toks = {i: d.split() for i, d in DOCS.items()}
+    avgdl = sum(len(t) for t in toks.values()) / len(toks)
+    out = {}
+    for i, t in toks.items():
+        tf = Counter(t)
+        s = 0.0
+        for q in query.split():
+            if q not in tf:
+                continue
+            df = sum(1 for tt in toks.values() if q in tt)
+            idf = math.log(1 + (len(toks) - df + 0.5) / (df + 0.5))
+            s += idf * tf[q] * (k1 + 1) / (tf[q] + k1 * (1 - b + b * len(t) / avgdl))
+        if s > 0:
+            out[i] = s
+    return out
+
+
+def test_bm25_matches_reference_and_skips_non_matching_docs():
+    idx = InvertedIndex().fit(list(DOCS), list(DOCS.values()))
+    hits = idx.search("postgres vector", k=10)
+    ref = _bm25("postgres vector")
+    assert [h[0] for h in hits] == sorted(ref, key=lambda i: -ref[i])
+    for doc_id, score in hits:
+        assert score == pytest.approx(ref[doc_id], rel=1e-5)
+
+
+def test_bm25_topk_and_unknown_terms():
+    idx = InvertedIndex().fit(list(DOCS), list(DOCS.values()))
+    assert [h[0] for h in idx.search("postgres vector", k=1)] == ["a"]
+    assert idx.search("zzz", k=5) == []
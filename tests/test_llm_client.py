@@ -0,0 +1,87 @@
+import pytest
+from tests.doubles.fake_openai import FakeOpenAI
+
+from src.llm import provider
+from src.llm.provider import OpenAIChat, choose_model
+from src.metrics import LLM_TOKENS
+
+DOCS = [{"item_id": "a", "title": "A", "url": "https://a.test", "snippet": "s"}]
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = FakeOpenAI().start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(provider, "_OPENAI", {})
+
+
+@pytest.mark.usefixtures("clean_registry")
+def test_registry_reuses_one_client_per_model_and_base_url(fake_server, monkeypatch):
+    a = choose_model("gpt-5")
+    assert choose_model("openai:gpt-5") is a
+    assert choose_model("gpt-4o") is not a
+    monkeypatch.setenv("OPENAI_BASE_URL", fake_server.base_url.replace("127.0.0.1", "localhost"))
+    assert choose_model("gpt-5") is not a
+
+
+def test_missing_api_key_fails_before_opening_clients(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    opened = []
+    monkeypatch.setattr(provider.httpx, "Client", lambda **kw: opened.append(kw))
+    monkeypatch.setattr(provider.httpx, "AsyncClient", lambda **kw: opened.append(kw))
+    with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
+        OpenAIChat("gpt-5", "http://127.0.0.1:9")
+    assert opened == []
+
+
+@pytest.mark.asyncio
+async def test_pooled_client_reuses_connections(fake_server):
+    model = OpenAIChat("gpt-5", fake_server.base_url)
+    await model.aprewarm(2)
+    assert len(fake_server.connections) == 2
+    for _ in range(5):
+        answer, ids = await model.agenerate_answer("q", DOCS, 100, 0.5)
+        assert "[1]" in answer and ids == ["a"]
+        chunks = [c async for c in model.astream_answer("q", DOCS, 100, 0.5)]
+        assert "".join(chunks) == answer
+    assert len(fake_server.connections) == 2  # no new handshakes after prewarm
+    await model.aclose()
+
+
+@pytest.mark.asyncio
+async def test_token_usage_is_counted_from_the_response(fake_server):
+    model = OpenAIChat("gpt-tokens", fake_server.base_url)
+    output = LLM_TOKENS.labels("gpt-tokens", "output")
+    answer, _ = await model.agenerate_answer("q", DOCS, 100, 0.5)
+    assert output.value == len(answer.split())
+    _ = [c async for c in model.astream_answer("q", DOCS, 100, 0.5)]  # response.completed
+    assert output.value == 2 * len(answer.split())
+    assert LLM_TOKENS.labels("gpt-tokens", "input").value > 0
+    await model.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_per_request_handshakes_every_time(fake_server):
+    for _ in range(3):
+        model = OpenAIChat("gpt-5", fake_server.base_url)
+        await model.agenerate_answer("q", DOCS, 100, 0.5)
+        await model.aclose()
+    assert len(fake_server.connections) == 3
+
+
+@pytest.mark.asyncio
+async def test_unreachable_server_falls_back_within_connect_timeout(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(provider.settings, "llm_connect_timeout_s", 0.5)
+    model = OpenAIChat("gpt-5", "http://127.0.0.1:9/v1")
+    model._aclient = model._aclient.with_options(max_retries=0)
+    answer, _ = await model.agenerate_answer("q", DOCS, 100, 0.5)
+    assert "fallback" in answer
+    await model.aclose()
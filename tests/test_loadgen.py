@@ -0,0 +1,39 @@
+from benchmarks.loadgen import DEFAULT_LOG, load_log, report, run_load, schedule
+import httpx
+import pytest
+
+from src.app import app
+
+
+def test_schedule_amplifies_log_with_distinct_conversations():
+    log = load_log(DEFAULT_LOG)
+    plan = schedule(log, 2 * len(log) + 1)
+    assert len(plan) == 2 * len(log) + 1
+    ids = [b.get("conversationId") for _, b in plan if b.get("conversationId")]
+    assert "conv-a" in ids and "conv-a-1" in ids and "conv-a-2" not in ids
+    times = [t for t, _ in plan]
+    assert times == sorted(times)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("stub_model")
+@pytest.mark.parametrize("pacing", [{"concurrency": 4}, {"rate": 200.0}])
+async def test_run_load_reports_stream_timings(pacing):
+    plan = schedule(load_log(DEFAULT_LOG), 8)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        samples, wall = await run_load(client, plan, **pacing)
+    summary = report(samples, wall)
+    assert summary["requests"] == 8 and summary["error_rate"] == 0.0
+    assert summary["time_to_done"]["n"] == 8
+    assert summary["time_to_first_token"]["p50_ms"] <= summary["time_to_done"]["p50_ms"]
+    assert summary["sse_bytes_per_s"] > 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_requests_count_as_errors():
+    plan = [(None, {"message": "no role"})]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        samples, wall = await run_load(client, plan, concurrency=1)
+    assert report(samples, wall)["errors"] == {"http 422": 1}
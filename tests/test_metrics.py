@@ -0,0 +1,58 @@
+import re
+import time
+
+from starlette.testclient import TestClient
+
+from src.app import app
+from src.utils.metrics import Counter, Gauge, Histogram, Registry
+
+CHAT = {"message": "What's new in app dev?", "role": "user"}
+
+
+def test_histogram_renders_cumulative_buckets():
+    reg = Registry()
+    h = Histogram("op_seconds", "Op time.", ["op"], reg, buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.labels("read").observe(v)
+    Counter("ops_total", "Ops.", registry=reg).inc(2)
+    Gauge("depth", "Depth.", ["q"], reg, collect=lambda: {('a"b',): 3})
+    text = reg.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 3' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'op_seconds_sum{op="read"} 3.65' in text
+    assert 'op_seconds_count{op="read"} 4' in text
+    assert "ops_total 2" in text
+    assert 'depth{q="a\\"b"} 3' in text
+
+
+def test_metrics_endpoint_after_chat():
+    client = TestClient(app)
+    with client.stream("POST", "/agent/v1/chat/stream", json=CHAT) as r:
+        assert r.status_code == 200
+        r.read()
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    for node in ("plan", "retrieve", "synthesize"):
+        assert f'agent_node_duration_seconds_count{{node="{node}"}}' in text
+    for stage in ("keyword", "embed", "merge", "filter", "diversify"):
+        assert f'retrieval_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}}' in text
+    assert re.search(r'llm_output_chunks_total\{model="stub-local"\} [1-9]', text)
+    assert re.search(r"chat_time_to_first_token_seconds_count [1-9]", text)
+    assert "chat_active_streams 0" in text
+    assert 'cache_hits_total{cache="results"}' in text
+    assert re.search(r"index_documents [1-9]", text)
+    assert re.search(r"process_resident_memory_bytes [1-9]", text)
+
+
+def test_observe_costs_microseconds():
+    child = Histogram("hot_seconds", "Hot path.", ["stage"]).labels("x")
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        child.observe(0.003)
+    per_call_us = (time.perf_counter() - t0) / n * 1e6
+    assert per_call_us < 5
@@ -0,0 +1,105 @@
+from benchmarks.synthetic import synthetic_corpus, synthetic_queries
+import numpy as np
+import pytest
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+from src.retrieval.index_io import load_index, save_index
+from src.retrieval.store_quant import QuantizedVectorStore, quantize
+from src.retrieval.store_vector import InMemoryVectorStore, _normalize
+
+MODES = [("float16", "vector"), ("int8", "vector"), ("int8", "dim")]
+
+
+def _data(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"d{i}" for i in range(n)]
+    return ids, rng.normal(size=(n, dim)).astype(np.float32), rng.normal(size=(50, dim))
+
+
+def test_int8_round_trip_error_is_half_a_step():
+    X = _normalize(np.random.default_rng(1).normal(size=(100, 16)))
+    codes, scales = quantize(X, "int8")
+    assert codes.dtype == np.int8
+    assert np.all(np.abs(codes * scales[:, None] - X) <= scales[:, None] / 2 + 1e-7)
+    dim_scale = np.abs(X).max(axis=0) / 127
+    codes, scales = quantize(X, "int8", dim_scale)
+    assert scales is None and np.all(np.abs(codes * dim_scale - X) <= dim_scale / 2 + 1e-7)
+
+
+@pytest.mark.parametrize("mode,scale", MODES)
+def test_rescored_search_matches_exact(mode, scale):
+    ids, X, Q = _data()
+    exact = InMemoryVectorStore(16)
+    exact.add(ids, X)
+    quant = QuantizedVectorStore(16, mode=mode, scale=scale, rescore=4)
+    quant.add(ids, X)
+    recall = []
+    for q in Q:
+        want = dict(exact.search(q, 10))
+        got = quant.search(q, 10)
+        recall.append(len(want.keys() & {i for i, _ in got}) / 10)
+        for i, s in got:  # scores come from the float32 vectors
+            assert s == pytest.approx(float(exact.get(i) @ _normalize(q)), abs=1e-6)
+    assert np.mean(recall) > 0.97
+
+    quant.rescore = len(ids)  # shortlist = everything: exact
+    for q in Q[:5]:
+        assert [i for i, _ in quant.search(q, 10)] == [i for i, _ in exact.search(q, 10)]
+
+
+def test_wrap_keeps_float32_memory_map(tmp_path):
+    ids, X, _ = _data(n=500)
+    np.save(tmp_path / "v.npy", _normalize(X))
+    vecs = np.load(tmp_path / "v.npy", mmap_mode="r")
+    quant = QuantizedVectorStore.wrap(ids, vecs, mode="int8")
+    assert isinstance(quant.store.vecs, np.memmap)
+    assert quant.nbytes < vecs.nbytes / 3
+    assert quant.search(X[3], 1)[0][0] == "d3"
+
+
+@pytest.mark.parametrize("mode,scale", MODES)
+def test_upsert_delete_and_compaction(mode, scale):
+    ids, X, _ = _data(n=300)
+    quant = QuantizedVectorStore(16, mode=mode, scale=scale)
+    quant.add(ids, X)
+    quant.delete(ids[:150])  # forces compaction
+    assert len(quant) == 150
+    assert quant.search(X[0], 1)[0][0] != "d0"
+    assert quant.search(X[200], 1)[0][0] == "d200"
+    quant.upsert(["d0"], X[0][None, :])
+    assert quant.search(X[0], 1)[0][0] == "d0"
+
+
+def test_engine_quantizes_only_memory_mapped_vectors(monkeypatch, tmp_path, caplog):
+    items, snips = synthetic_corpus(1000, seed=3)
+    embedder = HashEmbedder(dim=32)
+    corpus = build_corpus(items, snips, embedder, "hash")
+    plain = HybridEngine(corpus, embedder)
+    monkeypatch.setattr(settings, "vector_quantization", "int8")
+    assert isinstance(HybridEngine(corpus, embedder).vec_store, InMemoryVectorStore)
+    assert "until restarted from INDEX_DIR" in caplog.text
+    save_index(corpus, tmp_path / "idx")
+    quant = HybridEngine(load_index(tmp_path / "idx"), embedder)
+    assert isinstance(quant.vec_store, QuantizedVectorStore)
+    for q in synthetic_queries(10, seed=1):
+        want, got = plain.embed_rows(q, 5), quant.embed_rows(q, 5)
+        assert got[0].tolist() == want[0].tolist()
+
+
+def test_quantization_holds_until_refit(monkeypatch, tmp_path, caplog):
+    items, snips = synthetic_corpus(500, seed=4)
+    embedder = HashEmbedder(dim=32)
+    save_index(build_corpus(items, snips, embedder, "hash"), tmp_path / "idx")
+    monkeypatch.setattr(settings, "vector_quantization", "int8")
+    engine = HybridEngine(load_index(tmp_path / "idx"), embedder)
+    new = dict(items[0], id="new_1", title="zyxwv quokka release")
+    engine = engine.apply([new], [items[1]["id"]])
+    assert isinstance(engine.vec_store, QuantizedVectorStore)  # ingest keeps the base codes
+    assert "VECTOR_QUANTIZATION" not in caplog.text
+    engine = engine.refit()
+    assert isinstance(engine.vec_store, InMemoryVectorStore)
+    assert "until restarted from INDEX_DIR" in caplog.text
+    assert engine.search("quokka zyxwv", 1, None, None)[0]["item_id"] == "new_1"
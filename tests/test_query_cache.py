@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.retrieval import hybrid
+from src.retrieval.corpus import build_corpus
+from src.utils.cache import LRUCache
+
+
+class CountingEmbedder:
+    """Letter-frequency vectors; counts encode() calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, docs, **_kwargs):  # always L2-normalized
+        self.calls += 1
+        out = np.zeros((len(docs), 26), dtype=np.float32)
+        for r, doc in enumerate(docs):
+            for ch in doc.lower():
+                if "a" <= ch <= "z":
+                    out[r, ord(ch) - 97] += 1
+        return out / (np.linalg.norm(out, axis=1, keepdims=True) + 1e-8)
+
+
+def test_lru_evicts_oldest_and_expires():
+    now = [0.0]
+    c = LRUCache(2, ttl_s=10, clock=lambda: now[0])
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1  # a is now most recent
+    c.put("c", 3)
+    assert c.get("b") is None and c.get("c") == 3
+    now[0] = 10.0
+    assert c.get("a") is None
+    assert c.stats() == {"size": 1, "maxsize": 2, "hits": 2, "misses": 2, "hit_rate": 0.5}
+
+
+def test_repeated_queries_skip_the_embedding_model(fixtures, monkeypatch):
+    items, snips = fixtures
+    embedder = CountingEmbedder()
+    engine = hybrid.HybridEngine(build_corpus(items, snips, embedder, "letters"), embedder)
+    monkeypatch.setattr(hybrid._warmup, "engine", engine)
+    monkeypatch.setattr(hybrid, "_result_cache", LRUCache(16, ttl_s=60))
+    embedder.calls = 0
+
+    first = hybrid.hybrid_search("Vector DB  for PG", 3, ["Data"], None)
+    assert embedder.calls == 1
+    # normalized spelling and topic order hit the result cache: no encode at all
+    assert hybrid.hybrid_search("vector db for pg", 3, ["data"], None) == first
+    assert embedder.calls == 1
+    # a different k misses the result cache but reuses the cached query embedding
+    hybrid.hybrid_search("vector db for pg", 5, ["data"], None)
+    assert embedder.calls == 1
+    stats = hybrid.cache_stats()
+    assert stats["results"]["hits"] == 1 and stats["results"]["misses"] == 2
+    assert stats["query_embeddings"]["hits"] == 1
+
+
+def test_ingest_invalidates_results(fixtures, monkeypatch):
+    items, snips = fixtures
+    engine = hybrid.get_engine()
+    monkeypatch.setattr(hybrid._warmup, "engine", engine)
+    monkeypatch.setattr(hybrid, "_result_cache", LRUCache(16, ttl_s=60))
+    query = "DevDay tools for app developers"
+    assert hybrid.hybrid_search(query, 3, None, None)[0]["item_id"] == "it_001"
+
+    hybrid.ingest([{**items[0], "id": "it_950"}], ["it_001"], {"it_950": snips["it_001"]})
+
+    assert hybrid.hybrid_search(query, 3, None, None)[0]["item_id"] == "it_950"
+    assert hybrid.cache_stats()["results"]["hits"] == 0
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.retrieval.query_encoder import BatchingQueryEncoder
+
+
+class StandInEncoder:
+    """Deterministic per-text vectors; records every batch it is asked to encode."""
+
+    def __init__(self, delay_s=0.0, fail=False):
+        self.batches = []
+        self.delay_s = delay_s
+        self.fail = fail
+
+    def vector(self, text):
+        v = np.random.default_rng(sum(map(ord, text))).normal(size=8).astype(np.float32)
+        return v / np.linalg.norm(v)
+
+    def encode(self, texts, **_kwargs):
+        self.batches.append(list(texts))
+        time.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return np.stack([self.vector(t) for t in texts])
+
+
+def _concurrent(encoder, texts):
+    out = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def call(i):
+        start.wait()
+        try:
+            out[i] = encoder.encode(texts[i])
+        except Exception as e:
+            out[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_queries_share_batches_and_get_their_own_vector():
+    model = StandInEncoder(delay_s=0.01)
+    enc = BatchingQueryEncoder(model, max_batch=8, max_wait_ms=50)
+    texts = [f"query {i % 12}" for i in range(24)]  # 12 distinct, each asked twice
+    out = _concurrent(enc, texts)
+    for text, vec in zip(texts, out, strict=True):
+        np.testing.assert_array_equal(vec, model.vector(text))
+    assert len(model.batches) < len(texts)
+    assert max(len(b) for b in model.batches) <= 8
+    assert all(len(b) == len(set(b)) for b in model.batches)  # duplicates encoded once
+    assert enc.stats()["queries"] == 24
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    enc = BatchingQueryEncoder(StandInEncoder(fail=True), max_batch=4, max_wait_ms=20)
+    out = _concurrent(enc, ["a", "b", "c"])
+    assert all(isinstance(e, RuntimeError) for e in out)
+    with pytest.raises(RuntimeError):
+        enc.encode("d")  # the worker survives a failed batch
+
+
+def test_max_batch_one_calls_the_model_directly():
+    model = StandInEncoder()
+    enc = BatchingQueryEncoder(model, max_batch=1)
+    np.testing.assert_array_equal(enc.encode("x"), model.vector("x"))
+    assert model.batches == [["x"]] and enc._worker is None
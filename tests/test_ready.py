@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+import pytest
+
+from src import app as app_module
+from src.app import app
+from src.retrieval import hybrid
+from src.retrieval.hybrid import EngineNotReady
+
+
+def test_ready_reports_warmup_and_becomes_ready():
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 30
+        r = client.get("/ready")
+        while r.status_code != 200 and time.monotonic() < deadline:
+            assert r.json()["status"] in ("idle", "loading")
+            time.sleep(0.05)
+            r = client.get("/ready")
+        body = r.json()
+        assert r.status_code == 200
+        assert body["status"] == "ready"
+        assert body["docs"] > 0
+        assert body["elapsed_s"] is not None and body["stages"]
+
+
+def test_chat_returns_503_when_engine_not_ready(monkeypatch):
+    async def not_ready(_timeout=None):
+        raise EngineNotReady("still warming up")
+
+    monkeypatch.setattr(app_module, "aget_engine", not_ready)
+    client = TestClient(app)
+    r = client.post("/agent/v1/chat/stream", json={"message": "hi", "role": "user"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "5"
+
+
+@pytest.mark.asyncio
+async def test_async_waiters_share_one_event_and_hold_no_threads(monkeypatch):
+    loaded = threading.Event()
+
+    def load(_progress):
+        loaded.wait(5)
+        return "engine"
+
+    monkeypatch.setattr(hybrid.HybridEngine, "load", staticmethod(load))
+    warmup = hybrid._Warmup()
+    with pytest.raises(EngineNotReady, match="warming up"):
+        await warmup.wait_async(0.01)
+    threads = threading.active_count()
+    waiters = [asyncio.create_task(warmup.wait_async(5)) for _ in range(50)]
+    await asyncio.sleep(0.05)
+    assert threading.active_count() == threads and len(warmup._waiters) == 1
+    loaded.set()
+    assert await asyncio.gather(*waiters) == ["engine"] * 50
+    assert await warmup.wait_async(0) == "engine"
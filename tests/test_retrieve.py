@@ -1,9 +1,21 @@
+import json
+
+from benchmarks.synthetic import synthetic_corpus, synthetic_queries
 from fastapi.testclient import TestClient
+import pytest
+from tests.doubles.embedder import HashEmbedder
 
 from src.app import app
+from src.config import settings
+from src.retrieval import hybrid
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+
+NOW = 1762300800  # 2025-11-05, just after the newest fixture
 
 
-def test_retrieve_basic():
+def test_retrieve_basic(monkeypatch):
+    monkeypatch.setattr(hybrid.time, "time", lambda: float(NOW))
     client = TestClient(app)
     payload = {
         "query": "vector db for pg",
@@ -17,3 +29,55 @@ def test_retrieve_basic():
     assert len(data["results"]) <= 3
     # top result should be vector/postgres themed
     assert any("Vector DB" in x["title"] for x in data["results"])
+
+
+def test_retrieve_batch_streams_ndjson_in_order(monkeypatch):
+    monkeypatch.setattr(hybrid.time, "time", lambda: float(NOW))
+    monkeypatch.setattr(settings, "retrieve_batch_size", 2)
+    client = TestClient(app)
+    payload = [
+        {"query": "vector db for pg", "k": 3},
+        {"query": "langgraph compare", "k": 2, "filters": {"topic": ["agents"]}},
+        {"query": "zzz", "k": 1},
+        {"query": "vector db for pg", "k": 3, "filters": {"topic": ["app-dev"], "since": "P60D"}},
+    ]
+    r = client.post("/agent/v1/retrieve", json=payload)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    for req, line in zip(payload, lines, strict=True):
+        single = client.post("/agent/v1/retrieve/test", json=req).json()["results"]
+        assert line["results"] == single
+        assert len(single) <= req["k"]
+    assert all("url" in x and "snippet" in x for x in lines[0]["results"])
+
+
+def test_retrieve_batch_limits(monkeypatch):
+    monkeypatch.setattr(settings, "retrieve_max_queries", 2)
+    client = TestClient(app)
+    assert client.post("/agent/v1/retrieve", json=[{"query": "x"}] * 3).status_code == 413
+    assert client.post("/agent/v1/retrieve", json=[{"query": "x", "k": 0}]).status_code == 422
+
+
+@pytest.mark.parametrize("keyword_engine", ["bm25", "tfidf"])
+@pytest.mark.parametrize("embedder", [HashEmbedder(dim=32), None])
+def test_search_batch_matches_search(monkeypatch, keyword_engine, embedder):
+    monkeypatch.setattr(hybrid.time, "time", lambda: float(NOW))
+    monkeypatch.setattr(settings, "keyword_engine", keyword_engine)
+    items, snips = synthetic_corpus(3000, seed=5)
+    corpus = build_corpus(items, snips, embedder, "hash", (1.2, 0.75))
+    engine = HybridEngine(corpus, embedder)
+    # a delta segment and tombstones, and a topic only the delta has
+    new = dict(items[0], id="new_1", title="quokka release", topics=["quokkas"])
+    engine = engine.apply([new], [items[3]["id"], items[7]["id"]])
+    topics = [None, ["ai"], ["quokkas"], ["data", "agents"], ["nope"]]
+    since = [None, "P30D", "2025-01-01"]
+    reqs = [
+        (q, 1 + i % 7, topics[i % 5], since[i % 3])
+        for i, q in enumerate([*synthetic_queries(40, seed=2), "quokka", ""])
+    ]
+    for want, got in zip([engine.search(*r) for r in reqs], engine.search_batch(reqs), strict=True):
+        assert [h["item_id"] for h in got] == [h["item_id"] for h in want]
+        for g, w in zip(got, want, strict=True):
+            assert g["score"] == pytest.approx(w["score"], abs=1e-5)
@@ -0,0 +1,84 @@
+from benchmarks.synthetic import synthetic_corpus, synthetic_queries
+import numpy as np
+import pytest
+from tests.doubles.embedder import HashEmbedder
+
+from src.config import settings
+from src.retrieval.corpus import build_corpus
+from src.retrieval.hybrid import HybridEngine
+from src.retrieval.index_io import load_index, save_index
+from src.retrieval.shards import ShardPool, _file_backing
+from src.retrieval.store_vector import _top_k
+
+FILTERS = [(None, None), (["agents"], None), (None, "2025-09-01"), (["hardware"], "2025-10-01")]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return synthetic_corpus(3000, seed=5)
+
+
+@pytest.fixture(scope="module", params=["tfidf", "bm25"])
+def engines(request, data, tmp_path_factory):
+    """1-shard and 3-shard engines over the same mmap'd index."""
+    mp = pytest.MonkeyPatch()
+    mp.setattr(settings, "keyword_engine", request.param)
+    mp.setattr(settings, "query_cache_size", 0)
+    items, snips = data
+    embedder = HashEmbedder(dim=32)
+    path = tmp_path_factory.mktemp("index")
+    save_index(build_corpus(items, snips, embedder, "hash", bm25=(1.2, 0.75)), path)
+    corpus = load_index(path)
+    pools = [ShardPool(corpus, n, request.param == "bm25", vectors=True) for n in (1, 3)]
+    yield [HybridEngine(corpus, embedder, shards=pool) for pool in pools]
+    for pool in pools:
+        pool.close()
+    mp.undo()
+
+
+def test_sharded_search_matches_single_shard(engines, data):
+    plain, sharded = engines
+    assert sharded.shards.shared_bytes == 0  # every array is opened from the index files
+    queries = synthetic_queries(25, seed=2)
+    for topics, since in FILTERS:
+        for q in queries:
+            assert sharded.search(q, 10, topics, since) == plain.search(q, 10, topics, since)
+
+    items, _ = data
+    new = [dict(items[0], id="new_1", title="brand new agents release")]
+    gone = [items[5]["id"], items[2500]["id"]]
+    plain, sharded = plain.apply(new, gone), sharded.apply(new, gone)
+    assert sharded.shards is engines[1].shards
+    for topics, since in FILTERS[:2]:
+        for q in [*queries[:10], "brand new agents release"]:
+            assert sharded.search(q, 10, topics, since) == plain.search(q, 10, topics, since)
+
+
+def test_keyword_shards_match_in_process(data, monkeypatch):
+    # ANN embeddings are searched in process, and keyword scores match it bit for bit
+    monkeypatch.setattr(settings, "vector_index", "ivf")
+    items, snips = data
+    embedder = HashEmbedder(dim=32)
+    corpus = build_corpus(items[:500], snips, embedder, "hash")
+    pool = ShardPool(corpus, 2, bm25=False, vectors=False)
+    try:
+        assert pool.shared_bytes >= corpus.X.nbytes  # in memory: copied to shared memory
+        plain = HybridEngine(corpus, embedder)
+        sharded = HybridEngine(corpus, embedder, plain.vec_store, shards=pool)
+        for q in synthetic_queries(10, seed=4):
+            assert sharded.search(q, 5, None, None) == plain.search(q, 5, None, None)
+    finally:
+        pool.close()
+
+
+def test_file_backing_follows_views(tmp_path):
+    np.save(tmp_path / "a.npy", np.arange(100, dtype=np.int64))
+    a = np.load(tmp_path / "a.npy", mmap_mode="r")
+    name, offset = _file_backing(np.asarray(a)[10:20])
+    assert np.array_equal(np.memmap(name, np.int64, "r", offset, (10,)), np.arange(10, 20))
+    assert _file_backing(np.arange(3)) is None
+
+
+def test_top_k_breaks_ties_at_the_cut_by_position():
+    sims = np.array([0.5, 0.9, 0.5, 0.5, 0.1, 0.5], dtype=np.float32)
+    assert _top_k(sims, 3).tolist() == [1, 0, 2]
@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+from src.graph import answerer
+from src.graph.graph import ainvoke
+from src.llm.provider import LocalStub
+from src.retrieval import hybrid
+from src.types import ChatRequest
+
+DOCS = [
+    {"item_id": "a", "title": "A", "snippet": "First snippet."},
+    {"item_id": "b", "title": "B", "excerpt": "Second excerpt."},
+]
+
+
+def _events(raw: list[tuple[float, bytes]]):
+    out = []
+    for t, chunk in raw:
+        head, data = chunk.decode().strip().split("\n")
+        out.append((t, head.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return out
+
+
+@pytest.mark.asyncio
+async def test_stub_stream_chunks_rebuild_the_answer():
+    stub = LocalStub()
+    answer, ids = stub.generate_answer("q", DOCS)
+    chunks = [c async for c in stub.astream_answer("q", DOCS)]
+    assert len(chunks) > 5 and "".join(chunks) == answer
+    assert ids == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_tokens_arrive_as_generated_then_citations_and_done(monkeypatch):
+    hybrid.get_engine()
+    monkeypatch.setattr(answerer, "get_model", lambda: LocalStub(token_delay_s=0.01))
+    req = ChatRequest(message="What's new in app dev?", role="user")
+
+    raw = [(time.perf_counter(), chunk) async for chunk in ainvoke(req)]
+    events = _events(raw)
+
+    kinds = [e for _, e, _ in events]
+    assert kinds[-2:] == ["citations", "done"] and set(kinds[:-2]) == {"token"}
+    tokens = [(t, d["content"]) for t, e, d in events if e == "token"]
+    assert len(tokens) > 10
+    # streamed: the first token arrives long before the last one
+    assert tokens[-1][0] - tokens[0][0] > 0.5 * (len(tokens) - 1) * 0.01
+    citations = events[-2][2]["citations"]
+    assert citations and {"item_id", "title", "url", "published_at"} <= set(citations[0])
+    timing = events[-1][2]["timing"]
+    assert timing["chunks"] == len(tokens)
+    assert timing["ttft_ms"] < timing["total_ms"] and timing["itl_ms_mean"] >= 5
+    assert events[-1][2]["usage"]["output"] == len("".join(c for _, c in tokens))
@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+
+from benchmarks.synthetic import synthetic_corpus, write_corpus
+
+from src.retrieval.corpus import build_corpus, item_domain
+
+
+def test_corpus_is_deterministic_and_prefix_stable():
+    small, small_snips = synthetic_corpus(20, seed=3)
+    large, large_snips = synthetic_corpus(50, seed=3)
+    assert small == large[:20]
+    assert all(small_snips[i] == large_snips[i] for i in small_snips)
+    assert synthetic_corpus(20, seed=4)[0] != small
+
+
+def test_written_corpus_has_fixture_shape(tmp_path):
+    write_corpus(tmp_path, 200)
+    items = json.loads((tmp_path / "items.json").read_text())
+    snippets = json.loads((tmp_path / "snippets.json").read_text())
+    fixture = Path(__file__).parents[1] / "fixtures" / "items.json"
+    fixture_keys = set(json.loads(fixture.read_text())[0])
+    assert len(items) == 200 and set(snippets) == {it["id"] for it in items}
+    assert all(set(it) == fixture_keys for it in items)
+    assert len({item_domain(it["url"]) for it in items}) > 10
+    corpus = build_corpus(items, snippets, None, "none")
+    assert len(corpus) == 200 and len(corpus.topic_vocab) > 5
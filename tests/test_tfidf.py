@@ -0,0 +1,40 @@
+import numpy as np
+
+from src.utils.sparse import coo_matmul
+from src.utils.tfidf import SimpleTfidfVectorizer
+
+
+def test_tfidf_csr_matches_dense_scoring():
+    corpus = ["vector db for postgres", "langgraph agents guide", "postgres fts and vector search"]
+    vec = SimpleTfidfVectorizer(max_features=100)
+    X = vec.fit_transform(corpus)
+    assert X.shape == (3, len(vec.vocab_))
+    assert X.nnz < X.shape[0] * X.shape[1]
+
+    q_idx, q_val = vec.transform(["postgres vector"]).row(0)
+    dense_q = np.zeros(X.shape[1], dtype=np.float32)
+    dense_q[q_idx] = q_val
+    np.testing.assert_allclose(X.dot_sparse(q_idx, q_val), X.to_dense() @ dense_q, rtol=1e-6)
+    assert int(np.argmax(X.dot_sparse(q_idx, q_val))) in (0, 2)
+
+
+def test_tfidf_transform_unknown_terms_is_empty():
+    vec = SimpleTfidfVectorizer()
+    X = vec.fit_transform(["alpha beta", "beta gamma"])
+    q_idx, _ = vec.transform(["zeta"]).row(0)
+    assert q_idx.size == 0
+    assert not X.dot_sparse(q_idx, np.zeros(0, dtype=np.float32)).any()
+
+
+def test_dot_sparse_batch_matches_single_queries():
+    corpus = ["vector db for postgres", "langgraph agents guide", "postgres fts and vector search"]
+    vec = SimpleTfidfVectorizer(max_features=100)
+    X = vec.fit_transform(corpus)
+    Q = vec.transform(["postgres vector", "zzz", "agents", "vector vector search guide"])
+    for budget in (1 << 24, 1):  # budget 1 splits down to one query per product
+        batch = coo_matmul(X.row_ids, X.indices, X.data, X.shape[0], Q, budget)
+        assert [r.tolist() for r, _ in batch] == [r.tolist() for r, _ in X.dot_sparse_batch(Q)]
+        for j, (rows, scores) in enumerate(batch):
+            want = X.dot_sparse(*Q.row(j))
+            assert rows.tolist() == np.flatnonzero(want).tolist()
+            np.testing.assert_array_equal(scores, want[rows])
@@ -0,0 +1,105 @@
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from src.app import app
+from src.config import settings
+from src.tracing import Trace, activate, record, span
+
+CHAT = {"message": "What's new in app dev?", "role": "user"}
+
+
+@pytest.fixture(autouse=True)
+def trace_header(monkeypatch):
+    monkeypatch.setattr(settings, "trace_header", True)
+    monkeypatch.setattr(settings, "admin_token", "")
+
+
+def _events(body: str) -> dict[str, dict]:
+    out = {}
+    for block in body.strip().split("\n\n"):
+        head, data = block.split("\n", 1)
+        out[head.removeprefix("event: ")] = json.loads(data.removeprefix("data: "))
+    return out
+
+
+def _chat(headers=None) -> tuple[list[str], dict[str, dict]]:
+    client = TestClient(app)
+    with client.stream("POST", "/agent/v1/chat/stream", json=CHAT, headers=headers) as r:
+        assert r.status_code == 200
+        body = r.read().decode()
+    names = [b.split("\n", 1)[0].removeprefix("event: ") for b in body.strip().split("\n\n")]
+    return names, _events(body)
+
+
+def test_spans_nest_and_take_attrs():
+    trace = Trace()
+    with activate(trace), span("outer", k=3) as s:
+        s["cache"] = "miss"
+        with span("inner"):
+            t0 = time.perf_counter()
+            record("stage", t0, t0 + 0.002, rows=7)
+    spans = {s["name"]: s for s in trace.finish()["spans"]}
+    assert spans["outer"]["parent"] is None
+    assert spans["outer"]["k"] == 3 and spans["outer"]["cache"] == "miss"
+    assert spans["inner"]["parent"] == spans["outer"]["id"]
+    assert spans["stage"]["parent"] == spans["inner"]["id"]
+    assert spans["stage"]["ms"] == 2.0 and spans["stage"]["rows"] == 7
+    assert spans["outer"]["ms"] >= spans["inner"]["ms"]
+
+
+def test_trace_header_adds_final_trace_event():
+    names, events = _chat({"X-Trace": "spans"})
+    assert names[-2:] == ["done", "trace"]
+    spans = events["trace"]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    for name in ("chat_stream", "node.plan", "node.retrieve", "node.synthesize", "llm.stub"):
+        assert name in by_name
+    assert by_name["hybrid_search"]["parent"] == by_name["node.retrieve"]["id"]
+    assert by_name["node.synthesize"]["parent"] == by_name["chat_stream"]["id"]
+
+    names, _ = _chat()
+    assert "trace" not in names
+
+
+def test_trace_header_is_gated(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    names, _ = _chat({"X-Trace": "cprofile"})
+    assert "trace" not in names
+    names, _ = _chat({"X-Trace": "cprofile", "X-Admin-Token": "nope"})
+    assert "trace" not in names
+    names, events = _chat({"X-Trace": "cprofile", "X-Admin-Token": "s3cret"})
+    assert names[-1] == "trace" and events["trace"]["profile"]["kind"] == "cprofile"
+
+    monkeypatch.setattr(settings, "trace_header", False)
+    names, _ = _chat({"X-Trace": "spans", "X-Admin-Token": "s3cret"})
+    assert "trace" not in names
+
+
+def test_profilers_report_and_release():
+    for mode in ("cprofile", "sample", "cprofile"):
+        _names, events = _chat({"X-Trace": mode})
+        profile = events["trace"]["profile"]
+        assert profile["kind"] == mode and "error" not in profile
+    assert events["trace"]["profile"]["top"]
+
+
+def test_sampled_traces_written_to_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "trace_sample_rate", 1.0)
+    monkeypatch.setattr(settings, "trace_dir", str(tmp_path))
+    names, _ = _chat()
+    assert "trace" not in names
+    (path,) = tmp_path.glob("*.json")
+    assert any(s["name"] == "node.retrieve" for s in json.loads(path.read_text())["spans"])
+
+
+def test_disabled_span_is_nearly_free():
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with span("hot"):
+            pass
+    per_call_us = (time.perf_counter() - t0) / n * 1e6
+    assert per_call_us < 2
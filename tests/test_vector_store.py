@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.retrieval.store_vector import InMemoryVectorStore
+
+
+def _brute(vecs: dict[str, np.ndarray], q: np.ndarray, k: int) -> list[str]:
+    sims = {i: float(v @ q / (np.linalg.norm(v) * np.linalg.norm(q))) for i, v in vecs.items()}
+    return sorted(sims, key=lambda i: -sims[i])[:k]
+
+
+def test_store_grows_and_matches_brute_force():
+    rng = np.random.default_rng(0)
+    store = InMemoryVectorStore(dim=8, capacity=2)
+    vecs = {f"d{i}": rng.normal(size=8).astype(np.float32) for i in range(50)}
+    for i in range(0, 50, 7):  # many small appends exercise buffer growth
+        chunk = list(vecs)[i : i + 7]
+        store.add(chunk, np.stack([vecs[c] for c in chunk]))
+    assert len(store) == 50
+    q = rng.normal(size=8).astype(np.float32)
+    hits = store.search(q, 5)
+    assert [h[0] for h in hits] == _brute(vecs, q, 5)
+    assert np.allclose(np.linalg.norm(store.vecs, axis=1), 1.0, atol=1e-5)
+
+
+def test_upsert_delete_and_compaction():
+    rng = np.random.default_rng(1)
+    store = InMemoryVectorStore(dim=4, compact_ratio=0.5)
+    vecs = {f"d{i}": rng.normal(size=4).astype(np.float32) for i in range(10)}
+    store.add(list(vecs), np.stack(list(vecs.values())))
+
+    vecs["d3"] = rng.normal(size=4).astype(np.float32)
+    store.upsert(["d3"], vecs["d3"][None, :])
+    assert len(store) == 10
+    assert store.delete(["d0", "d1", "missing"]) == 2
+    del vecs["d0"], vecs["d1"]
+
+    q = vecs["d3"]
+    assert store.search(q, 1)[0][0] == "d3"
+    assert {h[0] for h in store.search(q, 100)} == set(vecs)
+
+    store.delete(["d2", "d4", "d5", "d6"])  # crosses compact_ratio
+    assert None not in store.ids
+    assert store.search(q, 1)[0][0] == "d3"
+
+
+def test_search_batch_matches_single_queries():
+    rng = np.random.default_rng(2)
+    store = InMemoryVectorStore(dim=16)
+    store.add([f"d{i}" for i in range(100)], rng.normal(size=(100, 16)))
+    Q = rng.normal(size=(6, 16)).astype(np.float32)
+    batched = store.search_batch(Q, 4)
+    for q, hits in zip(Q, batched, strict=True):
+        assert [h[0] for h in hits] == [h[0] for h in store.search(q, 4)]